@@ -182,6 +182,22 @@ class LogEntrySerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
 
+class SectionListSerializer(serializers.ListSerializer):
+    """
+    Serialize lists of site log sections. The published diffs of all of the
+    sections are computed in one batch and handed to the child serializer
+    instead of diffing each section on its own.
+    """
+
+    def to_representation(self, data):
+        sections = list(data.all() if hasattr(data, 'all') else data)
+        self.child.diffs = self.child.Meta.model.published_diffs(sections)
+        try:
+            return super().to_representation(sections)
+        finally:
+            self.child.diffs = None
+
+
 class AlertSerializer(serializers.ModelSerializer):
 
     target = serializers.SerializerMethodField()
@@ -36,6 +36,7 @@ from slm.api.edit.serializers import (
     AlertSerializer,
     LogEntrySerializer,
     ReviewRequestSerializer,
+    SectionListSerializer,
     SiteFileUploadSerializer,
     StationSerializer,
     UserSerializer,
@@ -64,6 +65,7 @@ from slm.defines import (
 from slm.parsing.legacy.parser import Error
 from slm.models import (
     Alert,
+    AlertAudience,
     LogEntry,
     Network,
     Agency,
@@ -89,6 +91,7 @@ from slm.models import (
     SiteReceiver,
     SiteResponsibleAgency,
     SiteSection,
+    SiteSectionStatus,
     SiteSignalObstructions,
     SiteSubSection,
     SiteSurveyedLocalTies,
@@ -221,12 +224,12 @@ class StationFilter(AcceptListArguments, FilterSet):
         return queryset.filter(alert_q)
 
     def filter_alert_level(self, queryset, name, value):
-        level_q = Q()
-        for alerts in Site.alert_fields:
-            level_q |= Q(
-                **{f'{alerts}__level__in': value}
-            )
-        return queryset.filter(level_q)
+        return queryset.filter(
+            pk__in=AlertAudience.objects.filter(
+                level__in=value,
+                site__isnull=False
+            ).values('site')
+        )
 
     def filter_receivers(self, queryset, name, value):
         if value:
@@ -729,7 +732,12 @@ class SectionViewSet(type):
                     return self.context['request'].user.is_moderator()
                 return None
 
+            # published diffs precomputed by the list serializer
+            diffs = None
+
             def get__diff(self, obj):
+                if self.diffs is not None and obj.pk in self.diffs:
+                    return self.diffs[obj.pk]
                 return obj.published_diff()
 
             def perform_section_update(self, validated_data, instance=None):
@@ -899,17 +907,11 @@ class SectionViewSet(type):
                             )
                         elif '_flags' in validated_data:
                             # this is just a flag update
-                            added = (
-                                len(flags) -
-                                (len(instance._flags) if instance._flags else 0)
-                            )
-                            site.num_flags += added
-                            if site.num_flags < 0:
-                                site.num_flags = 0
-
-                            site.save()
                             instance._flags = flags
                             instance.save()
+                            SiteSectionStatus.objects.refresh(instance)
+                            site.num_flags = site.section_statuses.totals()[0]
+                            site.save()
 
                         if do_publish:
                             update_status = update_status or now()
@@ -924,7 +926,8 @@ class SectionViewSet(type):
                             instance.site.update_status(
                                 save=True,
                                 user=self.context['request'].user,
-                                timestamp=update_status
+                                timestamp=update_status,
+                                section=instance
                             )
                         return instance
                     except DjangoValidationError as ve:
@@ -980,6 +983,7 @@ class SectionViewSet(type):
 
             class Meta:
                 model = ModelClass
+                list_serializer_class = SectionListSerializer
                 fields = [
                     'site',
                     'id',
@@ -1097,7 +1101,8 @@ class SectionViewSet(type):
                     instance.site.update_status(
                         save=True,
                         user=self.request.user,
-                        timestamp=now()
+                        timestamp=now(),
+                        section=section
                     )
                     return None
 
@@ -1120,7 +1125,8 @@ class SectionViewSet(type):
                     instance.site.update_status(
                         save=True,
                         user=self.request.user,
-                        timestamp=now()
+                        timestamp=now(),
+                        section=section
                     )
                 return section
 
@@ -1,5 +1,6 @@
 from django.http import QueryDict
 from django_filters import (
+    BaseCSVFilter,
     BaseInFilter,
     NumberFilter,
     DateTimeFilter,
@@ -50,6 +51,12 @@ class MustIncludeThese(BaseInFilter, NumberFilter):
         return qs
 
 
+class NumberListFilter(BaseCSVFilter, NumberFilter):
+    """
+    A comma separated list of numbers - i.e. coordinates.
+    """
+
+
 class SLMDateTimeField(DateTimeField):
     """
     A DateTimeField that uses dateutil to parse datetimes. Much more lenient
@@ -1,5 +1,58 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as B64Error
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def table_count(model, using='default'):
+    """
+    Get the total number of rows in the model's table. Totals are cached for
+    SLM_TABLE_COUNT_TIMEOUT seconds. On PostgreSQL the planner's row estimate
+    is used for large tables instead of counting.
+
+    :param model: The model class
+    :param using: The database alias
+    :return: The (possibly estimated) number of rows
+    """
+    key = f'slm.table_count.{using}.{model._meta.label_lower}'
+    count = cache.get(key)
+    if count is None:
+        count = -1
+        connection = connections[using]
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT reltuples::bigint FROM pg_class WHERE oid = '
+                    '%s::regclass',
+                    [model._meta.db_table]
+                )
+                row = cursor.fetchone()
+                count = row[0] if row else -1
+        if count < getattr(settings, 'SLM_TABLE_ESTIMATE_THRESHOLD', 100000):
+            count = model.objects.using(using).count()
+        cache.set(
+            key,
+            count,
+            timeout=getattr(settings, 'SLM_TABLE_COUNT_TIMEOUT', 60)
+        )
+    return count
+
+
+def cursor_value(value):
+    """
+    JSON serialize keyset values without losing precision.
+    """
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
 
 
 class BrowsablePagination(LimitOffsetPagination):
@@ -11,24 +64,199 @@ class ClientPagination(LimitOffsetPagination):
 
 
 class DataTablesPagination(LimitOffsetPagination):
+    """
+    Limit/offset pagination with a response shaped for the datatables
+    library.
+
+    If the cursor query parameter is present (it may be empty for the first
+    page) keyset pagination is used instead. Pages are found by filtering on
+    the ordering fields of the last (or first) row of the adjacent page, so
+    deep pages are as fast as the first. The filtered count is computed on
+    the first page and carried in the cursor. Querysets whose ordering cannot
+    be used as a keyset fall back to offsets.
+    """
     default_limit = 20
 
     # datatables naming
     limit_query_param = 'length'
     offset_query_param = 'start'
+    cursor_query_param = 'cursor'
 
     queryset = None
     draw = None
 
+    # keyset state
+    cursor = None
+    keyset = None
+    page = None
+    nulls_largest = False
+
     def paginate_queryset(self, queryset, request, view=None):
         self.queryset = queryset
         self.draw = request.query_params.get('draw', None)
+        if self.cursor_query_param in request.query_params:
+            self.cursor = self.decode_cursor(
+                request.query_params[self.cursor_query_param]
+            )
+            self.keyset = self.get_keyset(queryset)
+            if self.keyset:
+                return self.paginate_keyset(queryset, request)
+            self.cursor = None
         return super().paginate_queryset(queryset, request, view=view)
 
+    def get_keyset(self, queryset):
+        """
+        Get the ordering of the queryset as a list of (field, descending)
+        tuples with the primary key appended as a tie breaker, or None if the
+        ordering can not be used as a keyset.
+        """
+        ordering = (
+            queryset.query.order_by or
+            (queryset.query.default_ordering and queryset.model._meta.ordering)
+            or []
+        )
+        keyset = []
+        for field in ordering:
+            if not isinstance(field, str) or field == '?':
+                return None
+            keyset.append((field.lstrip('-'), field.startswith('-')))
+        if not any(field in {'pk', queryset.model._meta.pk.name}
+                   for field, _ in keyset):
+            keyset.append(('pk', keyset[-1][1] if keyset else False))
+        return keyset
+
+    def decode_cursor(self, cursor):
+        if not cursor:
+            return {}
+        try:
+            cursor = json.loads(urlsafe_b64decode(cursor.encode()))
+        except (B64Error, ValueError, UnicodeDecodeError) as err:
+            raise NotFound('Invalid cursor.') from err
+        if not isinstance(cursor, dict):
+            raise NotFound('Invalid cursor.')
+        return cursor
+
+    def encode_cursor(self, **cursor):
+        return urlsafe_b64encode(
+            json.dumps(cursor, default=cursor_value).encode()
+        ).decode()
+
+    def keyset_q(self, values, reverse=False):
+        """
+        Build the filter that selects rows after (or before if reverse) the
+        row with the given keyset values. Nullable fields are compared with
+        explicit isnull branches placed where the backend orders NULLs.
+        """
+        q_filter = Q()
+        for idx in reversed(range(len(self.keyset))):
+            field, descending = self.keyset[idx]
+            key = f'_keyset_{idx}'
+            # are nulls on the side of the boundary we are selecting?
+            nulls_after = (self.nulls_largest != descending) != reverse
+            if values[idx] is None:
+                after = (
+                    Q(pk__in=[]) if nulls_after
+                    else Q(**{f'{key}__isnull': False})
+                )
+                equal = Q(**{f'{key}__isnull': True})
+            else:
+                after = Q(**{
+                    f'{key}__{"lt" if descending ^ reverse else "gt"}':
+                        values[idx]
+                })
+                if nulls_after:
+                    after |= Q(**{f'{key}__isnull': True})
+                equal = Q(**{key: values[idx]})
+            q_filter = after if idx == len(self.keyset) - 1 else (
+                after | (equal & q_filter)
+            )
+        return q_filter
+
+    def paginate_keyset(self, queryset, request):
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.offset = self.cursor.get('o', 0)
+        self.count = self.cursor.get('c', None)
+        if self.count is None:
+            self.count = self.get_count(queryset)
+        self.nulls_largest = connections[queryset.db].vendor in {
+            'postgresql',
+            'oracle'
+        }
+
+        values = self.cursor.get('k', None)
+        reverse = self.cursor.get('d', None) == 'p'
+        queryset = queryset.annotate(**{
+            f'_keyset_{idx}': F(field)
+            for idx, (field, _) in enumerate(self.keyset)
+        }).order_by(*[
+            f'{"-" if descending else ""}_keyset_{idx}'
+            for idx, (_, descending) in enumerate(self.keyset)
+        ])
+        if values and len(values) == len(self.keyset):
+            if reverse:
+                queryset = queryset.reverse()
+            queryset = queryset.filter(self.keyset_q(values, reverse))
+            self.page = list(queryset[:self.limit])
+            if reverse:
+                self.page.reverse()
+        else:
+            self.page = list(queryset[self.offset:self.offset + self.limit])
+        return self.page
+
+    def row_keyset(self, row):
+        return [
+            getattr(row, f'_keyset_{idx}') for idx in range(len(self.keyset))
+        ]
+
+    def get_next_link(self):
+        if self.cursor is None:
+            return super().get_next_link()
+        if not self.page or self.offset + self.limit >= self.count:
+            return None
+        url = remove_query_param(
+            self.request.build_absolute_uri(),
+            self.offset_query_param
+        )
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        return replace_query_param(
+            url,
+            self.cursor_query_param,
+            self.encode_cursor(
+                k=self.row_keyset(self.page[-1]),
+                o=self.offset + self.limit,
+                c=self.count
+            )
+        )
+
+    def get_previous_link(self):
+        if self.cursor is None:
+            return super().get_previous_link()
+        if not self.page or self.offset <= 0:
+            return None
+        url = remove_query_param(
+            self.request.build_absolute_uri(),
+            self.offset_query_param
+        )
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        return replace_query_param(
+            url,
+            self.cursor_query_param,
+            self.encode_cursor(
+                k=self.row_keyset(self.page[0]),
+                o=max(self.offset - self.limit, 0),
+                c=self.count,
+                d='p'
+            )
+        )
+
     def get_paginated_response(self, data):
         resp = {
             'data': data,
-            'recordsTotal': self.queryset.model.objects.count(),
+            'recordsTotal': table_count(
+                self.queryset.model,
+                using=self.queryset.db
+            ),
             'recordsFiltered': self.count,
             'next': self.get_next_link(),
             'previous': self.get_previous_link()
@@ -1,8 +1,14 @@
+import time
+
 import django_filters
+from django.conf import settings
+from django.core.files.base import ContentFile
 from django.db.models import Q
 from django_filters.rest_framework import DjangoFilterBackend, FilterSet
 from rest_framework import mixins, viewsets
+from rest_framework.exceptions import ValidationError
 from rest_framework.filters import OrderingFilter
+from rest_framework.response import Response
 from slm.api.pagination import DataTablesPagination
 from slm.api.public.serializers import (
     SiteFileUploadSerializer,
@@ -14,7 +20,14 @@ from slm.api.public.serializers import (
     AgencySerializer,
     NetworkSerializer
 )
-from slm.api.views import BaseSiteLogDownloadViewSet
+from slm.api.views import (
+    BaseSiteLogDownloadViewSet,
+    EXPORT_RENDERERS,
+    TarGzRenderer,
+    TarRenderer,
+    ZipRenderer,
+    archive_response
+)
 from slm.models import (
     SiteFileUpload,
     SiteIndex,
@@ -23,14 +36,18 @@ from slm.models import (
     Radome,
     ArchivedSiteLog,
     Agency,
-    Network
+    Network,
+    LogEntry,
+    Site
 )
-from slm.api.filter import SLMDateTimeFilter
-from django.http import FileResponse
-from slm.defines import SiteLogFormat
+from slm.api.filter import NumberListFilter, SLMDateTimeFilter
+from django.http import StreamingHttpResponse
+from slm.defines import LogEntryType, SiteLogFormat
+from slm.utils import to_bool
 from django_enum.filters import EnumFilter
 from django.utils.translation import gettext as _
-from datetime import datetime
+from datetime import datetime, timedelta
+from django.utils.timezone import now
 
 
 class DataTablesListMixin(mixins.ListModelMixin):
@@ -63,6 +80,20 @@ class StationListViewSet(
             lookup_expr='icontains'
         )
         search = django_filters.CharFilter(method='search_columns')
+        bbox = NumberListFilter(
+            method='within_bbox',
+            help_text=_(
+                'Stations within the bounding box: min latitude,min '
+                'longitude,max latitude,max longitude (degrees).'
+            )
+        )
+        near = NumberListFilter(
+            method='within_radius',
+            help_text=_(
+                'Stations within a distance of a point: latitude,longitude,'
+                'radius (degrees, km).'
+            )
+        )
 
         def at_epoch(self, queryset, name, value):
             return queryset.at_epoch(epoch=value)
@@ -77,25 +108,27 @@ class StationListViewSet(
 
         def search_columns(self, queryset, name, value):
             """
-            Search multiple columns for the given value.
+            Search multiple columns for the given value. The searchable
+            columns are denormalized into each index's search document.
             """
-            return queryset.filter(
-                Q(site__name__istartswith=value) |
-                Q(site__agencies__shortname__icontains=value) |
-                Q(site__agencies__name__icontains=value) |
-                Q(site__networks__name__icontains=value) |
-                Q(city__icontains=value) |
-                Q(country__icontains=value) |
-                Q(antenna__model__icontains=value) |
-                Q(radome__model__icontains=value) |
-                Q(receiver__model__icontains=value) |
-                Q(serial_number__icontains=value) |
-                Q(firmware__icontains=value) |
-                Q(frequency_standard__icontains=value) |
-                Q(domes_number__icontains=value) |
-                Q(satellite_system__name__icontains=value) |
-                Q(data_center__icontains=value)
-            ).distinct()
+            return queryset.search(value)
+
+        def within_bbox(self, queryset, name, value):
+            if len(value) != 4:
+                raise ValidationError({
+                    name: _(
+                        'Expected min latitude,min longitude,max latitude,'
+                        'max longitude.'
+                    )
+                })
+            return queryset.within_bbox(*(float(coord) for coord in value))
+
+        def within_radius(self, queryset, name, value):
+            if len(value) != 3 or value[2] < 0:
+                raise ValidationError({
+                    name: _('Expected latitude,longitude,radius.')
+                })
+            return queryset.within_radius(*(float(coord) for coord in value))
 
         class Meta:
             model = SiteIndex
@@ -103,7 +136,9 @@ class StationListViewSet(
                 'name',
                 'epoch',
                 'agency',
-                'search'
+                'search',
+                'bbox',
+                'near'
             )
 
     filter_backends = (DjangoFilterBackend, OrderingFilter)
@@ -125,6 +160,349 @@ class StationListViewSet(
         ).public().at_epoch().availability()
 
 
+class StationExportViewSet(viewsets.GenericViewSet):
+    """
+    Bulk export of the station index in CSV, NDJSON or (if pyarrow is
+    installed) Arrow and Parquet formats. Takes the same filter and ordering
+    parameters as the station list. Rows are streamed directly from the
+    database without instantiating models or serializers.
+    """
+    permission_classes = []
+    pagination_class = None
+    renderer_classes = EXPORT_RENDERERS
+
+    filter_backends = StationListViewSet.filter_backends
+    filterset_class = StationListViewSet.StationFilter
+    ordering_fields = StationListViewSet.ordering_fields
+    ordering = StationListViewSet.ordering
+
+    # the number of rows to fetch from the database at a time
+    chunk_size = 2000
+
+    # (name, lookup, type) - list columns are multi valued relations that
+    # are fetched separately
+    columns = [
+        ('name', 'site__name', str),
+        ('agencies', 'site__agencies__name', list),
+        ('networks', 'site__networks__name', list),
+        ('registered', 'site__created', datetime),
+        ('last_publish', 'site__last_publish', datetime),
+        ('latitude', 'latitude', float),
+        ('longitude', 'longitude', float),
+        ('city', 'city', str),
+        ('country', 'country', str),
+        ('elevation', 'elevation', float),
+        ('antenna_type', 'antenna__model', str),
+        ('radome_type', 'radome__model', str),
+        ('receiver_type', 'receiver__model', str),
+        ('serial_number', 'serial_number', str),
+        ('firmware', 'firmware', str),
+        ('frequency_standard', 'frequency_standard', str),
+        ('domes_number', 'domes_number', str),
+        ('satellite_system', 'satellite_system__name', list),
+        ('data_center', 'data_center', str),
+        ('last_rinex2', 'last_rinex2', datetime),
+        ('last_rinex3', 'last_rinex3', datetime),
+        ('last_rinex4', 'last_rinex4', datetime),
+        ('last_data_time', 'last_data_time', datetime)
+    ]
+
+    def get_queryset(self):
+        return SiteIndex.objects.public().at_epoch().availability().distinct()
+
+    def get_related(self, queryset, lookup):
+        """
+        Fetch the values of a multi valued relation for all indexes in the
+        queryset.
+
+        :param queryset: The filtered SiteIndex queryset
+        :param lookup: The lookup of the related values, relative to the index
+        :return: A 2-tuple of the row position of the key of the values (0 for
+            the index and 1 for the site) and a dictionary mapping keys to
+            lists of values
+        """
+        key = 'site' if lookup.startswith('site__') else 'pk'
+        related = {}
+        for pk, value in SiteIndex.objects.filter(
+            pk__in=queryset.values('pk'),
+            **{f'{lookup}__isnull': False}
+        ).values_list(key, lookup).order_by(key, lookup).distinct():
+            related.setdefault(pk, []).append(value)
+        return (1 if key == 'site' else 0), related
+
+    def rows(self, queryset):
+        related = [
+            self.get_related(queryset, lookup) if typ is list else None
+            for _, lookup, typ in self.columns
+        ]
+        for row in queryset.values_list(
+            'pk',
+            'site',
+            *[lookup for _, lookup, typ in self.columns if typ is not list]
+        ).iterator(chunk_size=self.chunk_size):
+            values = iter(row[2:])
+            line = []
+            for relation in related:
+                if relation:
+                    line.append(relation[1].get(row[relation[0]], []))
+                else:
+                    # enum columns are exported as their primitive values
+                    value = next(values)
+                    line.append(getattr(value, 'value', value))
+            yield line
+
+    def list(self, request, *args, **kwargs):
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            renderer.stream(
+                [(name, typ) for name, _, typ in self.columns],
+                self.rows(self.filter_queryset(self.get_queryset()))
+            ),
+            content_type=renderer.media_type
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="stations.{renderer.format}"'
+        )
+        return response
+
+
+class ArchiveBundleViewSet(viewsets.GenericViewSet):
+    """
+    Download the archived site logs of many stations as a single tar, gzip
+    compressed tar or zip file. Takes the same filter parameters as the
+    station list. Only the logs active at the epoch (default now) are
+    included unless history is true, then all archived logs of the matching
+    stations are. The log_format parameter selects the site log formats to
+    include (default: legacy) and may be repeated.
+
+    Indexes and their archives are resolved in a few queries up front and the
+    bundle is written as it is streamed. If SLM_DEFER_ARCHIVES is set, logs
+    that have not been archived yet are left out of the bundle and listed in
+    a missing.txt entry at its end, otherwise they are archived before the
+    bundle is streamed.
+    """
+    permission_classes = []
+    pagination_class = None
+    renderer_classes = [TarRenderer, TarGzRenderer, ZipRenderer]
+
+    filter_backends = (DjangoFilterBackend,)
+    filterset_class = StationListViewSet.StationFilter
+
+    # the number of archives to fetch from the database at a time
+    chunk_size = 500
+
+    # the bundle entry that lists the logs that have not been archived yet
+    missing_name = 'missing.txt'
+
+    def get_queryset(self):
+        return SiteIndex.objects.public()
+
+    # the site log formats that are archived
+    log_formats = [SiteLogFormat.LEGACY, SiteLogFormat.GEODESY_ML]
+
+    def get_log_formats(self):
+        log_formats = []
+        for param in self.request.query_params.getlist(
+            'log_format',
+            [SiteLogFormat.LEGACY]
+        ):
+            try:
+                log_format = SiteLogFormat(param)
+            except ValueError:
+                log_format = None
+            if log_format not in self.log_formats:
+                raise ValidationError({
+                    'log_format': _('Unsupported archive format: {}').format(
+                        param
+                    )
+                })
+            if log_format not in log_formats:
+                log_formats.append(log_format)
+        return log_formats
+
+    def get_indexes(self):
+        indexes = self.filter_queryset(self.get_queryset())
+        if not to_bool(self.request.query_params.get('history', False)) and (
+            'epoch' not in self.request.query_params
+        ):
+            indexes = indexes.at_epoch()
+        return indexes
+
+    def get_missing(self, indexes, log_formats):
+        """
+        Get the logs of the given indexes that have not been archived.
+
+        :return: A list of 2-tuples of (index, log format)
+        """
+        return [
+            (index, log_format)
+            for log_format in log_formats
+            for index in SiteIndex.objects.filter(
+                pk__in=indexes.values('pk')
+            ).exclude(
+                files__log_format=log_format
+            ).select_related('site').order_by('site__name', 'begin')
+        ]
+
+    def files(self, indexes, log_formats, missing):
+        """
+        Yield the archived logs of the given indexes, followed by an entry
+        listing the missing logs, if there are any.
+        """
+        names = set()
+
+        def entry(archive):
+            name = archive.name
+            if name in names:
+                # more than one log was published on the same day
+                stem, _, ext = name.rpartition('.')
+                name = f'{stem}_{archive.index.begin:%H%M%S}.{ext}'
+            names.add(name)
+            return (
+                name,
+                archive.index.begin,
+                archive.size if archive.size is not None else (
+                    archive.file.size
+                ),
+                archive.file
+            )
+
+        for archive in ArchivedSiteLog.objects.filter(
+            index__in=indexes.values('pk'),
+            log_format__in=log_formats
+        ).select_related('index').order_by(
+            'site__name',
+            'index__begin',
+            'log_format'
+        ).iterator(chunk_size=self.chunk_size):
+            yield entry(archive)
+
+        if missing:
+            listing = ''.join(
+                f'{index.site.get_filename(log_format, epoch=index.begin)}\n'
+                for index, log_format in missing
+            ).encode('utf-8')
+            yield (
+                self.missing_name,
+                now(),
+                len(listing),
+                ContentFile(listing, name=self.missing_name)
+            )
+
+    def list(self, request, *args, **kwargs):
+        renderer = request.accepted_renderer
+        indexes = self.get_indexes()
+        log_formats = self.get_log_formats()
+        missing = self.get_missing(indexes, log_formats)
+        if missing and not getattr(settings, 'SLM_DEFER_ARCHIVES', False):
+            for index, log_format in missing:
+                ArchivedSiteLog.objects.from_index(index, log_format)
+            missing = []
+        response = StreamingHttpResponse(
+            renderer.stream(self.files(indexes, log_formats, missing)),
+            content_type=renderer.media_type
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="archive.{renderer.format}"'
+        )
+        return response
+
+
+class ChangeFeedViewSet(viewsets.GenericViewSet):
+    """
+    A feed of the site log changes published to public stations. Each change
+    is a publish event - either of a whole site log (section is null) or of
+    a single section. The epoch of a change is the begin time of the index
+    it published.
+
+    Changes are returned in the order they were logged after the given
+    cursor (default: the beginning of the feed). Each response carries the
+    cursor to pass with the next request and whether more changes are
+    immediately available. If wait is given (seconds) and there are no new
+    changes the request polls for changes until the wait expires (at most
+    SLM_CHANGE_FEED_MAX_WAIT, 0 by default which disables waiting).
+
+    Changes are held back until they are SLM_CHANGE_FEED_DELAY seconds old.
+    Cursors are log entry ids, which are assigned when a change is logged
+    but become visible when its transaction commits. The delay lets slower
+    transactions with lower ids commit before the cursor moves past them.
+    """
+    permission_classes = []
+    pagination_class = None
+
+    default_limit = 100
+    max_limit = 1000
+
+    # held requests check the database for changes at this interval (seconds)
+    poll_interval = 1
+
+    def get_queryset(self):
+        # the same sites whose archives are public
+        return LogEntry.objects.non_polymorphic().filter(
+            type=LogEntryType.PUBLISH,
+            site__in=Site.objects.filter(agencies__public=True).values('pk')
+        )
+
+    def get_param(self, name, default, parse=int, maximum=None):
+        try:
+            value = parse(self.request.query_params.get(name, default))
+        except (TypeError, ValueError):
+            raise ValidationError({name: _('Expected a number.')})
+        if value < 0:
+            raise ValidationError({name: _('Expected a positive number.')})
+        return value if maximum is None else min(value, maximum)
+
+    def changes(self, cursor, limit):
+        return list(
+            self.get_queryset().filter(
+                pk__gt=cursor,
+                timestamp__lte=now() - timedelta(
+                    seconds=getattr(settings, 'SLM_CHANGE_FEED_DELAY', 10)
+                )
+            ).order_by(
+                'pk'
+            ).values_list(
+                'pk',
+                'site__name',
+                'site_log_type__model',
+                'epoch'
+            )[:limit + 1]
+        )
+
+    def list(self, request, *args, **kwargs):
+        cursor = self.get_param('cursor', 0)
+        limit = self.get_param(
+            'limit',
+            self.default_limit,
+            maximum=self.max_limit
+        ) or self.default_limit
+        deadline = time.monotonic() + self.get_param(
+            'wait',
+            0,
+            parse=float,
+            maximum=getattr(settings, 'SLM_CHANGE_FEED_MAX_WAIT', 0)
+        )
+        changes = self.changes(cursor, limit)
+        while not changes and time.monotonic() < deadline:
+            time.sleep(
+                max(min(deadline - time.monotonic(), self.poll_interval), 0)
+            )
+            changes = self.changes(cursor, limit)
+
+        return Response({
+            'cursor': changes[:limit][-1][0] if changes else cursor,
+            'more': len(changes) > limit,
+            'changes': [
+                {
+                    'cursor': pk,
+                    'site': site,
+                    'section': section,
+                    'epoch': epoch
+                } for pk, site, section, epoch in changes[:limit]
+            ]
+        })
+
+
 class SiteLogDownloadViewSet(BaseSiteLogDownloadViewSet):
     # limit downloads to public sites only!
     # requests for non-public sites will return 404s
@@ -380,8 +758,7 @@ class ArchiveViewSet(
     ordering = ('-timestamp',)
 
     def retrieve(self, request, *args, **kwargs):
-        archive = self.get_object()
-        return FileResponse(archive.file, filename=archive.name)
+        return archive_response(request, self.get_object())
 
     def get_queryset(self):
         return ArchivedSiteLog.objects.select_related('index', 'site')
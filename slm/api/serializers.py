@@ -1,5 +1,8 @@
 import json
+from uuid import uuid4
 
+from django.conf import settings
+from django.core.cache import caches
 from django.template.loader import get_template
 from django.utils.functional import cached_property
 from rest_framework import serializers
@@ -15,6 +18,94 @@ class _Heading:
 _heading = _Heading()
 
 
+class SiteLogCache:
+    """
+    Rendered site logs are stored in the Django cache named by the
+    SLM_SITE_LOG_CACHE setting (None disables caching). Renderings are keyed
+    by site, the timestamp of the rendered state (epoch, last publish or last
+    update), publication state, format and GeodesyML version. Each site also
+    has a generation token that is rotated by invalidate() when its site log
+    changes, which orphans all of that site's previous renderings.
+    """
+
+    hits = 0
+    misses = 0
+
+    @property
+    def cache(self):
+        alias = getattr(settings, 'SLM_SITE_LOG_CACHE', 'default')
+        if alias:
+            return caches[alias]
+        return None
+
+    @staticmethod
+    def generation_key(site):
+        return f'slm.sitelog.{site.pk}.generation'
+
+    def key(self, site, epoch, published, log_format, version=None):
+        generation = self.cache.get(self.generation_key(site))
+        if generation is None:
+            generation = uuid4().hex
+            self.cache.set(self.generation_key(site), generation, None)
+        return (
+            f'slm.sitelog.{site.pk}.{generation}.'
+            f'{epoch.isoformat() if epoch else None}.{published}.'
+            f'{log_format.value}.{version.value if version else None}'
+        )
+
+    def fetch(self, render, site, epoch, published, log_format, version=None):
+        """
+        Return the cached rendering of the site log, rendering and caching it
+        if necessary.
+
+        :param render: A callable that renders the site log.
+        :param site: The Site being rendered.
+        :param epoch: The timestamp of the rendered state of the site log
+        :param published: The publication state being rendered (True/None)
+        :param log_format: The SiteLogFormat of the rendering
+        :param version: The GeodesyMLVersion of the rendering, if applicable
+        :return: The rendered site log as a string.
+        """
+        cache = self.cache
+        if cache is None or site.pk is None:
+            return render()
+        key = self.key(site, epoch, published, log_format, version)
+        rendered = cache.get(key)
+        if rendered is None:
+            self.__class__.misses += 1
+            rendered = render()
+            cache.set(key, rendered)
+        else:
+            self.__class__.hits += 1
+        return rendered
+
+    def invalidate(self, site):
+        """
+        Discard all cached renderings of the given site.
+
+        :param site: The Site whose site log changed.
+        """
+        if self.cache is not None:
+            self.cache.delete(self.generation_key(site))
+
+    @property
+    def stats(self):
+        """
+        The hit and miss counts of this process.
+
+        :return: A dictionary with hits, misses and the hit ratio.
+        """
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'ratio': self.hits / lookups if lookups else None
+        }
+
+
+site_log_cache = SiteLogCache()
+
+
 class SiteLogSerializer(serializers.BaseSerializer):
 
     site = None
@@ -26,8 +117,6 @@ class SiteLogSerializer(serializers.BaseSerializer):
 
     text_tmpl = get_template('slm/sitelog/legacy.log')
 
-    xml_parser = etree.XMLParser(remove_blank_text=True)
-
     def __init__(self, *args, instance, epoch=None, published=True, **kwargs):
         self.site = instance
         self.epoch_param = epoch
@@ -44,23 +133,35 @@ class SiteLogSerializer(serializers.BaseSerializer):
             )
         super().__init__(*args, instance=instance, **kwargs)
 
+    def xml_context(self):
+        return {
+            **self.context,
+            'identifier': self.site.get_filename(
+                log_format=SiteLogFormat.GEODESY_ML,
+                epoch=self.epoch_param
+            ).split('.')[0],
+            'files': self.site.sitefileuploads.public().order_by(
+                'timestamp'
+            )
+        }
+
     def xml(self, version):
-        return etree.tostring(
-            etree.fromstring(
-                version.template.render({
-                    **self.context,
-                    'identifier': self.site.get_filename(
-                        log_format=SiteLogFormat.GEODESY_ML,
-                        epoch=self.epoch_param
-                    ).split('.')[0],
-                    'files': self.site.sitefileuploads.public().order_by(
-                        'timestamp'
-                    )
-                }).encode(),
-                parser=self.xml_parser
-            ),
-            pretty_print=True
-        ).decode()
+        """
+        Render the GeodesyML document. The template is rendered as a stream
+        and each chunk is fed to the XML parser as it is generated, which
+        avoids the intermediate string copies of the rendered document. The
+        document is still parsed and pretty printed - libxml2 does this in a
+        fraction of the template render time, a pure Python re-indenter over
+        the stream is several times slower.
+
+        :param version: The GeodesyMLVersion to render
+        :return: The pretty printed GeodesyML document as a string
+        """
+        # feed parsers are stateful and must not be shared between threads
+        parser = etree.XMLParser(remove_blank_text=True)
+        for chunk in version.template.template.generate(self.xml_context()):
+            parser.feed(chunk)
+        return etree.tostring(parser.close(), pretty_print=True).decode()
 
     @cached_property
     def json(self):
@@ -69,9 +170,23 @@ class SiteLogSerializer(serializers.BaseSerializer):
 
     def format(self, log_format, version=None):
         if log_format == SiteLogFormat.LEGACY:
-            return self.text
+            return site_log_cache.fetch(
+                lambda: self.text,
+                site=self.site,
+                epoch=self.epoch,
+                published=self.published_param,
+                log_format=log_format
+            )
         elif log_format == SiteLogFormat.GEODESY_ML:
-            return self.xml(version=(version or GeodesyMLVersion.latest()))
+            version = version or GeodesyMLVersion.latest()
+            return site_log_cache.fetch(
+                lambda: self.xml(version=version),
+                site=self.site,
+                epoch=self.epoch,
+                published=self.published_param,
+                log_format=log_format,
+                version=version
+            )
         raise NotImplementedError(
             f'Serialization for format {log_format} is not yet implemented.'
         )
@@ -83,6 +198,11 @@ class SiteLogSerializer(serializers.BaseSerializer):
 
     @cached_property
     def context(self):
+        if self.site.has_snapshot(
+            epoch=self.epoch_param,
+            published=self.published_param
+        ):
+            return self.snapshot_context
         return {
             'site': self.site,
             **{
@@ -115,6 +235,36 @@ class SiteLogSerializer(serializers.BaseSerializer):
             ),
         }
 
+    @property
+    def snapshot_context(self):
+        """
+        Build the rendering context from sections preloaded onto the site
+        by SiteQuerySet.with_snapshot() - no queries are issued.
+        """
+        antennas = [
+            antenna for antenna in self.site.siteantenna
+            if not antenna.is_deleted
+        ]
+        return {
+            'site': self.site,
+            **{
+                self.section_name(name): getattr(self.site, name)
+                for name in Site.section_fields()
+            },
+            **{
+                self.section_name(name): [
+                    subsection for subsection in getattr(self.site, name)
+                    if not subsection.is_deleted
+                ]
+                for name in Site.subsection_fields()
+            },
+            'graphic': getattr(
+                antennas[-1] if antennas else None,
+                'graphic',
+                ''
+            ),
+        }
+
     @cached_property
     def text(self):
         return self.text_tmpl.render({
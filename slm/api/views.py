@@ -1,14 +1,31 @@
-from django.http import FileResponse
+import csv
+import json
+import re
+import shutil
+import tarfile
+import zipfile
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 from django.utils.translation import gettext as _
 from django_filters import filters
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Q
+from itertools import islice
 from rest_framework import mixins, viewsets, renderers
 from slm.models import ArchivedSiteLog, SiteIndex
 from slm.defines import SiteLogFormat
 from slm.api.filter import SLMDateTimeFilter, InitialValueFilterSet
 from datetime import datetime
 
+try:
+    import pyarrow
+    from pyarrow import ipc, parquet
+except ImportError:
+    pyarrow = None
+
 
 class LegacyRenderer(renderers.BaseRenderer):
     """
@@ -34,6 +51,378 @@ class JSONRenderer(renderers.BaseRenderer):
     format = SiteLogFormat.JSON
 
 
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def byte_range(header, size):
+    """
+    Parse a Range header. Only single byte ranges are supported, any other
+    range is ignored and the full content should be sent.
+
+    :param header: The Range header value
+    :param size: The size of the content in bytes
+    :return: A 2-tuple of the start (inclusive) and stop (exclusive) byte
+        offsets or None if the range should be ignored
+    :raises ValueError: If the range can not be satisfied
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        stop = size if not last else min(int(last) + 1, size)
+        if last and int(last) < start:
+            return None
+    else:
+        if not int(last):
+            raise ValueError('Empty suffix range.')
+        start, stop = max(size - int(last), 0), size
+    if start >= size:
+        raise ValueError('Range starts after the end of the content.')
+    return start, stop
+
+
+class RangeFile:
+    """
+    A read only view of a byte range of an open file.
+    """
+
+    def __init__(self, file, start, stop):
+        self.file = file
+        self.file.seek(start)
+        self.remaining = stop - start
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def archive_response(request, archive, filename=None):
+    """
+    Respond with an archived site log file. Responses carry a strong ETag and
+    the Last-Modified time of the archive so conditional requests for
+    unchanged files are answered with a 304 without touching the file.
+    Single byte ranges are supported. If SLM_SENDFILE_HEADER is set the file
+    is handed off to the web server instead of streamed by Django.
+
+    :param request: The Django request
+    :param archive: The ArchivedSiteLog to send
+    :param filename: The name to give the download, by default the archive's
+        name
+    :return: A response
+    """
+    etag = archive.etag
+    # http dates have a resolution of seconds
+    last_modified = (
+        int(archive.timestamp.timestamp()) if archive.timestamp else None
+    )
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=last_modified
+    )
+    if response is None:
+        filename = filename or archive.name
+        sendfile = getattr(settings, 'SLM_SENDFILE_HEADER', None)
+        if sendfile:
+            # the web server handles range requests
+            response = HttpResponse(
+                content_type=archive.mimetype or 'application/octet-stream'
+            )
+            response['Content-Disposition'] = f'inline; filename="{filename}"'
+            if sendfile.lower() == 'x-accel-redirect':
+                response[sendfile] = (
+                    getattr(settings, 'SLM_SENDFILE_URL', '/protected/')
+                    + archive.file.name
+                )
+            else:
+                response[sendfile] = archive.file.path
+        else:
+            response = range_response(request, archive, filename, etag)
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def range_response(request, archive, filename, etag):
+    """
+    Stream an archived file, or the requested byte range of it.
+    """
+    content_type = archive.mimetype or None
+    requested = request.META.get('HTTP_RANGE', None)
+    if_range = request.META.get('HTTP_IF_RANGE', None)
+    if requested and if_range and if_range not in {
+        etag,
+        http_date(int(archive.timestamp.timestamp()))
+        if archive.timestamp else None
+    }:
+        requested = None
+    if requested:
+        size = archive.size if archive.size is not None else archive.file.size
+        try:
+            bounds = byte_range(requested, size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        if bounds:
+            start, stop = bounds
+            response = FileResponse(
+                RangeFile(archive.file.open('rb'), start, stop),
+                filename=filename,
+                content_type=content_type,
+                status=206
+            )
+            response['Content-Length'] = stop - start
+            response['Content-Range'] = f'bytes {start}-{stop - 1}/{size}'
+            return response
+    return FileResponse(
+        archive.file.open('rb'),
+        filename=filename,
+        content_type=content_type
+    )
+
+
+class StreamSink:
+    """
+    A write only file that collects what is written to it until drained.
+    Writers that need a file (i.e. tarfile) write to a sink and the
+    drained chunks are streamed.
+    """
+    closed = False
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        chunk, self.chunks = b''.join(self.chunks), []
+        return chunk
+
+
+class ExportRenderer(renderers.BaseRenderer):
+    """
+    Base class for renderers that stream tabular exports. Export views pass
+    stream() the columns as (name, type) tuples and an iterable over the rows
+    and return its chunks in a streaming response. Anything else rendered
+    with an export renderer (i.e. errors) is rendered as JSON.
+    """
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, cls=DjangoJSONEncoder).encode()
+
+    def stream(self, columns, rows):
+        """
+        :param columns: A list of 2-tuples of column names and types - one of
+            str, float, datetime or list (of strings)
+        :param rows: An iterable of rows - sequences of column values
+        :yield: Chunks of bytes
+        """
+        raise NotImplementedError()
+
+
+class CSVRenderer(ExportRenderer):
+    """
+    Stream exports as CSV, lists are joined with semicolons.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+
+    class Line:
+        def write(self, line):
+            return line
+
+    @staticmethod
+    def cell(value):
+        if value is None:
+            return ''
+        if isinstance(value, list):
+            return ';'.join(value)
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return value
+
+    def stream(self, columns, rows):
+        writer = csv.writer(self.Line())
+        yield writer.writerow([name for name, _ in columns]).encode()
+        for row in rows:
+            yield writer.writerow([self.cell(value) for value in row]).encode()
+
+
+class NDJSONRenderer(ExportRenderer):
+    """
+    Stream exports as newline delimited JSON objects.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def stream(self, columns, rows):
+        names = [name for name, _ in columns]
+        encoder = DjangoJSONEncoder()
+        for row in rows:
+            yield (encoder.encode(dict(zip(names, row))) + '\n').encode()
+
+
+class ArrowRenderer(ExportRenderer):
+    """
+    Stream exports in the Apache Arrow IPC streaming format. Requires
+    pyarrow.
+    """
+    media_type = 'application/vnd.apache.arrow.stream'
+    format = 'arrow'
+
+    # the number of rows in each record batch
+    batch_size = 2048
+
+    def schema(self, columns):
+        types = {
+            str: pyarrow.string(),
+            float: pyarrow.float64(),
+            datetime: pyarrow.timestamp('us', tz='UTC'),
+            list: pyarrow.list_(pyarrow.string())
+        }
+        return pyarrow.schema([(name, types[typ]) for name, typ in columns])
+
+    def writer(self, sink, schema):
+        return ipc.new_stream(sink, schema)
+
+    def stream(self, columns, rows):
+        schema = self.schema(columns)
+        sink = StreamSink()
+        rows = iter(rows)
+        with self.writer(sink, schema) as writer:
+            while batch := list(islice(rows, self.batch_size)):
+                writer.write_batch(
+                    pyarrow.RecordBatch.from_arrays(
+                        [
+                            pyarrow.array(values, type=field.type)
+                            for values, field in zip(zip(*batch), schema)
+                        ],
+                        schema=schema
+                    )
+                )
+                yield sink.drain()
+        yield sink.drain()
+
+
+class ParquetRenderer(ArrowRenderer):
+    """
+    Stream exports as a Parquet file, each batch of rows is a row group.
+    Requires pyarrow.
+    """
+    media_type = 'application/vnd.apache.parquet'
+    format = 'parquet'
+
+    def writer(self, sink, schema):
+        return parquet.ParquetWriter(sink, schema)
+
+
+# the export renderers available in this environment
+EXPORT_RENDERERS = [
+    CSVRenderer,
+    NDJSONRenderer,
+    *([ArrowRenderer, ParquetRenderer] if pyarrow else [])
+]
+
+
+class BundleRenderer(ExportRenderer):
+    """
+    Base class for renderers that stream many files as a single archive
+    file. stream() is passed an iterable of 4-tuples of the file's path in
+    the bundle, its modification time, its size and its FieldFile. Files are
+    opened one at a time as the bundle is streamed.
+    """
+
+    def stream(self, files):
+        raise NotImplementedError()
+
+
+class TarRenderer(BundleRenderer):
+    """
+    Stream files as a tar archive.
+    """
+    media_type = 'application/x-tar'
+    format = 'tar'
+
+    mode = 'w|'
+
+    def stream(self, files):
+        sink = StreamSink()
+        with tarfile.open(fileobj=sink, mode=self.mode) as bundle:
+            for path, modified, size, file in files:
+                info = tarfile.TarInfo(path)
+                info.size = size
+                info.mtime = modified.timestamp()
+                with file.open('rb') as data:
+                    bundle.addfile(info, data)
+                yield sink.drain()
+        yield sink.drain()
+
+
+class TarGzRenderer(TarRenderer):
+    """
+    Stream files as a gzip compressed tar archive.
+    """
+    media_type = 'application/gzip'
+    format = 'tgz'
+
+    mode = 'w|gz'
+
+
+class ZipRenderer(BundleRenderer):
+    """
+    Stream files as a zip archive.
+    """
+    media_type = 'application/zip'
+    format = 'zip'
+
+    def stream(self, files):
+        sink = StreamSink()
+        with zipfile.ZipFile(
+            sink,
+            mode='w',
+            compression=zipfile.ZIP_DEFLATED
+        ) as bundle:
+            for path, modified, _, file in files:
+                # zip can not represent times before 1980
+                info = zipfile.ZipInfo(
+                    path,
+                    date_time=max(
+                        modified.timetuple()[:6],
+                        (1980, 1, 1, 0, 0, 0)
+                    )
+                )
+                info.compress_type = zipfile.ZIP_DEFLATED
+                with file.open('rb') as data, bundle.open(info, 'w') as entry:
+                    shutil.copyfileobj(data, entry)
+                yield sink.drain()
+        yield sink.drain()
+
+
 class BaseSiteLogDownloadViewSet(
     mixins.RetrieveModelMixin,
     viewsets.GenericViewSet
@@ -104,11 +493,12 @@ class BaseSiteLogDownloadViewSet(
         :return:
         """
         index = self.get_object()
-        return FileResponse(
+        return archive_response(
+            request,
             ArchivedSiteLog.objects.from_index(
                 index=index,
                 log_format=request.accepted_renderer.format
-            ).file,
+            ),
             filename=index.site.get_filename(
                 log_format=request.accepted_renderer.format,
                 epoch=index.begin,
@@ -15,7 +15,6 @@ from slm.defines import GeodesyMLVersion
 from slm.signals import signal_name
 from pprint import pformat
 from tqdm import tqdm
-from slm.utils import clear_caches
 
 
 @register('slm', Tags.security)
@@ -90,6 +89,42 @@ def check_permissions_setting(**kwargs):
     return []
 
 
+@register('slm', Tags.security, Tags.caches)
+def check_permission_cache_setting(**kwargs):
+    warning_id = 'slm.W002'
+    alias = getattr(settings, 'SLM_PERMISSION_CACHE', None)
+    if not alias:
+        return []
+    if alias not in settings.CACHES:
+        return [
+            Error(
+                _('settings.SLM_PERMISSION_CACHE is invalid'),
+                hint=_('{} is not a cache alias in CACHES.').format(alias),
+                id='slm.E003'
+            )
+        ]
+    if (
+        settings.CACHES[alias].get('BACKEND', '') ==
+        'django.core.cache.backends.locmem.LocMemCache' and
+        getattr(settings, 'SLM_PERMISSION_CACHE_TIMEOUT', None) is None
+    ):
+        return [
+            Warning(
+                _(
+                    'SLM_PERMISSION_CACHE is a per-process cache and cached '
+                    'permissions never expire.'
+                ),
+                hint=_(
+                    'Permission changes are only invalidated in the process '
+                    'that made them. Use a shared cache backend or set '
+                    'SLM_PERMISSION_CACHE_TIMEOUT.'
+                ),
+                id=warning_id
+            )
+        ]
+    return []
+
+
 @register('slm', Tags.signals)
 def check_automated_alerts(**kwargs):
     error_id = 'slm.E001'
@@ -202,13 +237,12 @@ class SLMConfig(AppConfig):
 
         from slm import signals as slm_signals
         from slm.models import Site, Alert
-        from django.contrib.auth import get_user_model
 
         # don't remove these includes - they ensure signals are connected #####
         from slm.receivers import (
             event_loggers,  # register signal receivers that log events
         )
-        from slm.receivers import cleanup, index, alerts
+        from slm.receivers import cache, cleanup, index, alerts
         #######################################################################
 
         @receiver(post_init, sender=Site)
@@ -246,13 +280,6 @@ class SLMConfig(AppConfig):
                     new_status=instance.status
                 )
 
-        @receiver(post_save, sender=get_user_model())
-        def user_save(
-            sender, instance, created, raw, using, update_fields, **kwargs
-        ):
-            """Clear any relevant caches whenever a user is saved."""
-            clear_caches()
-
         def alert_save(
             sender, instance, created, raw, using, update_fields, **kwargs
         ):
@@ -295,5 +322,7 @@ class SLMConfig(AppConfig):
             ) as p_bar:
                 for geo_version in xsd_preload:
                     p_bar.set_postfix({'xsd': str(geo_version)})
-                    getattr(geo_version, 'schema')
+                    # seed the validation pool with a schema instance
+                    with geo_version.validator():
+                        pass
                     p_bar.update(n=1)
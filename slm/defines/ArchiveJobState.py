@@ -0,0 +1,18 @@
+from django.utils.translation import gettext_lazy as _
+from django_enum import IntegerChoices
+from enum_properties import s
+
+
+class ArchiveJobState(IntegerChoices):
+
+    _symmetric_builtins_ = [
+        s('name', case_fold=True)
+    ]
+
+    PENDING = 0, _('Pending')
+    RUNNING = 1, _('Running')
+    DONE = 2, _('Done')
+    FAILED = 3, _('Failed')
+
+    def __str__(self):
+        return str(self.label)
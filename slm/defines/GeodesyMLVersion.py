@@ -1,6 +1,8 @@
 from django_enum import IntegerChoices
 from enum_properties import s
 from pathlib import Path
+from contextlib import contextmanager
+from queue import Empty, SimpleQueue
 from django.utils.functional import cached_property
 
 
@@ -26,7 +28,38 @@ class GeodesyMLVersion(
         return [ver for ver in cls][-1]
 
     @cached_property
-    def schema(self):
+    def schemas(self):
+        """
+        A pool of XMLSchema instances not currently in use.
+        """
+        return SimpleQueue()
+
+    @contextmanager
+    def validator(self):
+        """
+        A context manager that checks out an XMLSchema instance for exclusive
+        use by the calling thread. It is not clear that XMLSchema instances
+        are safe to share between threads, so instead of serializing access
+        to one instance, instances are pooled and a new one is loaded when
+        none are free. The pool grows to the peak number of concurrent
+        validations.
+
+        .. code-block:: python
+
+            with GeodesyMLVersion.v0_5.validator() as schema:
+                if not schema.validate(doc):
+                    ...
+        """
+        try:
+            schema = self.schemas.get(block=False)
+        except Empty:
+            schema = self.load_schema()
+        try:
+            yield schema
+        finally:
+            self.schemas.put(schema)
+
+    def load_schema(self):
         from lxml.etree import (
             XMLSchema,
             XMLParser,
@@ -1,6 +1,7 @@
 from slm.defines.AlertLevel import AlertLevel
 from slm.defines.AntennaFeatures import AntennaFeatures
 from slm.defines.AntennaReferencePoint import AntennaReferencePoint
+from slm.defines.ArchiveJobState import ArchiveJobState
 from slm.defines.Aspiration import Aspiration
 from slm.defines.CardinalDirection import CardinalDirection
 from slm.defines.CollocationStatus import CollocationStatus
@@ -282,8 +282,15 @@ class NewSiteForm(forms.ModelForm):
 
 class SectionForm(forms.ModelForm):
 
-    def __init__(self, instance=None, **kwargs):
-        self.diff = instance.published_diff() if instance else {}
+    def __init__(self, instance=None, diff=None, **kwargs):
+        """
+        :param instance: The section instance to edit
+        :param diff: The instance's published diff, if it has already been
+            computed
+        """
+        if diff is None:
+            diff = instance.published_diff() if instance else {}
+        self.diff = diff
         self.flags = instance._flags if instance else {}
         super().__init__(instance=instance, **kwargs)
         for field in self.fields:
@@ -0,0 +1,97 @@
+"""
+Render the site log archives queued by publication when SLM_DEFER_ARCHIVES is
+set.
+"""
+import logging
+import os
+import time
+
+from django.core.management import BaseCommand
+from django.utils.translation import gettext as _
+from slm.defines import ArchiveJobState
+from slm.management.utils import pool_map, worker_pool
+
+
+def run_job(pk):
+    from slm.models import ArchiveJob
+    return pk, ArchiveJob.objects.select_related(
+        'index__site'
+    ).get(pk=pk).run()
+
+
+class Command(BaseCommand):
+
+    help = _(
+        'Render site log archives queued for deferred generation. By default '
+        'the queue is drained and the command exits.'
+    )
+
+    logger = logging.getLogger(__name__ + '.Command')
+
+    def add_arguments(self, parser):
+
+        parser.add_argument(
+            '-w',
+            '--workers',
+            dest='workers',
+            type=int,
+            default=os.cpu_count(),
+            help=_(
+                'The number of processes to render archives in. If 1 or less '
+                'archives will be rendered in this process. (default: %s)'
+            ) % os.cpu_count()
+        )
+
+        parser.add_argument(
+            '-b',
+            '--batch-size',
+            dest='batch_size',
+            type=int,
+            default=50,
+            help=_('The number of jobs to claim at a time. (default: 50)')
+        )
+
+        parser.add_argument(
+            '--poll',
+            dest='poll',
+            type=float,
+            default=None,
+            help=_(
+                'Do not exit when the queue is empty, instead check it for '
+                'new jobs every POLL seconds.'
+            )
+        )
+
+        parser.add_argument(
+            '--retry',
+            dest='retry',
+            action='store_true',
+            default=False,
+            help=_('Requeue failed jobs before processing.')
+        )
+
+    def handle(self, *args, **options):
+        from slm.models import ArchiveJob
+
+        if options['retry']:
+            requeued = ArchiveJob.objects.failed().update(
+                state=ArchiveJobState.PENDING
+            )
+            self.logger.info('Requeued %d failed archive jobs.', requeued)
+
+        with worker_pool(options['workers']) as pool:
+            while True:
+                claimed = ArchiveJob.objects.claim(options['batch_size'])
+                if not claimed:
+                    if options['poll'] is None:
+                        break
+                    time.sleep(options['poll'])
+                    continue
+
+                for pk, success in pool_map(pool, run_job, claimed):
+                    if not success:
+                        self.logger.error(
+                            'Archive job %s failed: %s',
+                            pk,
+                            ArchiveJob.objects.get(pk=pk).error
+                        )
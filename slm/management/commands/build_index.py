@@ -1,16 +1,93 @@
 """
-Update the data availability information for each station.
+Update the site index from the current data or rebuild it from an archive of
+legacy site logs.
+
+Sites are sharded into batches that are indexed by worker processes, each
+batch is committed in its own transaction. Indexing is idempotent - sites
+(or archived logs) that already have an index are skipped - so an
+interrupted build resumes where it stopped when run again (without
+--rebuild).
 """
 import logging
+import os
+from collections import defaultdict
 
-from django.core.management import BaseCommand
+from django.core.management import BaseCommand, CommandError
 from django.db import transaction
+from django.db.models import Exists, OuterRef
 from django.utils.translation import gettext as _
-from slm.models import Site, SiteIndex
 from slm.defines import SiteLogStatus
+from slm.management.utils import (
+    EquipmentMap,
+    SiteMap,
+    archive_legacy_log,
+    batched,
+    parse_log_name,
+    pool_map,
+    worker_pool
+)
 from tqdm import tqdm
 
 
+def index_sites(site_pks):
+    """
+    Index the given sites from their current published data.
+
+    :param site_pks: The primary keys of the sites to index
+    :return: A 2-tuple of the number of sites processed and an error message
+        if the batch failed and was rolled back.
+    """
+    from slm.models import Site, SiteIndex
+    try:
+        with transaction.atomic():
+            for site in Site.objects.filter(
+                pk__in=site_pks
+            ).with_snapshot(published=True):
+                SiteIndex.objects.add_index(site=site)
+    except Exception as err:
+        return len(site_pks), f'{err.__class__.__name__}: {err}'
+    return len(site_pks), None
+
+
+def index_archives(site_logs):
+    """
+    Index and archive the given legacy site log files. All logs for a site
+    must be in the same batch so no two workers insert into the same index
+    deck.
+
+    :param site_logs: A list of 2-tuples of (site primary key, list of
+        (log time, file path))
+    :return: A 2-tuple of the number of logs processed and an error message
+        if the batch failed and was rolled back.
+    """
+    from slm.models import Site, SiteIndex
+    count = sum(len(logs) for _, logs in site_logs)
+    try:
+        with transaction.atomic():
+            equipment = EquipmentMap()
+            sites = Site.objects.in_bulk([site for site, _ in site_logs])
+            indexed = set(
+                SiteIndex.objects.filter(site__in=sites.keys()).values_list(
+                    'site', 'begin'
+                )
+            )
+            for site_pk, logs in site_logs:
+                for log_time, path in logs:
+                    if (site_pk, log_time) in indexed:
+                        continue
+                    with open(path, 'rb') as log_file:
+                        archive_legacy_log(
+                            sites[site_pk],
+                            log_time,
+                            log_file.read(),
+                            equipment
+                        )
+                    indexed.add((site_pk, log_time))
+    except Exception as err:
+        return count, f'{err.__class__.__name__}: {err}'
+    return count, None
+
+
 class Command(BaseCommand):
     help = 'Update the site index from the current data or rebuild from ' \
            'archives.'
@@ -38,40 +115,147 @@ class Command(BaseCommand):
             help=_('Build index from the archive directory.')
         )
 
+        parser.add_argument(
+            '-w',
+            '--workers',
+            dest='workers',
+            type=int,
+            default=1,
+            help=_(
+                'The number of processes to index in. If 1 or less indexing '
+                'will happen in this process. (default: 1)'
+            )
+        )
+
+        parser.add_argument(
+            '-b',
+            '--batch-size',
+            dest='batch_size',
+            type=int,
+            default=50,
+            help=_(
+                'The number of sites to index in each transaction. '
+                '(default: 50)'
+            )
+        )
+
+        parser.add_argument(
+            '-y',
+            '--yes',
+            dest='yes',
+            action='store_true',
+            default=False,
+            help=_('Do not ask for confirmation before rebuilding.')
+        )
+
     def handle(self, *args, **options):
 
-        with transaction.atomic():
+        def yes(ipt):
+            return ipt.lower() in {'y', 'yes', 'true', 'continue'}
 
-            def yes(ipt):
-                return ipt.lower() in {'y', 'yes', 'true', 'continue'}
+        if options['archive'] and not os.path.isdir(
+            os.path.expanduser(options['archive'])
+        ):
+            raise CommandError(
+                _('{} is not a directory.').format(options['archive'])
+            )
 
-            if options['rebuild']:
-                if yes(input(_(
-                    'WARNING: this will delete the current index. This cannot '
-                    'be undone if you do not have an external archive! '
-                    'Proceed? (Y/N): '
-                ))):
+        if options['rebuild']:
+            if options['yes'] or yes(input(_(
+                'WARNING: this will delete the current index. This cannot '
+                'be undone if you do not have an external archive! '
+                'Proceed? (Y/N): '
+            ))):
+                from slm.models import SiteIndex
+                with transaction.atomic():
                     SiteIndex.objects.all().delete()
-                else:
-                    return
+            else:
+                return
 
-            if options['archive']:
-                # todo
-                raise NotImplementedError(
-                    'Rebuild from archive not implemented yet!'
-                )
+        if options['archive']:
+            work, total, func = self.archive_batches(
+                os.path.expanduser(options['archive']),
+                options['batch_size']
+            )
+            desc, unit = 'Indexing Archive', 'logs'
+        else:
+            work, total, func = self.site_batches(options['batch_size'])
+            desc, unit = 'Indexing', 'sites'
 
-            sites = Site.objects.public().filter(
+        failed = 0
+        with tqdm(total=total, desc=desc, unit=unit) as p_bar:
+            with worker_pool(options['workers']) as pool:
+                for count, error in pool_map(pool, func, work):
+                    if error:
+                        failed += count
+                        self.logger.error(
+                            'Failed to index batch of %d %s: %s',
+                            count,
+                            unit,
+                            error
+                        )
+                    p_bar.update(n=count)
+
+        if failed:
+            raise CommandError(
+                _(
+                    '{} {} failed to index, run again to retry.'
+                ).format(failed, unit)
+            )
+
+    def site_batches(self, batch_size):
+        """
+        Shard the public published sites that do not have an index for their
+        last publication into batches.
+        """
+        from slm.models import Site, SiteIndex
+        site_pks = list(
+            Site.objects.public().filter(
                 status=SiteLogStatus.PUBLISHED
+            ).filter(
+                ~Exists(
+                    SiteIndex.objects.filter(
+                        site=OuterRef('pk'),
+                        begin=OuterRef('last_publish')
+                    )
+                )
+            ).distinct().order_by('pk').values_list('pk', flat=True)
+        )
+        return batched(site_pks, batch_size), len(site_pks), index_sites
+
+    def archive_batches(self, directory, batch_size):
+        """
+        Shard the legacy site logs in the archive directory into batches of
+        sites, each site's logs are ordered by time.
+        """
+        from slm.models import Site
+        site_map = SiteMap(Site.objects.all())
+        site_logs = defaultdict(list)
+        unresolved = 0
+        for root, _, files in os.walk(directory):
+            for name in files:
+                site_id, log_time = parse_log_name(name) or (None, None)
+                site = site_map.get(site_id) if site_id else None
+                if site is None:
+                    unresolved += 1
+                    continue
+                site_logs[site.pk].append(
+                    (log_time, os.path.join(root, name))
+                )
+
+        if unresolved:
+            self.logger.warning(
+                'Unable to resolve %d files to sites.',
+                unresolved
             )
-            # build from current data
-            with tqdm(
-                total=sites.count(),
-                desc='Indexing',
-                unit='sites',
-                postfix={'site': ''}
-            ) as p_bar:
-                for site in sites:
-                    p_bar.set_postfix({'site': site.name})
-                    SiteIndex.objects.add_index(site=site)
-                    p_bar.update(n=1)
+        return (
+            batched(
+                [
+                    (site, sorted(logs))
+                    for site, logs in sorted(site_logs.items())
+                ],
+                batch_size
+            ),
+            sum(len(logs) for logs in site_logs.values()),
+            index_archives
+        )
@@ -1,6 +1,11 @@
 """
 Import an archive file of old site logs - creating indexes and
 ArchivedLogFiles.
+
+The import is pipelined: tar members are streamed from the archive, parsed in
+a pool of worker processes and written in batches using bulk inserts. Each
+batch is committed in its own transaction and logs that are already indexed
+are skipped, so an interrupted import may be resumed by running it again.
 """
 from django.core.management import BaseCommand, CommandError
 from slm.defines import (
@@ -11,25 +16,41 @@ from django.utils.translation import gettext as _
 import tarfile
 from tqdm import tqdm
 import os
-import re
+from itertools import tee
 from slm.models import (
     Site,
     ArchivedSiteLog,
-    SiteIndex,
-    Receiver,
-    Antenna,
-    Radome
+    SiteIndex
 )
 from slm.defines import SiteLogFormat
 from django.core.files.base import ContentFile
 from django.db import transaction
-from dateutil import parser
-from slm.parsing.legacy import (
-    SiteLogParser,
-    SiteLogBinder
+from slm.management.utils import (
+    EquipmentMap,
+    SiteMap,
+    batched,
+    legacy_index_params,
+    parse_log_name,
+    pool_map,
+    worker_pool
 )
-from datetime import datetime
-from django.utils.timezone import utc, make_aware
+
+
+def parse_logs(logs):
+    """
+    Parse a batch of legacy site logs.
+
+    :param logs: A list of 2-tuples of (site name, log bytes)
+    :return: A list of 3-tuples of (index params, prepared time, error) -
+        params and prepared time are None if the log could not be parsed.
+    """
+    parsed = []
+    for site_name, log_str in logs:
+        try:
+            parsed.append((*legacy_index_params(log_str, site_name), None))
+        except Exception as err:
+            parsed.append((None, None, f'{err.__class__.__name__}: {err}'))
+    return parsed
 
 
 class Command(BaseCommand):
@@ -50,14 +71,39 @@ class Command(BaseCommand):
             )
         )
 
+        parser.add_argument(
+            '-w',
+            '--workers',
+            dest='workers',
+            type=int,
+            default=os.cpu_count(),
+            help=_(
+                'The number of processes to parse logs in. If 1 or less logs '
+                'will be parsed in this process. (default: %s)'
+            ) % os.cpu_count()
+        )
+
+        parser.add_argument(
+            '-b',
+            '--batch-size',
+            dest='batch_size',
+            type=int,
+            default=200,
+            help=_(
+                'The number of logs to import in each transaction. '
+                '(default: 200)'
+            )
+        )
+
     def handle(self, *args, **options):
 
-        count = 0
-        prep_less = 0
-        prep_eq = 0
-        prep_more = 0
-        no_prep = 0
-        unresolved = set()
+        self.count = 0
+        self.prep_less = 0
+        self.prep_eq = 0
+        self.prep_more = 0
+        self.no_prep = 0
+        self.failed = 0
+        self.unresolved = set()
         if not options['file']:
             file_path = os.path.expanduser(input(_('Archive tar file path: ')))
         else:
@@ -66,185 +112,143 @@ class Command(BaseCommand):
         if not os.path.exists(file_path):
             raise CommandError(_(f'{file_path} is not a file.'))
 
-        with transaction.atomic():
-            with tarfile.open(file_path, "r") as archive:
-                with tqdm(
-                    total=len(archive.getnames()),
-                    desc='Importing',
-                    unit='logs',
-                    postfix={'log': ''}
-                ) as p_bar:
-                    for member in archive.getmembers():
-                        if not member.isfile():
-                            continue
-                        
-                        count += 1
-                        name = os.path.basename(member.name)
-                        if '_' not in name:
-                            p_bar.update(n=1)
-                            unresolved.add(name)
-                            continue
-                        parts = re.split('[._-]', name)
-                        four_id = parts[0]
-                        try:
-                            log_time = make_aware(parser.parse(parts[1]), utc)
-                        except parser.ParserError:
-                            #print(f'Invalid log name: {name}')
-                            continue
-
-                        try:
-                            site = Site.objects.get(name__istartswith=four_id)
-                            
-                            archive_name = f'{site.name.upper()}_' \
-                                           f'{log_time.year}' \
-                                           f'{log_time.month:02}' \
-                                           f'{log_time.day:02}.' \
-                                           f'{SiteLogFormat.LEGACY.ext}'
-                            
-                            log_str = archive.extractfile(member).read()
-                            params, prep_time = self.log_params(log_str, site)
-
-                            if prep_time:
-                                # todo - what is correct when these don't match?
-                                if prep_time < log_time:
-                                    prep_less += 1
-                                if prep_time == log_time:
-                                    prep_eq += 1
-                                if prep_time > log_time:
-                                    prep_more += 1
-                            else:
-                                no_prep += 1
-
-                            sat_sys = params.pop('satellite_system', [])
-                            to_long = set()
-                            for param, value in params.items():
-                                if value and isinstance(value, str):
-                                    field = SiteIndex._meta.get_field(param)
-                                    if len(value) > getattr(
-                                        field, 'max_length', 999999
-                                    ):
-                                        #print(
-                                        #    f'Value too long: [{param}]: '
-                                        #    f'{value}'
-                                        #)
-                                        to_long.add(param)
-                            index = SiteIndex.objects.insert_index(
-                                site=site,
-                                begin=log_time,
-                                **{
-                                    param: val for param, val in params.items()
-                                    if param not in to_long
-                                }
-                            )
-                            if sat_sys:
-                                index.satellite_system.set(sat_sys)
-
-                            ArchivedSiteLog.objects.create(
-                                site=site,
-                                name=archive_name,
-                                index=index,
-                                file_type=SLMFileType.SITE_LOG,
-                                log_format=SiteLogFormat.LEGACY,
-                                file=ContentFile(log_str, name=archive_name)
-                            )
-
-                        except Site.DoesNotExist:
-                            unresolved.add(name)
-
-                        p_bar.set_postfix({'log': name})
-                        p_bar.update(n=1)
+        self.equipment = EquipmentMap()
+        self.site_map = SiteMap(Site.objects.all())
 
+        # the parser pool and the writer both consume the batches, tee only
+        # buffers the batches that are in flight
+        to_parse, to_write = tee(
+            batched(self.read_logs(file_path), options['batch_size'])
+        )
+        with tqdm(desc='Importing', unit='logs', postfix={'log': ''}) as p_bar:
+            with worker_pool(options['workers']) as pool:
+                for parsed in pool_map(
+                    pool,
+                    parse_logs,
+                    (
+                        [(site.name, log_str) for site, _, log_str in batch]
+                        for batch in to_parse
+                    )
+                ):
+                    batch = next(to_write)
+                    self.write_batch(batch, parsed)
+                    p_bar.set_postfix({'log': batch[-1][0].name})
+                    p_bar.update(n=len(batch))
+
+        count = self.count or 1
         print(
-            f'Unresolved files: {len(unresolved)}\n'
-            f'Total Imports: {count}\n'
-            f'prep_time<({prep_less/count * 100:.04}%)\n'
-            f'prep_time=({prep_eq/count * 100:.04}%)\n'
-            f'prep_time>({prep_more/count * 100:.04}%)\n'
-            f'prep_time=None({no_prep/count * 100:.04}%)\n'
+            f'Unresolved files: {len(self.unresolved)}\n'
+            f'Failed files: {self.failed}\n'
+            f'Total Imports: {self.count}\n'
+            f'prep_time<({self.prep_less/count * 100:.04}%)\n'
+            f'prep_time=({self.prep_eq/count * 100:.04}%)\n'
+            f'prep_time>({self.prep_more/count * 100:.04}%)\n'
+            f'prep_time=None({self.no_prep/count * 100:.04}%)\n'
         )
 
-    def log_params(self, log_str, site):
-        bound_log = SiteLogBinder(
-            SiteLogParser(
-                self.decode_str(log_str),
-                site_name=site.name
-            )
-        ).parsed
-
-        def get_param(section_index, field_name, null_val=None):
-            binding = getattr(
-                getattr(bound_log, 'sections', {}).get(section_index, {}),
-                'binding',
-                {}
-            )
-            if binding:
-                return binding.get(field_name, null_val)
-            return null_val
-
-        def lat_lng(lat_lng):
-            if lat_lng is not None:
-                return lat_lng / 10000
-            return None
-
-        prep_time = get_param((0, None, None), 'date_prepared')
-        if prep_time:
-            prep_time = datetime(
-                year=prep_time.year,
-                month=prep_time.month,
-                day=prep_time.day,
-                tzinfo=utc
-            )
-
-        params = {
-            'latitude': lat_lng(get_param((2, None, None), 'latitude')),
-            'longitude': lat_lng(get_param((2, None, None), 'longitude')),
-            'elevation': get_param((2, None, None), 'elevation'),
-            'city': get_param((2, None, None), 'city', ''),
-            'country': get_param((2, None, None), 'country'),
-            'antenna': None,
-            'radome': None,
-            'receiver': None,
-            'serial_number': '',
-            'firmware': '',
-            'frequency_standard': None,
-            'domes_number': get_param((1, None, None), 'iers_domes_number', ''),
-            'satellite_system': [],
-            'data_center': get_param((13, None, None), 'primary', '')
-        }
-        for index, section in bound_log.sections.items():
-            if index[0] == 3 and section.contains_values and section.binding:
-                params['receiver'] = Receiver.objects.filter(
-                    model=section.binding.get('receiver_type', None)
-                ).first()
-                params['serial_number'] = section.binding.get(
-                    'serial_number',
-                    ''
-                )
-                params['firmware'] = section.binding.get('firmware', '')
-                params['satellite_system'] = section.binding.get(
-                    'satellite_system',
-                    None
+    def read_logs(self, file_path):
+        """
+        Stream the site logs out of the archive. Members are read in order
+        and the archive's full listing is never loaded.
+
+        :param file_path: The path to the tar archive
+        :yield: 3-tuples of (site, log time, log bytes)
+        """
+        with tarfile.open(file_path, 'r|*') as archive:
+            for member in archive:
+                if not member.isfile():
+                    continue
+                self.count += 1
+                name = os.path.basename(member.name)
+                site_id, log_time = parse_log_name(name) or (None, None)
+                site = self.site_map.get(site_id) if site_id else None
+                if site is None:
+                    self.unresolved.add(name)
+                    continue
+                yield site, log_time, archive.extractfile(member).read()
+
+    def write_batch(self, batch, parsed):
+        """
+        Write the indexes and archived logs for a batch of parsed logs in one
+        transaction.
+
+        :param batch: A list of 3-tuples of (site, log time, log bytes)
+        :param parsed: The parse_logs results for the batch
+        """
+        indexes = []
+        logs = {}
+        for (site, log_time, log_str), (params, prep_time, error) in zip(
+            batch,
+            parsed
+        ):
+            if error:
+                self.failed += 1
+                self.logger.error(
+                    'Unable to import %s log at %s: %s',
+                    site.name,
+                    log_time,
+                    error
                 )
-            if index[0] == 4 and section.contains_values and section.binding:
-                params['antenna'] = Antenna.objects.filter(
-                    model=section.binding.get('antenna_type', None)
-                ).first()
-                params['radome'] = Radome.objects.filter(
-                    model=section.binding.get('radome_type', None)
-                ).first()
-
-            if index[0] == 6 and section.contains_values and section.binding:
-                params['frequency_standard'] = section.binding.get(
-                    'standard_type',
-                    None
-                )
-        return params, prep_time
+                continue
+
+            if prep_time:
+                # todo - what is correct when these don't match?
+                if prep_time < log_time:
+                    self.prep_less += 1
+                if prep_time == log_time:
+                    self.prep_eq += 1
+                if prep_time > log_time:
+                    self.prep_more += 1
+            else:
+                self.no_prep += 1
+
+            sat_sys = params.pop('satellite_system', None) or []
+            index = SiteIndex(
+                site=site,
+                begin=log_time,
+                **self.equipment.resolve(params)
+            )
+            indexes.append(index)
+            logs.setdefault((site.pk, log_time), (log_str, sat_sys))
 
-    def decode_str(self, log_str):
+        archived = []
         try:
-            return log_str.decode('utf-8')
-        except UnicodeDecodeError:
-            try:
-                return log_str.decode('ascii')
-            except UnicodeDecodeError:
-                return log_str.decode('latin')
+            with transaction.atomic():
+                created = SiteIndex.objects.bulk_insert(indexes)
+                SiteIndex.satellite_system.through.objects.bulk_create([
+                    SiteIndex.satellite_system.through(
+                        siteindex_id=index.pk,
+                        satellitesystem_id=sat
+                    )
+                    for index in created
+                    for sat in logs[(index.site_id, index.begin)][1]
+                ])
+                SiteIndex.objects.filter(
+                    pk__in=[index.pk for index in created]
+                ).update_search()
+                for index in created:
+                    name = index.site.get_filename(
+                        log_format=SiteLogFormat.LEGACY,
+                        epoch=index.begin
+                    )
+                    log_str = logs[(index.site_id, index.begin)][0]
+                    archived.append(
+                        ArchivedSiteLog(
+                            site=index.site,
+                            name=name,
+                            index=index,
+                            file_type=SLMFileType.SITE_LOG,
+                            log_format=SiteLogFormat.LEGACY,
+                            mimetype=SiteLogFormat.LEGACY.mimetype,
+                            size=len(log_str),
+                            file=ContentFile(log_str, name=name)
+                        )
+                    )
+                ArchivedSiteLog.objects.bulk_create(archived)
+        except Exception:
+            # the archived logs are written to storage as they are inserted,
+            # remove any that were written by the rolled back transaction
+            for archive in archived:
+                if archive.file._committed:
+                    archive.file.delete(save=False)
+            raise
@@ -20,10 +20,10 @@ class Command(BaseCommand):
 
     logger = logging.getLogger(__name__ + '.Command')
 
-    SECTIONS = {
-        *Site.section_accessors(),
-        *Site.subsection_accessors(),
-    }
+    SECTIONS = [
+        *Site.section_fields(),
+        *Site.subsection_fields(),
+    ]
 
     def add_arguments(self, parser):
 
@@ -80,24 +80,33 @@ class Command(BaseCommand):
                     name__in=[site.upper() for site in options['sites']]
                 )
 
+            for section in tqdm(
+                self.SECTIONS,
+                desc='Validating',
+                unit='sections'
+            ):
+                model = Site._meta.get_field(section).related_model
+                errors = model.objects.filter(
+                    site__in=sites
+                ).snapshot().validate(clear=options['clear'])
+                for pk, error in errors.items():
+                    self.logger.warning(
+                        '%s %d failed validation: %s',
+                        model.__name__,
+                        pk,
+                        error
+                    )
+
+            sites = sites.with_snapshot()
+
             with tqdm(
                 total=sites.count(),
-                desc='Validating',
+                desc='Updating',
                 unit='sites',
                 postfix={'site': ''}
             ) as p_bar:
                 for site in sites:
                     p_bar.set_postfix({'site': site.name})
-                    for section in self.SECTIONS:
-                        head = getattr(site, section).head()
-                        if not hasattr(head, '__iter__'):
-                            head = [head]
-                        for obj in head:
-                            if options['clear']:
-                                obj._flags = {}
-                            obj.clean()
-                            obj.save()
-
                     if options['schema']:
                         alert = GeodesyMLInvalid.objects.check_site(site=site)
                         if alert:
@@ -49,10 +49,11 @@ class Command(BaseCommand):
 
         print(f'Validating against: {str(geo)}')
 
-        result = geo.schema.validate(doc)
-
-        if not result:
-            for error in geo.schema.error_log:
-                print(f'[{error.line}] {error.message}')
-        else:
-            print(f'{options["GeodesyML"][0]} is valid!')
+        with geo.validator() as schema:
+            result = schema.validate(doc)
+
+            if not result:
+                for error in schema.error_log:
+                    print(f'[{error.line}] {error.message}')
+            else:
+                print(f'{options["GeodesyML"][0]} is valid!')
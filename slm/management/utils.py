@@ -0,0 +1,294 @@
+"""
+Utilities shared by the SLM management commands that build the site index and
+its archives in bulk.
+"""
+import multiprocessing
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from itertools import islice
+
+import django
+from dateutil import parser
+from django.utils.timezone import make_aware
+
+
+def init_worker():
+    """
+    Worker processes are spawned (not forked) so they do not share database
+    connections with the parent, Django must be setup in each.
+    """
+    django.setup()
+
+
+@contextmanager
+def worker_pool(workers):
+    """
+    A context manager that yields a process pool with the given number of
+    workers, or None if workers is 1 or less and work should be done in
+    process.
+
+    :param workers: The number of worker processes
+    """
+    if workers is None or workers <= 1:
+        yield None
+        return
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=init_worker
+    ) as pool:
+        yield pool
+
+
+def pool_map(pool, func, iterable, window=None):
+    """
+    Map func over iterable using the pool if there is one, otherwise in
+    process. Results are yielded lazily in order. Unlike Executor.map the
+    iterable is consumed lazily - no more than window items are in flight at
+    once, so it may be a stream that does not fit in memory.
+
+    :param pool: The process pool or None
+    :param func: The function to map, must be picklable if pool is given
+    :param iterable: The items to map over
+    :param window: The maximum number of items in flight (default: twice the
+        number of cpus)
+    """
+    if not pool:
+        yield from map(func, iterable)
+        return
+    window = window or 2 * (os.cpu_count() or 1)
+    pending = deque()
+    for item in iterable:
+        pending.append(pool.submit(func, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def batched(iterable, size):
+    """
+    Yield lists of up to size items from the iterable.
+    """
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def decode_str(log_str):
+    try:
+        return log_str.decode('utf-8')
+    except UnicodeDecodeError:
+        try:
+            return log_str.decode('ascii')
+        except UnicodeDecodeError:
+            return log_str.decode('latin')
+
+
+def parse_log_name(name):
+    """
+    Get the site identifier and time from an archived legacy site log's file
+    name (e.g. aaaa_20220101.log or AAAA00USA_20220101.log).
+
+    :param name: The file name (or path) of the log
+    :return: A 2-tuple of (site id, aware datetime) or None if the name could
+        not be parsed.
+    """
+    name = os.path.basename(name)
+    if '_' not in name:
+        return None
+    parts = re.split('[._-]', name)
+    try:
+        return parts[0], make_aware(parser.parse(parts[1]), timezone.utc)
+    except (parser.ParserError, OverflowError, IndexError):
+        return None
+
+
+class SiteMap:
+    """
+    Resolve site identifiers from archived log file names to Sites. Sites are
+    matched case insensitively by their full name or the four character
+    prefix of their name. Ambiguous prefixes are not resolved.
+    """
+
+    def __init__(self, sites):
+        self.sites = {}
+        ambiguous = set()
+        for site in sites:
+            name = site.name.upper()
+            self.sites[name] = site
+            if name[:4] in self.sites and name[:4] != name:
+                ambiguous.add(name[:4])
+            self.sites.setdefault(name[:4], site)
+        for prefix in ambiguous:
+            del self.sites[prefix]
+
+    def get(self, site_id):
+        return self.sites.get(site_id.upper(), None)
+
+
+class EquipmentMap:
+    """
+    Resolve equipment model names to Receiver, Antenna and Radome instances
+    from a lookup table loaded once.
+    """
+
+    def __init__(self):
+        from slm.models import Antenna, Radome, Receiver
+        self.equipment = {
+            field: {eqp.model: eqp for eqp in model.objects.all()}
+            for field, model in [
+                ('receiver', Receiver),
+                ('antenna', Antenna),
+                ('radome', Radome)
+            ]
+        }
+
+    def resolve(self, params):
+        """
+        Replace the equipment model names in the given index parameters with
+        their model instances (or None if not found).
+
+        :param params: Index parameters as returned by legacy_index_params
+        :return: The index parameters
+        """
+        for field, lookup in self.equipment.items():
+            params[field] = lookup.get(params.get(field, None), None)
+        return params
+
+
+def legacy_index_params(log_str, site_name):
+    """
+    Parse and bind a legacy site log and extract the SiteIndex fields from
+    it. Equipment is given by model name, see EquipmentMap.
+
+    :param log_str: The legacy site log as bytes
+    :param site_name: The name of the site the log belongs to
+    :return: A 2-tuple of (index parameters, prepared date)
+    """
+    from slm.parsing.legacy import SiteLogBinder, SiteLogParser
+
+    bound_log = SiteLogBinder(
+        SiteLogParser(decode_str(log_str), site_name=site_name)
+    ).parsed
+
+    def get_param(section_index, field_name, null_val=None):
+        binding = getattr(
+            getattr(bound_log, 'sections', {}).get(section_index, {}),
+            'binding',
+            {}
+        )
+        if binding:
+            return binding.get(field_name, null_val)
+        return null_val
+
+    def lat_lng(lat_lng):
+        if lat_lng is not None:
+            return lat_lng / 10000
+        return None
+
+    prep_time = get_param((0, None, None), 'date_prepared')
+    if prep_time:
+        prep_time = datetime(
+            year=prep_time.year,
+            month=prep_time.month,
+            day=prep_time.day,
+            tzinfo=timezone.utc
+        )
+
+    params = {
+        'latitude': lat_lng(get_param((2, None, None), 'latitude')),
+        'longitude': lat_lng(get_param((2, None, None), 'longitude')),
+        'elevation': get_param((2, None, None), 'elevation'),
+        'city': get_param((2, None, None), 'city', ''),
+        'country': get_param((2, None, None), 'country'),
+        'antenna': None,
+        'radome': None,
+        'receiver': None,
+        'serial_number': '',
+        'firmware': '',
+        'frequency_standard': None,
+        'domes_number': get_param((1, None, None), 'iers_domes_number', ''),
+        'satellite_system': [],
+        'data_center': get_param((13, None, None), 'primary', '')
+    }
+    for index, section in bound_log.sections.items():
+        if index[0] == 3 and section.contains_values and section.binding:
+            params['receiver'] = section.binding.get('receiver_type', None)
+            params['serial_number'] = section.binding.get(
+                'serial_number',
+                ''
+            )
+            params['firmware'] = section.binding.get('firmware', '')
+            params['satellite_system'] = section.binding.get(
+                'satellite_system',
+                None
+            )
+        if index[0] == 4 and section.contains_values and section.binding:
+            params['antenna'] = section.binding.get('antenna_type', None)
+            params['radome'] = section.binding.get('radome_type', None)
+
+        if index[0] == 6 and section.contains_values and section.binding:
+            params['frequency_standard'] = section.binding.get(
+                'standard_type',
+                None
+            )
+
+    # drop values that are too long for the index
+    from slm.models import SiteIndex
+    for param, value in list(params.items()):
+        if value and isinstance(value, str):
+            field = SiteIndex._meta.get_field(param)
+            if field.is_relation:
+                continue
+            if len(value) > (getattr(field, 'max_length', None) or 999999):
+                del params[param]
+    return params, prep_time
+
+
+def archive_legacy_log(site, log_time, log_str, equipment, name=None):
+    """
+    Index and archive a legacy site log for the given site. The index is
+    inserted into the site's existing index deck at the log's time.
+
+    :param site: The Site the log belongs to
+    :param log_time: The time the log became valid
+    :param log_str: The legacy site log as bytes
+    :param equipment: An EquipmentMap
+    :param name: The archive file name, by default it is derived from the site
+        and log time.
+    :return: The created SiteIndex
+    """
+    from django.core.files.base import ContentFile
+    from slm.defines import SiteLogFormat, SLMFileType
+    from slm.models import ArchivedSiteLog, SiteIndex
+
+    params, _ = legacy_index_params(log_str, site.name)
+    sat_sys = params.pop('satellite_system', [])
+    index = SiteIndex.objects.insert_index(
+        site=site,
+        begin=log_time,
+        **equipment.resolve(params)
+    )
+    if sat_sys:
+        index.satellite_system.set(sat_sys)
+    SiteIndex.objects.filter(pk=index.pk).update_search()
+
+    name = name or site.get_filename(
+        log_format=SiteLogFormat.LEGACY,
+        epoch=log_time
+    )
+    ArchivedSiteLog.objects.create(
+        site=site,
+        name=name,
+        index=index,
+        file_type=SLMFileType.SITE_LOG,
+        log_format=SiteLogFormat.LEGACY,
+        mimetype=SiteLogFormat.LEGACY.mimetype,
+        file=ContentFile(log_str, name=name)
+    )
+    return index
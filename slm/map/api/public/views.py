@@ -1,12 +1,20 @@
-from django.db.models import OuterRef, Q, Subquery
+from hashlib import md5
+
+from django.db.models import Avg, Count, Max, Min, OuterRef, Q, Subquery
+from django.db.models.functions import Substr
+from django.http import Http404
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
 from rest_framework import status
+from rest_framework.decorators import action
 from rest_framework.response import Response
 from slm.api.public import views as slm_views
 from slm.map.api.public.serializers import (
     StationListSerializer,
     StationMapSerializer,
 )
-from slm.models import SiteLocation
+from slm.models import SiteIndex, SiteLocation
+from slm.models.index import GRID_ZOOM, quadkey
 
 
 class StationListViewSet(slm_views.StationListViewSet):
@@ -32,6 +40,9 @@ class StationMapViewSet(StationListViewSet):
     serializer_class = StationMapSerializer
     pagination_class = None
 
+    # tiles are clustered on a grid of 2^cluster_depth by 2^cluster_depth cells
+    cluster_depth = 3
+
     def list(self, request, **kwargs):
         return Response({
             'type': 'FeatureCollection',
@@ -44,3 +55,81 @@ class StationMapViewSet(StationListViewSet):
         return super().get_queryset().filter(
             Q(latitude__isnull=False) & Q(longitude__isnull=False)
         )
+
+    def get_tile_etag(self, request):
+        """
+        The tile ETag changes whenever the index changes or the request does.
+        """
+        latest = SiteIndex.objects.aggregate(Max('begin'), Max('end'))
+        return quote_etag(
+            md5(
+                f'{latest["begin__max"]}|{latest["end__max"]}|'
+                f'{request.get_full_path()}'.encode()
+            ).hexdigest()
+        )
+
+    @action(
+        detail=False,
+        url_path=r'tiles/(?P<z>[0-9]+)/(?P<x>[0-9]+)/(?P<y>[0-9]+)'
+    )
+    def tiles(self, request, z, x, y, **kwargs):
+        """
+        Get the stations in a web mercator (z/x/y) tile as a geojson set of
+        point features. Stations are clustered on a grid within the tile -
+        cells that contain more than one station are returned as a single
+        cluster feature at the stations' mean location with their count.
+        Stations are located by the quadkeys precomputed on the index so a
+        tile is one indexed prefix query.
+        """
+        z, x, y = int(z), int(x), int(y)
+        if z > GRID_ZOOM or x >= 1 << z or y >= 1 << z:
+            raise Http404()
+
+        etag = self.get_tile_etag(request)
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+
+        depth = min(z + self.cluster_depth, GRID_ZOOM)
+        cells = SiteIndex.objects.filter(
+            pk__in=self.filter_queryset(self.get_queryset()).values('pk'),
+            quadkey__startswith=quadkey(z, x, y)
+        ).annotate(
+            cell=Substr('quadkey', 1, depth)
+        ).values('cell').annotate(
+            count=Count('pk'),
+            lat=Avg('latitude'),
+            lng=Avg('longitude'),
+            station=Min('pk'),
+            name=Min('site__name'),
+            publish=Min('begin')
+        ).order_by('cell')
+
+        features = []
+        for cell in cells:
+            feature = {
+                'type': 'Feature',
+                'geometry': {
+                    'type': 'Point',
+                    'coordinates': [cell['lng'], cell['lat']]
+                }
+            }
+            if cell['count'] > 1:
+                feature['properties'] = {
+                    'cluster': True,
+                    'count': cell['count']
+                }
+            else:
+                feature['id'] = cell['station']
+                feature['properties'] = {
+                    'name': cell['name'],
+                    'publish': cell['publish']
+                }
+            features.append(feature)
+
+        response = Response({
+            'type': 'FeatureCollection',
+            'features': features
+        }, status=status.HTTP_200_OK)
+        response['ETag'] = etag
+        return response
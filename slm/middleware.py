@@ -23,7 +23,9 @@ class SetLastVisitMiddleware:
             ):
                 request.user.silence_alerts = False
             request.user.last_activity = now()
-            request.user.save()
+            request.user.save(
+                update_fields=['last_activity', 'silence_alerts']
+            )
 
         response = self.get_response(request)
         return response
@@ -0,0 +1,301 @@
+# Generated by Django 4.1.13 on 2026-10-18 20:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('slm', '0009_alter_siteantenna_radome_type'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='siteantenna',
+            index_together={('site', 'edited', 'subsection'), ('site', 'edited', 'published', 'subsection'), ('site', 'edited', 'published'), ('site', 'edited')},
+        ),
+        migrations.AlterIndexTogether(
+            name='sitecollocation',
+            index_together={('site', 'edited', 'subsection'), ('site', 'edited', 'published', 'subsection'), ('site', 'edited', 'published'), ('site', 'edited')},
+        ),
+        migrations.AlterIndexTogether(
+            name='siteform',
+            index_together={('site', 'edited', 'published'), ('site', 'edited'), ('edited', 'published')},
+        ),
+        migrations.AlterIndexTogether(
+            name='sitefrequencystandard',
+            index_together={('site', 'edited', 'subsection'), ('site', 'edited', 'published', 'subsection'), ('site', 'edited', 'published'), ('site', 'edited')},
+        ),
+        migrations.AlterIndexTogether(
+            name='siteidentification',
+            index_together={('site', 'edited', 'published'), ('site', 'edited'), ('edited', 'published')},
+        ),
+        migrations.AlterIndexTogether(
+            name='sitelocalepisodiceffects',
+            index_together={('site', 'edited', 'subsection'), ('site', 'edited', 'published', 'subsection'), ('site', 'edited', 'published'), ('site', 'edited')},
+        ),
+        migrations.AlterIndexTogether(
+            name='sitelocation',
+            index_together={('site', 'edited', 'published'), ('site', 'edited'), ('edited', 'published')},
+        ),
+        migrations.AlterIndexTogether(
+            name='sitemoreinformation',
+            index_together={('site', 'edited', 'published'), ('site', 'edited'), ('edited', 'published')},
+        ),
+        migrations.AlterIndexTogether(
+            name='siteotherinstrumentation',
+            index_together={('site', 'edited', 'subsection'), ('site', 'edited', 'published', 'subsection'), ('site', 'edited', 'published'), ('site', 'edited')},
+        ),
+        migrations.AlterIndexTogether(
+            name='sitereceiver',
+            index_together={('site', 'edited', 'subsection'), ('site', 'edited', 'published', 'subsection'), ('site', 'edited', 'published'), ('site', 'edited')},
+        ),
+        migrations.AlterIndexTogether(
+            name='sitesurveyedlocalties',
+            index_together={('site', 'edited', 'subsection'), ('site', 'edited', 'published', 'subsection'), ('site', 'edited', 'published'), ('site', 'edited')},
+        ),
+        migrations.AddField(
+            model_name='siteantenna',
+            name='valid_from',
+            field=models.DateTimeField(blank=True, db_index=True, default=None, help_text='The time this edit was published. Null for unpublished edits.', null=True),
+        ),
+        migrations.AddField(
+            model_name='siteantenna',
+            name='valid_to',
+            field=models.DateTimeField(blank=True, db_index=True, default=None, help_text='The time this edit was superseded by a newer published edit. Null for the currently published edit and unpublished edits.', null=True),
+        ),
+        migrations.AddField(
+            model_name='sitecollocation',
+            name='valid_from',
+            field=models.DateTimeField(blank=True, db_index=True, default=None, help_text='The time this edit was published. Null for unpublished edits.', null=True),
+        ),
+        migrations.AddField(
+            model_name='sitecollocation',
+            name='valid_to',
+            field=models.DateTimeField(blank=True, db_index=True, default=None, help_text='The time this edit was superseded by a newer published edit. Null for the currently published edit and unpublished edits.', null=True),
+        ),
+        migrations.AddField(
+            model_name='siteform',
+            name='valid_from',
+            field=models.DateTimeField(blank=True, db_index=True, default=None, help_text='The time this edit was published. Null for unpublished edits.', null=True),
+        ),
+        migrations.AddField(
+            model_name='siteform',
+            name='valid_to',
+            field=models.DateTimeField(blank=True, db_index=True, default=None, help_text='The time this edit was superseded by a newer published edit. Null for the currently published edit and unpublished edits.', null=True),
+        ),
+        migrations.AddField(
+            model_name='sitefrequencystandard',
+            name='valid_from',
+            field=models.DateTimeField(blank=True, db_index=True, default=None, help_text='The time this edit was published. Null for unpublished edits.', null=True),
+        ),
+        migrations.AddField(
+            model_name='sitefrequencystandard',
+            name='valid_to',
+            field=models.DateTimeField(blank=True, db_index=True, default=None, help_text='The time this edit was superseded by a newer published edit. Null for the currently published edit and unpublished edits.', null=True),
+        ),
+        migrations.AddField(
+            model_name='sitehumiditysensor',
+            name='valid_from',
+            field=models.DateTimeField(blank=True, db_index=True, default=None, help_text='The time this edit was published. Null for unpublished edits.', null=True),
+        ),
+        migrations.AddField(
+            model_name='sitehumiditysensor',
+            name='valid_to',
+            field=models.DateTimeField(blank=True, db_index=True, default=None, help_text='The time this edit was superseded by a newer published edit. Null for the currently published edit and unpublished edits.', null=True),
+        ),
+        migrations.AddField(
+            model_name='siteidentification',
+            name='valid_from',
+            field=models.DateTimeField(blank=True, db_index=True, default=None, help_text='The time this edit was published. Null for unpublished edits.', null=True),
+        ),
+        migrations.AddField(
+            model_name='siteidentification',
+            name='valid_to',
+            field=models.DateTimeField(blank=True, db_index=True, default=None, help_text='The time this edit was superseded by a newer published edit. Null for the currently published edit and unpublished edits.', null=True),
+        ),
+        migrations.AddField(
+            model_name='sitelocalepisodiceffects',
+            name='valid_from',
+            field=models.DateTimeField(blank=True, db_index=True, default=None, help_text='The time this edit was published. Null for unpublished edits.', null=True),
+        ),
+        migrations.AddField(
+            model_name='sitelocalepisodiceffects',
+            name='valid_to',
+            field=models.DateTimeField(blank=True, db_index=True, default=None, help_text='The time this edit was superseded by a newer published edit. Null for the currently published edit and unpublished edits.', null=True),
+        ),
+        migrations.AddField(
+            model_name='sitelocation',
+            name='valid_from',
+            field=models.DateTimeField(blank=True, db_index=True, default=None, help_text='The time this edit was published. Null for unpublished edits.', null=True),
+        ),
+        migrations.AddField(
+            model_name='sitelocation',
+            name='valid_to',
+            field=models.DateTimeField(blank=True, db_index=True, default=None, help_text='The time this edit was superseded by a newer published edit. Null for the currently published edit and unpublished edits.', null=True),
+        ),
+        migrations.AddField(
+            model_name='sitemoreinformation',
+            name='valid_from',
+            field=models.DateTimeField(blank=True, db_index=True, default=None, help_text='The time this edit was published. Null for unpublished edits.', null=True),
+        ),
+        migrations.AddField(
+            model_name='sitemoreinformation',
+            name='valid_to',
+            field=models.DateTimeField(blank=True, db_index=True, default=None, help_text='The time this edit was superseded by a newer published edit. Null for the currently published edit and unpublished edits.', null=True),
+        ),
+        migrations.AddField(
+            model_name='sitemultipathsources',
+            name='valid_from',
+            field=models.DateTimeField(blank=True, db_index=True, default=None, help_text='The time this edit was published. Null for unpublished edits.', null=True),
+        ),
+        migrations.AddField(
+            model_name='sitemultipathsources',
+            name='valid_to',
+            field=models.DateTimeField(blank=True, db_index=True, default=None, help_text='The time this edit was superseded by a newer published edit. Null for the currently published edit and unpublished edits.', null=True),
+        ),
+        migrations.AddField(
+            model_name='siteoperationalcontact',
+            name='valid_from',
+            field=models.DateTimeField(blank=True, db_index=True, default=None, help_text='The time this edit was published. Null for unpublished edits.', null=True),
+        ),
+        migrations.AddField(
+            model_name='siteoperationalcontact',
+            name='valid_to',
+            field=models.DateTimeField(blank=True, db_index=True, default=None, help_text='The time this edit was superseded by a newer published edit. Null for the currently published edit and unpublished edits.', null=True),
+        ),
+        migrations.AddField(
+            model_name='siteotherinstrumentation',
+            name='valid_from',
+            field=models.DateTimeField(blank=True, db_index=True, default=None, help_text='The time this edit was published. Null for unpublished edits.', null=True),
+        ),
+        migrations.AddField(
+            model_name='siteotherinstrumentation',
+            name='valid_to',
+            field=models.DateTimeField(blank=True, db_index=True, default=None, help_text='The time this edit was superseded by a newer published edit. Null for the currently published edit and unpublished edits.', null=True),
+        ),
+        migrations.AddField(
+            model_name='sitepressuresensor',
+            name='valid_from',
+            field=models.DateTimeField(blank=True, db_index=True, default=None, help_text='The time this edit was published. Null for unpublished edits.', null=True),
+        ),
+        migrations.AddField(
+            model_name='sitepressuresensor',
+            name='valid_to',
+            field=models.DateTimeField(blank=True, db_index=True, default=None, help_text='The time this edit was superseded by a newer published edit. Null for the currently published edit and unpublished edits.', null=True),
+        ),
+        migrations.AddField(
+            model_name='siteradiointerferences',
+            name='valid_from',
+            field=models.DateTimeField(blank=True, db_index=True, default=None, help_text='The time this edit was published. Null for unpublished edits.', null=True),
+        ),
+        migrations.AddField(
+            model_name='siteradiointerferences',
+            name='valid_to',
+            field=models.DateTimeField(blank=True, db_index=True, default=None, help_text='The time this edit was superseded by a newer published edit. Null for the currently published edit and unpublished edits.', null=True),
+        ),
+        migrations.AddField(
+            model_name='sitereceiver',
+            name='valid_from',
+            field=models.DateTimeField(blank=True, db_index=True, default=None, help_text='The time this edit was published. Null for unpublished edits.', null=True),
+        ),
+        migrations.AddField(
+            model_name='sitereceiver',
+            name='valid_to',
+            field=models.DateTimeField(blank=True, db_index=True, default=None, help_text='The time this edit was superseded by a newer published edit. Null for the currently published edit and unpublished edits.', null=True),
+        ),
+        migrations.AddField(
+            model_name='siteresponsibleagency',
+            name='valid_from',
+            field=models.DateTimeField(blank=True, db_index=True, default=None, help_text='The time this edit was published. Null for unpublished edits.', null=True),
+        ),
+        migrations.AddField(
+            model_name='siteresponsibleagency',
+            name='valid_to',
+            field=models.DateTimeField(blank=True, db_index=True, default=None, help_text='The time this edit was superseded by a newer published edit. Null for the currently published edit and unpublished edits.', null=True),
+        ),
+        migrations.AddField(
+            model_name='sitesignalobstructions',
+            name='valid_from',
+            field=models.DateTimeField(blank=True, db_index=True, default=None, help_text='The time this edit was published. Null for unpublished edits.', null=True),
+        ),
+        migrations.AddField(
+            model_name='sitesignalobstructions',
+            name='valid_to',
+            field=models.DateTimeField(blank=True, db_index=True, default=None, help_text='The time this edit was superseded by a newer published edit. Null for the currently published edit and unpublished edits.', null=True),
+        ),
+        migrations.AddField(
+            model_name='sitesurveyedlocalties',
+            name='valid_from',
+            field=models.DateTimeField(blank=True, db_index=True, default=None, help_text='The time this edit was published. Null for unpublished edits.', null=True),
+        ),
+        migrations.AddField(
+            model_name='sitesurveyedlocalties',
+            name='valid_to',
+            field=models.DateTimeField(blank=True, db_index=True, default=None, help_text='The time this edit was superseded by a newer published edit. Null for the currently published edit and unpublished edits.', null=True),
+        ),
+        migrations.AddField(
+            model_name='sitetemperaturesensor',
+            name='valid_from',
+            field=models.DateTimeField(blank=True, db_index=True, default=None, help_text='The time this edit was published. Null for unpublished edits.', null=True),
+        ),
+        migrations.AddField(
+            model_name='sitetemperaturesensor',
+            name='valid_to',
+            field=models.DateTimeField(blank=True, db_index=True, default=None, help_text='The time this edit was superseded by a newer published edit. Null for the currently published edit and unpublished edits.', null=True),
+        ),
+        migrations.AddField(
+            model_name='sitewatervaporradiometer',
+            name='valid_from',
+            field=models.DateTimeField(blank=True, db_index=True, default=None, help_text='The time this edit was published. Null for unpublished edits.', null=True),
+        ),
+        migrations.AddField(
+            model_name='sitewatervaporradiometer',
+            name='valid_to',
+            field=models.DateTimeField(blank=True, db_index=True, default=None, help_text='The time this edit was superseded by a newer published edit. Null for the currently published edit and unpublished edits.', null=True),
+        ),
+        migrations.AlterIndexTogether(
+            name='siteantenna',
+            index_together={('site', 'edited', 'published'), ('site', 'edited', 'subsection'), ('site', 'edited', 'published', 'subsection'), ('site', 'valid_from', 'valid_to', 'subsection'), ('site', 'edited')},
+        ),
+        migrations.AlterIndexTogether(
+            name='sitecollocation',
+            index_together={('site', 'edited', 'published'), ('site', 'edited', 'subsection'), ('site', 'edited', 'published', 'subsection'), ('site', 'valid_from', 'valid_to', 'subsection'), ('site', 'edited')},
+        ),
+        migrations.AlterIndexTogether(
+            name='siteform',
+            index_together={('site', 'edited', 'published'), ('site', 'valid_from', 'valid_to'), ('site', 'edited'), ('edited', 'published')},
+        ),
+        migrations.AlterIndexTogether(
+            name='sitefrequencystandard',
+            index_together={('site', 'edited', 'published'), ('site', 'edited', 'subsection'), ('site', 'edited', 'published', 'subsection'), ('site', 'valid_from', 'valid_to', 'subsection'), ('site', 'edited')},
+        ),
+        migrations.AlterIndexTogether(
+            name='siteidentification',
+            index_together={('site', 'edited', 'published'), ('site', 'valid_from', 'valid_to'), ('site', 'edited'), ('edited', 'published')},
+        ),
+        migrations.AlterIndexTogether(
+            name='sitelocalepisodiceffects',
+            index_together={('site', 'edited', 'published'), ('site', 'edited', 'subsection'), ('site', 'edited', 'published', 'subsection'), ('site', 'valid_from', 'valid_to', 'subsection'), ('site', 'edited')},
+        ),
+        migrations.AlterIndexTogether(
+            name='sitelocation',
+            index_together={('site', 'edited', 'published'), ('site', 'valid_from', 'valid_to'), ('site', 'edited'), ('edited', 'published')},
+        ),
+        migrations.AlterIndexTogether(
+            name='sitemoreinformation',
+            index_together={('site', 'edited', 'published'), ('site', 'valid_from', 'valid_to'), ('site', 'edited'), ('edited', 'published')},
+        ),
+        migrations.AlterIndexTogether(
+            name='siteotherinstrumentation',
+            index_together={('site', 'edited', 'published'), ('site', 'edited', 'subsection'), ('site', 'edited', 'published', 'subsection'), ('site', 'valid_from', 'valid_to', 'subsection'), ('site', 'edited')},
+        ),
+        migrations.AlterIndexTogether(
+            name='sitereceiver',
+            index_together={('site', 'edited', 'published'), ('site', 'edited', 'subsection'), ('site', 'edited', 'published', 'subsection'), ('site', 'valid_from', 'valid_to', 'subsection'), ('site', 'edited')},
+        ),
+        migrations.AlterIndexTogether(
+            name='sitesurveyedlocalties',
+            index_together={('site', 'edited', 'published'), ('site', 'edited', 'subsection'), ('site', 'edited', 'published', 'subsection'), ('site', 'valid_from', 'valid_to', 'subsection'), ('site', 'edited')},
+        ),
+    ]
@@ -0,0 +1,89 @@
+from django.db import migrations
+
+SECTIONS = [
+    'siteform',
+    'siteidentification',
+    'sitelocation',
+    'sitemoreinformation',
+    'siteoperationalcontact',
+    'siteresponsibleagency',
+]
+
+SUBSECTIONS = [
+    'siteantenna',
+    'sitecollocation',
+    'sitefrequencystandard',
+    'sitehumiditysensor',
+    'sitelocalepisodiceffects',
+    'sitemultipathsources',
+    'siteotherinstrumentation',
+    'sitepressuresensor',
+    'siteradiointerferences',
+    'sitereceiver',
+    'sitesignalobstructions',
+    'sitesurveyedlocalties',
+    'sitetemperaturesensor',
+    'sitewatervaporradiometer',
+]
+
+BATCH_SIZE = 1000
+
+
+def backfill_validity(apps, schema_editor):
+    """
+    Publish times were not recorded before the validity interval was
+    introduced, so for existing histories we use the edit timestamp of each
+    published row - this is identical to how epoch queries were resolved
+    before.
+    """
+    for model_name in [*SECTIONS, *SUBSECTIONS]:
+        Model = apps.get_model('slm', model_name)
+        partition = ['site_id']
+        if model_name in SUBSECTIONS:
+            partition.append('subsection')
+
+        batch = []
+        previous = None
+        for row in Model.objects.filter(
+            published=True
+        ).order_by(*partition, 'edited', 'pk').only(
+            'pk', 'edited', *partition
+        ).iterator(chunk_size=BATCH_SIZE):
+            row.valid_from = row.edited
+            row.valid_to = None
+            if previous is not None and all(
+                getattr(previous, field) == getattr(row, field)
+                for field in partition
+            ):
+                previous.valid_to = row.edited
+            batch.append(row)
+            previous = row
+            if len(batch) > BATCH_SIZE:
+                # hold the last row back, its valid_to depends on the next
+                Model.objects.bulk_update(
+                    batch[:-1],
+                    ['valid_from', 'valid_to']
+                )
+                batch = batch[-1:]
+
+        if batch:
+            Model.objects.bulk_update(batch, ['valid_from', 'valid_to'])
+
+
+def clear_validity(apps, schema_editor):
+    for model_name in [*SECTIONS, *SUBSECTIONS]:
+        apps.get_model('slm', model_name).objects.update(
+            valid_from=None,
+            valid_to=None
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('slm', '0010_section_validity'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_validity, clear_validity)
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.1.13 on 2026-10-18 20:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django_enum.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('slm', '0011_backfill_section_validity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('log_format', django_enum.fields.EnumPositiveSmallIntegerField(choices=[(1, 'Legacy (ASCII)'), (2, 'GeodesyML'), (3, 'JSON')])),
+                ('state', django_enum.fields.EnumPositiveSmallIntegerField(choices=[(0, 'Pending'), (1, 'Running'), (2, 'Done'), (3, 'Failed')], db_index=True, default=0)),
+                ('created', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('started', models.DateTimeField(blank=True, default=None, null=True)),
+                ('finished', models.DateTimeField(blank=True, default=None, null=True)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('error', models.TextField(blank=True, default='')),
+                ('index', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archive_jobs', to='slm.siteindex')),
+            ],
+            options={
+                'ordering': ('created',),
+                'unique_together': {('index', 'log_format')},
+            },
+        ),
+    ]
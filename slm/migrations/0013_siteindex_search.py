@@ -0,0 +1,110 @@
+# Generated by Django 4.1.13 on 2026-10-18 20:50
+
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+SEARCH_SEPARATOR = '\n'
+
+
+def choice_terms(enum, value):
+    if not value:
+        return []
+    try:
+        value = enum(value)
+    except ValueError:
+        return [value]
+    return [value.value, value.label]
+
+
+def search_document(index):
+    """
+    A frozen copy of slm.models.index.search_document as it was when the
+    search column was added.
+    """
+    from slm.defines import FrequencyStandardType, ISOCountry
+    site = index.site
+    terms = [
+        site.name,
+        *(
+            term for agency in site.agencies.all()
+            for term in (agency.shortname, agency.name)
+        ),
+        *(network.name for network in site.networks.all()),
+        index.city,
+        *choice_terms(ISOCountry, index.country),
+        index.antenna.model if index.antenna else None,
+        index.radome.model if index.radome else None,
+        index.receiver.model if index.receiver else None,
+        index.serial_number,
+        index.firmware,
+        *choice_terms(FrequencyStandardType, index.frequency_standard),
+        index.domes_number,
+        *(system.name for system in index.satellite_system.all()),
+        index.data_center
+    ]
+    return SEARCH_SEPARATOR.join(
+        dict.fromkeys(
+            str(term).strip().lower() for term in terms
+            if term and str(term).strip()
+        )
+    )
+
+
+def backfill_search(apps, schema_editor):
+    SiteIndex = apps.get_model('slm', 'SiteIndex')
+    indexes = SiteIndex.objects.select_related(
+        'site',
+        'antenna',
+        'radome',
+        'receiver'
+    ).prefetch_related(
+        'site__agencies',
+        'site__networks',
+        'satellite_system'
+    ).order_by('pk')
+    batch = []
+    for index in indexes.iterator(chunk_size=BATCH_SIZE):
+        index.search = search_document(index)
+        batch.append(index)
+        if len(batch) >= BATCH_SIZE:
+            SiteIndex.objects.bulk_update(batch, ['search'])
+            batch = []
+    SiteIndex.objects.bulk_update(batch, ['search'])
+
+
+def create_trigram_index(apps, schema_editor):
+    """
+    Substring searches can only use an index on PostgreSQL, through the
+    pg_trgm extension. Other backends scan the search column.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS slm_siteindex_search_trgm ON '
+        'slm_siteindex USING gin (search gin_trgm_ops)'
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS slm_siteindex_search_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('slm', '0012_archive_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='siteindex',
+            name='search',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.RunPython(backfill_search, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.1.13 on 2026-10-18 20:55
+
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def backfill_quadkeys(apps, schema_editor):
+    from slm.models.index import location_quadkey
+    SiteIndex = apps.get_model('slm', 'SiteIndex')
+    batch = []
+    for index in SiteIndex.objects.filter(
+        latitude__isnull=False,
+        longitude__isnull=False
+    ).only('pk', 'latitude', 'longitude').iterator(chunk_size=BATCH_SIZE):
+        index.quadkey = location_quadkey(index.latitude, index.longitude)
+        batch.append(index)
+        if len(batch) >= BATCH_SIZE:
+            SiteIndex.objects.bulk_update(batch, ['quadkey'])
+            batch = []
+    SiteIndex.objects.bulk_update(batch, ['quadkey'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('slm', '0013_siteindex_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='siteindex',
+            name='quadkey',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=20),
+        ),
+        migrations.RunPython(backfill_quadkeys, migrations.RunPython.noop),
+    ]
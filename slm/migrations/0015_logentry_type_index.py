@@ -0,0 +1,17 @@
+# Generated by Django 4.1.13 on 2026-10-18 21:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('slm', '0014_siteindex_quadkey'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='logentry',
+            index=models.Index(fields=['type', 'id'], name='slm_logentr_type_e3974b_idx'),
+        ),
+    ]
@@ -0,0 +1,106 @@
+# Generated by Django 4.1.13 on 2026-10-18 21:10
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django_enum.fields
+
+BATCH_SIZE = 500
+
+
+def backfill_audience(apps, schema_editor):
+    """
+    Index the audience of existing alerts. Alert subclasses with site,
+    agency or user relations target those, all other alerts are broadcast.
+    """
+    from django.core.exceptions import FieldDoesNotExist
+    Alert = apps.get_model('slm', 'Alert')
+    AlertAudience = apps.get_model('slm', 'AlertAudience')
+    Site = apps.get_model('slm', 'Site')
+    targeted = set()
+    audience = []
+    for model in apps.get_app_config('slm').get_models():
+        try:
+            model._meta.get_field('alert_ptr')
+        except FieldDoesNotExist:
+            continue
+        relations = []
+        for relation in ['site', 'agency', 'user']:
+            try:
+                model._meta.get_field(relation)
+                relations.append(f'{relation}_id')
+            except FieldDoesNotExist:
+                continue
+        if not relations:
+            continue
+        for alert in model.objects.values('pk', 'level', *relations).iterator(
+            chunk_size=BATCH_SIZE
+        ):
+            targeted.add(alert['pk'])
+            audience.extend(
+                AlertAudience(
+                    alert_id=alert['pk'],
+                    level=alert['level'],
+                    **{relation: alert[relation]}
+                ) for relation in relations
+            )
+    audience.extend(
+        AlertAudience(
+            alert_id=alert['pk'],
+            level=alert['level'],
+            broadcast=True
+        ) for alert in Alert.objects.values('pk', 'level')
+        if alert['pk'] not in targeted
+    )
+    AlertAudience.objects.bulk_create(audience, batch_size=BATCH_SIZE)
+    Site.objects.update(
+        max_alert_level=models.Subquery(
+            AlertAudience.objects.filter(
+                site=models.OuterRef('pk')
+            ).order_by('-level').values('level')[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('slm', '0015_logentry_type_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='site',
+            name='max_alert_level',
+            field=django_enum.fields.EnumPositiveSmallIntegerField(blank=True, choices=[(1, 'NOTICE'), (2, 'WARNING'), (3, 'ERROR')], db_index=True, default=None, help_text='The level of the most severe alert for this site.', null=True),
+        ),
+        migrations.CreateModel(
+            name='AlertAudience',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('level', django_enum.fields.EnumPositiveSmallIntegerField(choices=[(1, 'NOTICE'), (2, 'WARNING'), (3, 'ERROR')])),
+                ('broadcast', models.BooleanField(blank=True, default=False)),
+                ('agency', models.ForeignKey(blank=True, default=None, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='alert_audience', to='slm.agency')),
+                ('alert', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='audience', to='slm.alert')),
+                ('site', models.ForeignKey(blank=True, default=None, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='alert_audience', to='slm.site')),
+                ('user', models.ForeignKey(blank=True, default=None, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='alert_audience', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='alertaudience',
+            index=models.Index(fields=['site', 'level'], name='slm_alertau_site_id_b6ea08_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='alertaudience',
+            index=models.Index(fields=['agency', 'level'], name='slm_alertau_agency__e09a07_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='alertaudience',
+            index=models.Index(fields=['user', 'level'], name='slm_alertau_user_id_f339c1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='alertaudience',
+            index=models.Index(fields=['broadcast', 'level'], name='slm_alertau_broadca_cbfaff_idx'),
+        ),
+        migrations.RunPython(backfill_audience, migrations.RunPython.noop),
+    ]
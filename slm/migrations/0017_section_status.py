@@ -0,0 +1,88 @@
+# Generated by Django 4.1.13 on 2026-10-18 21:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django_enum.fields
+
+BATCH_SIZE = 500
+
+
+def backfill_statuses(apps, schema_editor):
+    """
+    Record the status of the current row of every site log section. Deleted
+    subsections whose deletion has been published are not recorded.
+    """
+    from slm.defines import SiteLogStatus
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    SiteSectionStatus = apps.get_model('slm', 'SiteSectionStatus')
+    for model in apps.get_app_config('slm').get_models():
+        fields = {field.name for field in model._meta.fields}
+        if not {'site', 'edited', 'published', '_flags'} <= fields:
+            continue
+        partition = ['site']
+        columns = ['site', 'published', '_flags']
+        if 'subsection' in fields:
+            partition.append('subsection')
+            columns.extend(['subsection', 'is_deleted'])
+        section_type, _ = ContentType.objects.get_or_create(
+            app_label=model._meta.app_label,
+            model=model._meta.model_name
+        )
+        statuses = []
+        last = None
+        for row in model.objects.order_by(
+            *partition, '-edited', '-pk'
+        ).values(*columns).iterator(chunk_size=BATCH_SIZE):
+            key = (row['site'], row.get('subsection', None))
+            if key == last:
+                continue
+            last = key
+            if row['published'] and row.get('is_deleted', False):
+                continue
+            statuses.append(
+                SiteSectionStatus(
+                    site_id=row['site'],
+                    section_type=section_type,
+                    subsection=row.get('subsection', None),
+                    num_flags=len(row['_flags'] or {}),
+                    status=(
+                        SiteLogStatus.PUBLISHED if row['published']
+                        else SiteLogStatus.UPDATED
+                    )
+                )
+            )
+            if len(statuses) >= BATCH_SIZE:
+                SiteSectionStatus.objects.bulk_create(statuses)
+                statuses = []
+        SiteSectionStatus.objects.bulk_create(statuses)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('slm', '0016_alert_audience'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SiteSectionStatus',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subsection', models.PositiveSmallIntegerField(blank=True, default=None, help_text='The subsection identifier, null for sections.', null=True)),
+                ('num_flags', models.PositiveSmallIntegerField(blank=True, default=0)),
+                ('status', django_enum.fields.EnumPositiveSmallIntegerField(choices=[(1, 'Former'), (2, 'Proposed'), (3, 'Updated'), (4, 'Published'), (5, 'Empty'), (6, 'Suspended')])),
+                ('section_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='contenttypes.contenttype')),
+                ('site', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='section_statuses', to='slm.site')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='sitesectionstatus',
+            constraint=models.UniqueConstraint(fields=('site', 'section_type', 'subsection'), name='unique_site_subsection_status'),
+        ),
+        migrations.AddConstraint(
+            model_name='sitesectionstatus',
+            constraint=models.UniqueConstraint(condition=models.Q(('subsection__isnull', True)), fields=('site', 'section_type'), name='unique_site_section_status'),
+        ),
+        migrations.RunPython(backfill_statuses, migrations.RunPython.noop),
+    ]
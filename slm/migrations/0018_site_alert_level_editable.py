@@ -0,0 +1,19 @@
+# Generated by Django 4.1.13 on 2026-10-18 21:46
+
+from django.db import migrations
+import django_enum.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('slm', '0017_section_status'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='site',
+            name='max_alert_level',
+            field=django_enum.fields.EnumPositiveSmallIntegerField(blank=True, choices=[(1, 'NOTICE'), (2, 'WARNING'), (3, 'ERROR')], db_index=True, default=None, editable=False, help_text='The level of the most severe alert for this site. This is maintained by the alert audience index.', null=True),
+        ),
+    ]
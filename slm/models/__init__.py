@@ -3,7 +3,7 @@ from django.core.cache import cache
 from django.core.exceptions import ImproperlyConfigured
 from django.db import models
 from slm.models.data import DataAvailability
-from slm.models.index import ArchivedSiteLog, SiteIndex
+from slm.models.index import ArchivedSiteLog, ArchiveJob, SiteIndex
 from slm.models.sitelog import (
     Site,
     SiteAntenna,
@@ -23,6 +23,7 @@ from slm.models.sitelog import (
     SiteReceiver,
     SiteResponsibleAgency,
     SiteSection,
+    SiteSectionStatus,
     SiteSignalObstructions,
     SiteSubSection,
     SiteSurveyedLocalTies,
@@ -44,6 +45,7 @@ from slm.models.system import (
 )
 from slm.models.alerts import (
     Alert,
+    AlertAudience,
     UserAlert,
     SiteAlert,
     AgencyAlert,
@@ -1,5 +1,5 @@
 from django.db import models
-from django.db.models import Q
+from django.db.models import Max, OuterRef, Q, Subquery
 from django.utils.translation import gettext as _
 from django.conf import settings
 from slm.defines import (
@@ -10,7 +10,7 @@ from slm.defines import (
 )
 from slm import signals as slm_signals
 from slm.models.system import SiteFile
-from slm.utils import from_email
+from slm.utils import from_email, permission_cache
 from polymorphic.models import PolymorphicModel
 from polymorphic.managers import PolymorphicManager, PolymorphicQuerySet
 from django.utils.timezone import now
@@ -171,21 +171,27 @@ class AlertQuerySet(PolymorphicQuerySet):
     def for_site(self, site):
         if not site:
             return self.none()
-        return self.filter(self.site_q(site))
+        return self.filter(audience__site=site)
 
     def for_sites(self, sites):
         if not sites:
             return self.none()
-        return self.filter(self.sites_q(sites))
+        return self.filter(
+            pk__in=AlertAudience.objects.filter(site__in=sites).values('alert')
+        )
 
     def for_agencies(self, agencies):
         if not agencies:
             return self.none()
-        return self.filter(self.agencies_q(agencies))
+        return self.filter(
+            pk__in=AlertAudience.objects.filter(
+                agency__in=agencies
+            ).values('alert')
+        )
 
     def for_user(self, user):
         if user.is_authenticated:
-            return self.filter(self.user_q(user))
+            return self.filter(audience__user=user)
         return self.none()
 
     @classmethod
@@ -240,17 +246,12 @@ class AlertQuerySet(PolymorphicQuerySet):
         :param user: The user to fetch alerts for
         :return:
         """
-        from slm.models import Site
         if user.is_authenticated:
             if user.is_superuser:
                 return self.all()
-            else:
-                return self.filter(
-                    self.untargeted_q() |
-                    self.user_q(user) |
-                    self.sites_q(Site.objects.editable_by(user)) |
-                    self.agencies_q(user.agencies.all())
-                )
+            return self.filter(
+                pk__in=AlertAudience.objects.visible_to(user).values('alert')
+            )
         return self.none()
 
     def concerning_agencies(self, agencies):
@@ -260,16 +261,13 @@ class AlertQuerySet(PolymorphicQuerySet):
         agencies and any alerts for users belonging to representing agencies or
         any users belonging to the represented agencies.
         """
-        from slm.models import Site
         return self.filter(
-            self.untargeted_q() |
-            self.user_q(
-                get_user_model().objects.filter(agencies__in=agencies)
-            ) |
-            self.sites_q(
-                Site.objects.filter(agencies__in=agencies).distinct()
-            ) |
-            self.agencies_q(agencies)
+            pk__in=AlertAudience.objects.filter(
+                Q(broadcast=True) |
+                Q(user__agencies__in=agencies) |
+                Q(site__agencies__in=agencies) |
+                Q(agency__in=agencies)
+            ).values('alert')
         )
 
     def concerning_sites(self, sites):
@@ -281,17 +279,14 @@ class AlertQuerySet(PolymorphicQuerySet):
         """
         from slm.models import Agency
         agencies = Agency.objects.filter(sites__in=sites).distinct()
-        ret = self.filter(
-            self.untargeted_q() |
-            self.user_q(
-                get_user_model().objects.filter(
-                    agencies__in=agencies
-                ).distinct()
-            ) |
-            self.sites_q(sites) |
-            self.agencies_q(agencies)
+        return self.filter(
+            pk__in=AlertAudience.objects.filter(
+                Q(broadcast=True) |
+                Q(user__agencies__in=agencies) |
+                Q(site__in=sites) |
+                Q(agency__in=agencies)
+            ).values('alert')
         )
-        return ret
 
     def send_emails(self, request=None):
         for alert in self:
@@ -549,6 +544,160 @@ class Alert(PolymorphicModel):
         verbose_name = 'Alerts'
 
 
+class AlertAudienceQuerySet(models.QuerySet):
+
+    def visible_to(self, user):
+        """
+        Return the audience rows of the alerts visible to the given user.
+
+        :param user: The user to fetch alerts for
+        :return: A queryset of AlertAudience rows
+        """
+        if user.is_authenticated:
+            if user.is_superuser:
+                return self.all()
+            return self.filter(
+                Q(broadcast=True) |
+                Q(user=user) |
+                Q(agency__in=user.agencies.all()) |
+                Q(site__in=permission_cache.editable_sites(user))
+            )
+        return self.none()
+
+    def max_level(self):
+        """
+        :return: The highest AlertLevel of these rows or None
+        """
+        level = self.aggregate(Max('level'))['level__max']
+        return AlertLevel(level) if level else None
+
+    def index(self, alert):
+        """
+        Rebuild the audience rows of the given alert. Alerts that target
+        sites, agencies or users get one row per target relation and
+        untargeted alerts get a broadcast row.
+
+        :param alert: The (real instance of the) Alert
+        """
+        audience = self.filter(alert=alert)
+        stale_sites = set(
+            audience.filter(site__isnull=False).values_list(
+                'site_id',
+                flat=True
+            )
+        )
+        # audience rows have no dependents - delete them without sending a
+        # post_delete per row, site levels are recomputed once below
+        audience._raw_delete(audience.db)
+        targets = [
+            {f'{relation}_id': getattr(alert, f'{relation}_id')}
+            for relation, alert_classes in [
+                ('site', AlertManager.site_alerts()),
+                ('agency', AlertManager.agency_alerts()),
+                ('user', AlertManager.user_alerts())
+            ] if alert.__class__ in alert_classes
+        ]
+        self.bulk_create([
+            AlertAudience(
+                alert=alert,
+                level=alert.level,
+                broadcast=not targets,
+                **target
+            ) for target in targets or [{}]
+        ])
+        sites = []
+        if any(target.get('site_id', None) for target in targets):
+            # refresh the alert's site instance if it has been loaded
+            site_field = alert._meta.get_field('site')
+            sites.append(
+                site_field.get_cached_value(alert)
+                if site_field.is_cached(alert) else alert.site_id
+            )
+            stale_sites.discard(alert.site_id)
+        self.update_site_levels([*sites, *stale_sites])
+
+    def update_site_levels(self, sites):
+        """
+        Recompute the max alert level denormalized onto the given sites. Any
+        Site instances given are refreshed with their new level so they will
+        not write back a stale level if they are saved later.
+
+        :param sites: An iterable of Sites or site primary keys
+        """
+        from slm.models import Site
+        sites = [site for site in sites if site is not None]
+        if sites:
+            Site.objects.filter(
+                pk__in=[getattr(site, 'pk', site) for site in sites]
+            ).update(
+                max_alert_level=Subquery(
+                    self.model.objects.filter(
+                        site=OuterRef('pk')
+                    ).order_by('-level').values('level')[:1]
+                )
+            )
+            for site in sites:
+                if isinstance(site, Site):
+                    site.refresh_from_db(fields=['max_alert_level'])
+
+
+class AlertAudience(models.Model):
+    """
+    A flattened index of who each alert is visible to. Each alert has a row
+    for each of its targets (site, agency or user) or a single broadcast row
+    if it is untargeted. The alert's level is copied onto its rows so
+    visibility and alert badge queries only read this table. Rows are
+    rebuilt whenever an alert is saved.
+    """
+
+    alert = models.ForeignKey(
+        Alert,
+        on_delete=models.CASCADE,
+        related_name='audience'
+    )
+
+    level = EnumField(AlertLevel, null=False, blank=False)
+
+    broadcast = models.BooleanField(default=False, blank=True)
+
+    site = models.ForeignKey(
+        'slm.Site',
+        null=True,
+        default=None,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name='alert_audience'
+    )
+
+    agency = models.ForeignKey(
+        'slm.Agency',
+        null=True,
+        default=None,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name='alert_audience'
+    )
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        default=None,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name='alert_audience'
+    )
+
+    objects = AlertAudienceQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['site', 'level']),
+            models.Index(fields=['agency', 'level']),
+            models.Index(fields=['user', 'level']),
+            models.Index(fields=['broadcast', 'level'])
+        ]
+
+
 class SiteAlert(Alert):
 
     DEFAULT_PRIORITY = 2
@@ -729,11 +878,14 @@ class GeodesyMLInvalidQuerySet(AlertQuerySet):
             log - otherwise check the HEAD version, which may contain updates
         :return: The number of alerts issued.
         """
+        from slm.models import Site
         alerts = 0
-        for site in self:
-            if GeodesyMLInvalidManager.objects.check_site(
-                site, published=published
-            ):
+        for site in Site.objects.filter(
+            pk__in=self.values('site')
+        ).select_related('geodesymlinvalid').with_snapshot(
+            published=published or None
+        ):
+            if self.model.objects.check_site(site, published=published):
                 alerts += 1
         return alerts
 
@@ -15,11 +15,22 @@ a read-only index.
 
 Extensions... todo
 """
+from datetime import timedelta
+from math import asin, asinh, cos, degrees, pi, radians, sin, tan
+
+from django.conf import settings
 from django.core.files.base import ContentFile
-from django.db import models
+from django.db import models, transaction
 from django.db.models import F, OuterRef, Q, Subquery, Value
 from django.db.models.functions import (
+    ASin,
+    Cos,
+    Least,
     Now,
+    Power,
+    Radians,
+    Sin,
+    Sqrt,
     Cast,
     LPad,
     Concat,
@@ -29,9 +40,11 @@ from django.db.models.functions import (
     Lower,
     ExtractDay
 )
+from django.utils.http import quote_etag
 from django.utils.timezone import now
 from django_enum import EnumField
 from slm.defines import (
+    ArchiveJobState,
     FrequencyStandardType,
     ISOCountry,
     RinexVersion,
@@ -49,6 +62,161 @@ from slm.models.system import (
 )
 
 
+def _installed(subsections, start_field, end_field):
+    """
+    Of a list of preloaded subsections, return the one with the latest start
+    that has not ended, or None if all have ended.
+    """
+    return max(
+        (
+            sub for sub in subsections
+            if getattr(sub, end_field) is None
+        ),
+        key=lambda sub: (
+            getattr(sub, start_field) is not None,
+            getattr(sub, start_field)
+        ),
+        default=None
+    )
+
+
+# terms never contain line breaks so searches can not match across fields
+SEARCH_SEPARATOR = '\n'
+
+
+def _choice_terms(enum, value):
+    """
+    The searchable terms of a choice field value - its value and its label.
+    """
+    if not value:
+        return []
+    try:
+        value = enum(value)
+    except ValueError:
+        return [value]
+    return [value.value, value.label]
+
+
+def search_document(index):
+    """
+    Build the search document for an index - the lowercase text of all of its
+    searchable fields, one per line. Related objects should be preloaded.
+
+    :param index: The SiteIndex to build the document for
+    :return: The search document string
+    """
+    site = index.site
+    terms = [
+        site.name,
+        *(
+            term for agency in site.agencies.all()
+            for term in (agency.shortname, agency.name)
+        ),
+        *(network.name for network in site.networks.all()),
+        index.city,
+        *_choice_terms(ISOCountry, index.country),
+        index.antenna.model if index.antenna else None,
+        index.radome.model if index.radome else None,
+        index.receiver.model if index.receiver else None,
+        index.serial_number,
+        index.firmware,
+        *_choice_terms(FrequencyStandardType, index.frequency_standard),
+        index.domes_number,
+        *(system.name for system in index.satellite_system.all()),
+        index.data_center
+    ]
+    return SEARCH_SEPARATOR.join(
+        dict.fromkeys(
+            str(term).strip().lower() for term in terms
+            if term and str(term).strip()
+        )
+    )
+
+
+# the zoom level of the quadkeys stored on indexes - at zoom 20 web mercator
+# tiles are ~40m across at the equator
+GRID_ZOOM = 20
+
+# web mercator is undefined at the poles
+MAX_LATITUDE = 85.0511287798
+
+# the mean radius of the earth in kilometers
+EARTH_RADIUS = 6371.0088
+
+
+def tile_coordinates(latitude, longitude, zoom=GRID_ZOOM):
+    """
+    Get the x/y coordinates of the web mercator (slippy map) tile at the
+    given zoom level that contains the given location.
+
+    :param latitude: The latitude in degrees
+    :param longitude: The longitude in degrees
+    :param zoom: The zoom level of the tile
+    :return: A 2-tuple of the x and y tile coordinates
+    """
+    tiles = 1 << zoom
+    latitude = max(-MAX_LATITUDE, min(MAX_LATITUDE, latitude))
+    x = int((longitude + 180) / 360 * tiles)
+    y = int((1 - asinh(tan(radians(latitude))) / pi) / 2 * tiles)
+    return min(max(x, 0), tiles - 1), min(max(y, 0), tiles - 1)
+
+
+def quadkey(zoom, x, y):
+    """
+    Get the quadkey of a web mercator tile. Quadkeys of the tiles within a
+    tile start with the quadkey of that tile, so a prefix search on quadkeys
+    is a spatial search.
+
+    :param zoom: The zoom level of the tile
+    :param x: The x coordinate of the tile
+    :param y: The y coordinate of the tile
+    :return: The quadkey string, its length is the zoom level
+    """
+    return ''.join(
+        str(((x >> bit) & 1) | (((y >> bit) & 1) << 1))
+        for bit in reversed(range(zoom))
+    )
+
+
+def covering_quadkeys(
+    min_latitude,
+    min_longitude,
+    max_latitude,
+    max_longitude,
+    max_tiles=16
+):
+    """
+    Get the quadkeys of the tiles at the deepest zoom level where no more
+    than max_tiles tiles cover the given bounding box. The box must not cross
+    the antimeridian.
+
+    :return: A list of quadkeys
+    """
+    def cover(zoom):
+        x_min, y_min = tile_coordinates(max_latitude, min_longitude, zoom)
+        x_max, y_max = tile_coordinates(min_latitude, max_longitude, zoom)
+        return range(x_min, x_max + 1), range(y_min, y_max + 1)
+
+    zoom = 0
+    while zoom < GRID_ZOOM:
+        xs, ys = cover(zoom + 1)
+        if len(xs) * len(ys) > max_tiles:
+            break
+        zoom += 1
+    xs, ys = cover(zoom)
+    return [quadkey(zoom, x, y) for x in xs for y in ys]
+
+
+def location_quadkey(latitude, longitude):
+    """
+    Get the GRID_ZOOM quadkey of a location or an empty string if the
+    location is not known.
+    """
+    if latitude is None or longitude is None:
+        return ''
+    return quadkey(GRID_ZOOM, *tile_coordinates(latitude, longitude))
+
+
 class SiteIndexManager(models.Manager):
 
     def add_index(self, site):
@@ -58,20 +226,34 @@ class SiteIndexManager(models.Manager):
 
         self.close_index(site)
 
-        location = site.sitelocation_set.current(published=True)
-        identification = site.siteidentification_set.current(published=True)
-        antenna = site.siteantenna_set.current(published=True).filter(
-            removed__isnull=True
-        ).order_by('-installed').first()
-        receiver = site.sitereceiver_set.current(published=True).filter(
-            removed__isnull=True
-        ).order_by('-installed').first()
-        frequency = site.sitefrequencystandard_set.current(
-            published=True
-        ).filter(
-            effective_end__isnull=True
-        ).order_by('-effective_start').first()
-        more_info = site.sitemoreinformation_set.current(published=True)
+        if site.has_snapshot(published=True):
+            location = site.sitelocation
+            identification = site.siteidentification
+            antenna = _installed(site.siteantenna, 'installed', 'removed')
+            receiver = _installed(site.sitereceiver, 'installed', 'removed')
+            frequency = _installed(
+                site.sitefrequencystandard,
+                'effective_start',
+                'effective_end'
+            )
+            more_info = site.sitemoreinformation
+        else:
+            location = site.sitelocation_set.current(published=True)
+            identification = site.siteidentification_set.current(
+                published=True
+            )
+            antenna = site.siteantenna_set.current(published=True).filter(
+                removed__isnull=True
+            ).order_by('-installed').first()
+            receiver = site.sitereceiver_set.current(published=True).filter(
+                removed__isnull=True
+            ).order_by('-installed').first()
+            frequency = site.sitefrequencystandard_set.current(
+                published=True
+            ).filter(
+                effective_end__isnull=True
+            ).order_by('-effective_start').first()
+            more_info = site.sitemoreinformation_set.current(published=True)
 
         new_index = self.create(
             site=site,
@@ -89,20 +271,40 @@ class SiteIndexManager(models.Manager):
             firmware=receiver.firmware if receiver else '',
             frequency_standard=frequency.standard_type if frequency else None,
             domes_number=(
-                identification.iers_domes_number if identification else None
+                identification.iers_domes_number if identification else ''
             ),
-            data_center=more_info.primary
+            data_center=more_info.primary if more_info else ''
         )
         if receiver:
             new_index.satellite_system.set(receiver.satellite_system.all())
 
-        for log_format in SiteLogFormat:
-            if log_format in {SiteLogFormat.JSON}:
-                continue  # todo - remove
-            ArchivedSiteLog.objects.from_site(site=site, log_format=log_format)
+        self.filter(pk=new_index.pk).update_search()
+        self.archive_index(new_index)
 
         return new_index
 
+    def archive_index(self, index):
+        """
+        Generate the archived site logs for the given index. If
+        SLM_DEFER_ARCHIVES is set, rendering is deferred to the archive_worker
+        command by queueing an ArchiveJob for each format, otherwise the logs
+        are rendered immediately.
+
+        :param index: The SiteIndex to archive
+        """
+        formats = [
+            log_format for log_format in SiteLogFormat
+            if log_format not in {SiteLogFormat.JSON}  # todo - remove
+        ]
+        if getattr(settings, 'SLM_DEFER_ARCHIVES', False):
+            ArchiveJob.objects.enqueue(index, formats)
+        else:
+            for log_format in formats:
+                ArchivedSiteLog.objects.from_index(
+                    index=index,
+                    log_format=log_format
+                )
+
     def close_index(self, site):
         last = self.filter(site=site).filter(
             Q(begin__lte=site.last_publish) &
@@ -131,6 +333,63 @@ class SiteIndexManager(models.Manager):
             prev_index.save()
         return self.create(begin=begin, **kwargs)
 
+    def bulk_insert(self, indexes, batch_size=None):
+        """
+        Insert many new indexes into existing index decks. This is the bulk
+        equivalent of insert_index - the end of each new index and of any
+        index that directly precedes a new index is resolved from the combined
+        deck. Indexes that have the same site and begin as an existing index
+        are ignored.
+
+        :param indexes: An iterable of unsaved SiteIndex instances
+        :param batch_size: The batch size to use for the inserts and updates
+        :return: The list of created indexes
+        """
+        indexes = list(indexes)
+        decks = {}
+        for index in self.get_queryset().filter(
+            site__in={index.site_id for index in indexes}
+        ).only('pk', 'site', 'begin', 'end'):
+            decks.setdefault(index.site_id, {})[index.begin] = index
+
+        created = []
+        for index in indexes:
+            deck = decks.setdefault(index.site_id, {})
+            if index.begin not in deck:
+                index.quadkey = location_quadkey(
+                    index.latitude,
+                    index.longitude
+                )
+                deck[index.begin] = index
+                created.append(index)
+
+        updated = []
+        for deck in decks.values():
+            ordered = [deck[begin] for begin in sorted(deck)]
+            for index, next_index in zip(ordered, [*ordered[1:], None]):
+                if index.pk is None:
+                    index.end = next_index.begin if next_index else None
+                elif next_index is not None and next_index.pk is None:
+                    index.end = next_index.begin
+                    updated.append(index)
+
+        # ends must be moved before the new indexes that take them are created
+        self.bulk_update(updated, ['end'], batch_size=batch_size)
+        self.bulk_create(created, batch_size=batch_size)
+        if created and created[0].pk is None:
+            # not all backends return primary keys from bulk inserts
+            pks = {
+                (site, begin): pk
+                for pk, site, begin in self.get_queryset().filter(
+                    site__in=decks.keys(),
+                    begin__in={index.begin for index in created}
+                ).values_list('pk', 'site', 'begin')
+            }
+            for index in created:
+                index.pk = pks[(index.site_id, index.begin)]
+                index._state.adding = False
+        return created
+
 
 class SiteIndexQuerySet(models.QuerySet):
 
@@ -144,6 +403,122 @@ class SiteIndexQuerySet(models.QuerySet):
     def public(self):
         return self.filter(site__agencies__public=True)
 
+    def within_bbox(
+        self,
+        min_latitude,
+        min_longitude,
+        max_latitude,
+        max_longitude
+    ):
+        """
+        Filter to indexes located within the given bounding box. If
+        min_longitude is greater than max_longitude the box crosses the
+        antimeridian. Candidates are found by the quadkeys of the tiles that
+        cover the box and refined by their coordinates.
+
+        :return: A queryset filtered to indexes within the box
+        """
+        if min_longitude <= max_longitude:
+            boxes = [(min_longitude, max_longitude)]
+        else:
+            boxes = [(min_longitude, 180), (-180, max_longitude)]
+
+        q_filter = Q()
+        for min_lng, max_lng in boxes:
+            tiles = Q()
+            for key in covering_quadkeys(
+                min_latitude,
+                min_lng,
+                max_latitude,
+                max_lng
+            ):
+                tiles |= Q(quadkey__startswith=key)
+            q_filter |= tiles & Q(
+                latitude__gte=min_latitude,
+                latitude__lte=max_latitude,
+                longitude__gte=min_lng,
+                longitude__lte=max_lng
+            )
+        return self.filter(q_filter)
+
+    def within_radius(self, latitude, longitude, radius):
+        """
+        Filter to indexes located within the given great circle distance of
+        a point. Candidates are found with within_bbox and refined by their
+        haversine distance, which is annotated as distance.
+
+        :param latitude: The latitude of the point in degrees
+        :param longitude: The longitude of the point in degrees
+        :param radius: The distance in kilometers
+        :return: A queryset filtered to indexes within the radius
+        """
+        angle = radius / EARTH_RADIUS
+        min_lat = latitude - degrees(angle)
+        max_lat = latitude + degrees(angle)
+        if min_lat <= -90 or max_lat >= 90 or angle >= pi / 2:
+            # the circle contains a pole
+            min_lng, max_lng = -180, 180
+        else:
+            delta = degrees(asin(sin(angle) / cos(radians(latitude))))
+            min_lng = (longitude - delta + 180) % 360 - 180
+            max_lng = (longitude + delta + 180) % 360 - 180
+
+        lat = radians(latitude)
+        haversine = (
+            Power(Sin((Radians('latitude') - lat) / 2), 2) +
+            cos(lat) * Cos(Radians('latitude')) *
+            Power(Sin((Radians('longitude') - radians(longitude)) / 2), 2)
+        )
+        return self.within_bbox(
+            max(min_lat, -90),
+            min_lng,
+            min(max_lat, 90),
+            max_lng
+        ).annotate(
+            distance=2 * EARTH_RADIUS * ASin(Sqrt(Least(haversine, 1.0)))
+        ).filter(distance__lte=radius)
+
+    def search(self, value):
+        """
+        Filter to indexes with a searchable field that contains the given
+        value (case insensitive). On PostgreSQL this lookup is served by a
+        trigram index on the search document.
+
+        :param value: The string to search for
+        :return: A queryset filtered to the matching indexes
+        """
+        return self.filter(search__contains=value.strip().lower())
+
+    def update_search(self, batch_size=500):
+        """
+        Rebuild the search documents of the indexes in this queryset. This
+        must be run whenever a searchable field of an index, or of the
+        site, agencies or networks it belongs to changes.
+
+        :param batch_size: The number of indexes to update in each query
+        :return: The number of indexes updated
+        """
+        indexes = list(
+            self.select_related(
+                'site',
+                'antenna',
+                'radome',
+                'receiver'
+            ).prefetch_related(
+                'site__agencies',
+                'site__networks',
+                'satellite_system'
+            )
+        )
+        for index in indexes:
+            index.search = search_document(index)
+        self.model.objects.bulk_update(
+            indexes,
+            ['search'],
+            batch_size=batch_size
+        )
+        return len(indexes)
+
     def availability(self):
         last_data_avail = DataAvailability.objects.filter(
             site=OuterRef('pk')
@@ -285,8 +660,23 @@ class SiteIndex(models.Model):
         default=''
     )
 
+    # denormalized text of all searchable fields, see search_document
+    search = models.TextField(default='', blank=True)
+
+    # the quadkey of the GRID_ZOOM map tile the location is in
+    quadkey = models.CharField(
+        db_index=True,
+        max_length=GRID_ZOOM,
+        blank=True,
+        default=''
+    )
+
     objects = SiteIndexManager.from_queryset(SiteIndexQuerySet)()
 
+    def save(self, *args, **kwargs):
+        self.quadkey = location_quadkey(self.latitude, self.longitude)
+        return super().save(*args, **kwargs)
+
     class Meta:
         ordering = ('-begin',)
         index_together = (('begin', 'end'), ('site', 'begin', 'end'),)
@@ -402,5 +792,156 @@ class ArchivedSiteLog(SiteFile):
 
     objects = ArchivedSiteLogManager.from_queryset(ArchivedSiteLogQuerySet)()
 
+    @property
+    def etag(self):
+        """
+        A strong ETag for the archived file. An index's archives are not
+        re-rendered once created so the index, its begin time, the format and
+        the size identify the content.
+        """
+        return quote_etag(
+            f'{self.index_id}-{self.index.begin.timestamp():.0f}-'
+            f'{getattr(self.log_format, "value", self.log_format)}-'
+            f'{self.size}'
+        )
+
+    class Meta:
+        unique_together = ('index', 'log_format')
+
+
+class ArchiveJobManager(models.Manager):
+
+    def enqueue(self, index, log_formats):
+        """
+        Queue archive generation jobs for the given index. The jobs are rows
+        in the current transaction so workers will only see them once the
+        transaction that created the index commits.
+
+        :param index: The SiteIndex to generate archives for
+        :param log_formats: An iterable of SiteLogFormats to generate
+        """
+        return self.bulk_create(
+            [
+                self.model(index=index, log_format=log_format)
+                for log_format in log_formats
+            ],
+            ignore_conflicts=True
+        )
+
+    def claim(self, batch_size):
+        """
+        Claim up to batch_size pending jobs for processing. Jobs that have
+        been running for longer than SLM_ARCHIVE_JOB_TIMEOUT seconds are
+        assumed to belong to a worker that died and are claimed again. Where
+        the database supports it, rows locked by other workers are skipped so
+        multiple workers may safely run concurrently.
+
+        :param batch_size: The maximum number of jobs to claim
+        :return: A list of the claimed job primary keys
+        """
+        with transaction.atomic(using=self.db):
+            pending = self.get_queryset().claimable().order_by(
+                'created',
+                'pk'
+            )
+            features = transaction.get_connection(self.db).features
+            if features.has_select_for_update:
+                pending = pending.select_for_update(
+                    skip_locked=features.has_select_for_update_skip_locked
+                )
+            claimed = list(pending.values_list('pk', flat=True)[:batch_size])
+            self.get_queryset().filter(pk__in=claimed).update(
+                state=ArchiveJobState.RUNNING,
+                started=now(),
+                attempts=F('attempts') + 1
+            )
+        return claimed
+
+
+class ArchiveJobQuerySet(models.QuerySet):
+
+    def pending(self):
+        return self.filter(state=ArchiveJobState.PENDING)
+
+    def stale(self, timeout=None):
+        """
+        Get the jobs that have been running for longer than the timeout.
+
+        :param timeout: Seconds, default: SLM_ARCHIVE_JOB_TIMEOUT
+        """
+        if timeout is None:
+            timeout = getattr(settings, 'SLM_ARCHIVE_JOB_TIMEOUT', 3600)
+        return self.filter(
+            state=ArchiveJobState.RUNNING,
+            started__lt=now() - timedelta(seconds=timeout)
+        )
+
+    def claimable(self, timeout=None):
+        """
+        Get the jobs that are pending or stale.
+
+        :param timeout: Seconds, default: SLM_ARCHIVE_JOB_TIMEOUT
+        """
+        return self.pending() | self.stale(timeout=timeout)
+
+    def failed(self):
+        return self.filter(state=ArchiveJobState.FAILED)
+
+
+class ArchiveJob(models.Model):
+    """
+    A deferred request to render and archive a site log format for a
+    SiteIndex. Jobs are processed by the archive_worker command.
+    """
+
+    index = models.ForeignKey(
+        SiteIndex,
+        on_delete=models.CASCADE,
+        related_name='archive_jobs'
+    )
+
+    log_format = EnumField(SiteLogFormat, null=False, blank=False)
+
+    state = EnumField(
+        ArchiveJobState,
+        null=False,
+        blank=False,
+        default=ArchiveJobState.PENDING,
+        db_index=True
+    )
+
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+    started = models.DateTimeField(null=True, blank=True, default=None)
+    finished = models.DateTimeField(null=True, blank=True, default=None)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True, default='')
+
+    objects = ArchiveJobManager.from_queryset(ArchiveJobQuerySet)()
+
+    def run(self):
+        """
+        Render and archive this job's site log format. The job's state is
+        updated to reflect the outcome.
+
+        :return: True if the archive was generated, False otherwise
+        """
+        try:
+            ArchivedSiteLog.objects.from_index(
+                index=self.index,
+                log_format=self.log_format
+            )
+            self.state = ArchiveJobState.DONE
+            self.error = ''
+        except Exception as err:
+            self.state = ArchiveJobState.FAILED
+            self.error = f'{err.__class__.__name__}: {err}'
+        self.finished = now()
+        self.save(update_fields=['state', 'error', 'finished'])
+        return self.state == ArchiveJobState.DONE
+
+    def __str__(self):
+        return f'{self.index.site.name} ({self.log_format}): {self.state}'
+
     class Meta:
+        ordering = ('created',)
         unique_together = ('index', 'log_format')
@@ -3,12 +3,14 @@ import json
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import connections, models
 from django.db.models import (
     Case,
     F,
     Max,
+    Min,
     Q,
+    Sum,
     Value,
     When,
     OuterRef,
@@ -16,7 +18,9 @@ from django.db.models import (
     ExpressionWrapper,
 )
 from django.contrib.auth.models import Permission
+from django.contrib.contenttypes.models import ContentType
 from enum import Enum
+from django.db.models.query import ModelIterable, prefetch_related_objects
 from django.db.models.functions import (
     Cast,
     Concat,
@@ -31,6 +35,7 @@ from django.db.models.functions import (
 from django.utils.functional import cached_property
 from django_enum import EnumField
 from slm.defines import (
+    AlertLevel,
     SiteLogFormat,
     AntennaReferencePoint,
     Aspiration,
@@ -42,7 +47,7 @@ from slm.defines import (
     TectonicPlates,
 )
 from slm.models import compat
-from slm.utils import date_to_str
+from slm.utils import date_to_str, permission_cache
 from django.core.validators import RegexValidator
 from django.core.exceptions import ValidationError
 from django.utils.timezone import now
@@ -51,9 +56,8 @@ from slm import signals as slm_signals
 from slm.validators import (
     SLMValidator,
     NULL_TIME,
-    get_validators
+    get_validation_plan
 )
-from functools import lru_cache
 from django.utils.functional import classproperty
 
 
@@ -87,6 +91,86 @@ class SiteManager(models.Manager):
 
 class SiteQuerySet(models.QuerySet):
 
+    snapshot_ = None
+
+    def _clone(self):
+        clone = super()._clone()
+        clone.snapshot_ = self.snapshot_
+        return clone
+
+    def _fetch_all(self):
+        load_snapshot = (
+            self._result_cache is None and
+            self.snapshot_ is not None and
+            issubclass(self._iterable_class, ModelIterable)
+        )
+        super()._fetch_all()
+        if load_snapshot:
+            self.load_snapshot(self._result_cache, **self.snapshot_)
+
+    def with_snapshot(self, epoch=None, published=None):
+        """
+        Load the current state of every site log section for all sites in
+        this queryset when it is evaluated. This is equivalent to calling
+        Site.current() on each site, but issues a fixed number of queries (one
+        per section model) instead of a number of queries per site.
+
+        :param epoch: If given, load the sections as they were at this point
+            in time.
+        :param published: If True, load only the published sections, if None
+            (default) load HEAD.
+        :return: A queryset that will attach section instances to each site.
+        """
+        clone = self._chain()
+        clone.snapshot_ = {'epoch': epoch, 'published': published}
+        return clone
+
+    @staticmethod
+    def load_snapshot(sites, epoch=None, published=None):
+        """
+        Attach the current state of every site log section to each of the
+        given sites. Sections are set as attributes named by
+        Site.section_fields() and subsections as lists ordered by subsection
+        named by Site.subsection_fields() - the same as Site.current().
+
+        :param sites: An iterable of Site instances.
+        :param epoch: If given, load the sections as they were at this point
+            in time.
+        :param published: If True, load only the published sections, if None
+            (default) load HEAD.
+        :return: The given sites.
+        """
+        sites = {site.pk: site for site in sites}
+        if not sites:
+            return []
+
+        for field in [*Site.section_fields(), *Site.subsection_fields()]:
+            model = Site._meta.get_field(field).related_model
+            is_subsection = field in Site.subsection_fields()
+            for site in sites.values():
+                setattr(site, field, [] if is_subsection else None)
+            for section in model.objects.filter(
+                site__in=sites.keys()
+            ).snapshot(
+                epoch=epoch,
+                published=published
+            ).select_related(*[
+                fld.name for fld in model._meta.fields
+                if fld.many_to_one and fld.name not in {'site', 'editor'}
+            ]).prefetch_related(*[
+                fld.name for fld in model._meta.many_to_many
+            ]).order_by(*(['subsection'] if is_subsection else [])):
+                site = sites[section.site_id]
+                section.site = site
+                if is_subsection:
+                    getattr(site, field).append(section)
+                else:
+                    setattr(site, field, section)
+
+        for site in sites.values():
+            site.snapshot_ = (epoch, published)
+        return list(sites.values())
+
     def annotate_files(self, log_format=SiteLogFormat.LEGACY, prefix=None):
         from slm.models import ArchivedSiteLog
         latest_archive = ArchivedSiteLog.objects.filter(
@@ -182,23 +266,18 @@ class SiteQuerySet(models.QuerySet):
         if user.is_authenticated:
             if user.is_superuser:
                 return self
-            return self.filter(agencies__in=user.agencies.all())
+            return self.filter(pk__in=permission_cache.editable_sites(user))
         return self.none()
 
     def moderated(self, user):
         if user.is_authenticated:
             if user.is_superuser:
                 return self.all()
-            elif user.is_moderator():
-                return self.filter(agencies__in=user.agencies.all()).distinct()
+            return self.filter(pk__in=permission_cache.moderated_sites(user))
         return self.none()
 
     def annotate_max_alert(self):
-        from slm.models import Alert
-        max_alert = Alert.objects.for_site(OuterRef('pk')).order_by('-level')
-        return self.annotate(
-            _max_alert=Subquery(max_alert.values('level')[:1])
-        )
+        return self.annotate(_max_alert=F('max_alert_level'))
 
 
 class Site(models.Model):
@@ -254,6 +333,19 @@ class Site(models.Model):
         db_index=True
     )
 
+    max_alert_level = EnumField(
+        AlertLevel,
+        null=True,
+        default=None,
+        blank=True,
+        editable=False,
+        help_text=_(
+            'The level of the most severe alert for this site. This is '
+            'maintained by the alert audience index.'
+        ),
+        db_index=True
+    )
+
     # todo deprecated
     preferred = models.IntegerField(default=0, blank=True)
     modified_user = models.IntegerField(default=0, blank=True)
@@ -295,11 +387,15 @@ class Site(models.Model):
 
     last_recalc = models.DateTimeField(null=True, blank=True, default=None)
 
-    @lru_cache(maxsize=32)
+    # the (epoch, published) key of sections preloaded by with_snapshot()
+    snapshot_ = None
+
     def is_moderator(self, user):
+        if not user or not user.is_authenticated:
+            return False
         if user.is_superuser:
             return True
-        return self.moderators.filter(pk=user.pk).exists()
+        return self.pk in permission_cache.moderated_sites(user)
 
     def get_filename(
         self,
@@ -334,18 +430,27 @@ class Site(models.Model):
     def max_alert(self):
         if hasattr(self, '_max_alert'):
             return self._max_alert
-        from slm.models import Alert
-        return getattr(
-            Alert.objects.for_site(self).order_by('-level').first(),
-            'level',
-            None
-        )
+        return self.max_alert_level
 
     def refresh_from_db(self, **kwargs):
         if hasattr(self, '_max_alert'):
             del self._max_alert
+        if kwargs.get('fields', None) is None:
+            self.snapshot_ = None
         return super().refresh_from_db(**kwargs)
 
+    def has_snapshot(self, epoch=None, published=None):
+        """
+        Returns true if the site log sections for the given epoch and publish
+        state have been preloaded onto this instance by
+        SiteQuerySet.with_snapshot().
+
+        :param epoch: The epoch of the snapshot
+        :param published: The published state of the snapshot
+        :return: True if section attributes may be used as-is
+        """
+        return self.snapshot_ == (epoch, published)
+
     @classproperty
     def alert_fields(cls):
         from slm.models import Alert
@@ -479,28 +584,36 @@ class Site(models.Model):
 
     def can_edit(self, user):
         if user and user.is_authenticated:
-            if self.is_moderator(user) or self.owner == user:
+            if user.is_superuser or self.owner_id == user.pk:
                 return True
-            return user.agencies.filter(pk__in=self.agencies.all()).count() > 0
+            return self.pk in permission_cache.editable_sites(user)
         return False
 
-    def update_status(self, save=True, head=True, user=None, timestamp=None):
+    def update_status(
+        self,
+        save=True,
+        head=True,
+        user=None,
+        timestamp=None,
+        section=None
+    ):
         """
         Update the denormalized data that is too expensive to query on the
         fly. This includes flag count, moderation status and DateTimes.
 
+        The flag counts and statuses of the individual sections are kept in
+        SiteSectionStatus rows. If the section that changed is given only its
+        row is recomputed, otherwise all rows are rebuilt.
+
         :param save:
         :param head: False if status update should be done on the most recent
             published version of the site log.
         :param user: The user responsible for a status update check
         :param timestamp: The time at which the status update is triggered
+        :param section: The section or subsection instance that changed, if
+            only one did.
         :return:
         """
-        if head:
-            self.head()
-        else:
-            self.current()
-
         if not timestamp:
             timestamp = now()
 
@@ -509,25 +622,24 @@ class Site(models.Model):
         if user:
             self.last_user = user
 
-        self.num_flags = 0
-        status = SiteLogStatus.PUBLISHED
-        for section in self.section_fields():
-            section_inst = getattr(self, section, None)
-            if section_inst:
-                self.num_flags += len(getattr(section_inst, '_flags') or {})
-                status = status.merge(
-                    getattr(
-                        section_inst,
-                        'mod_status',
-                        SiteLogStatus.PUBLISHED
-                    )
+        if not head:
+            # section statuses are only kept for HEAD
+            self.num_flags, status = 0, SiteLogStatus.PUBLISHED
+            for row in self.status_snapshot(published=True):
+                contribution = SiteSectionStatus.objects.contribution(
+                    row['published'],
+                    row['is_deleted'],
+                    row['_flags']
                 )
-        for subsections in self.subsection_fields():
-            for subsection in getattr(self, subsections):
-                if subsection.published and subsection.is_deleted:
-                    continue
-                self.num_flags += len(subsection._flags or {})
-                status = status.merge(subsection.mod_status)
+                if contribution:
+                    self.num_flags += contribution[0]
+                    status = status.merge(contribution[1])
+        else:
+            if section is None:
+                SiteSectionStatus.objects.rebuild(self)
+            else:
+                SiteSectionStatus.objects.refresh(section)
+            self.num_flags, status = self.section_statuses.totals()
 
         # if in either of these two states - status update must come from
         # a global publish of the site log, not from this which can be
@@ -547,7 +659,15 @@ class Site(models.Model):
                 self.review_request.delete()
 
         if save:
-            self.save()
+            # only write the fields updated here - this instance may have been
+            # loaded before other columns (e.g. max_alert_level) changed
+            self.save(update_fields=[
+                'last_update',
+                'last_user',
+                'last_publish',
+                'num_flags',
+                'status'
+            ])
 
     def published(self, epoch=None):
         return self.current(epoch=epoch, published=True)
@@ -574,6 +694,59 @@ class Site(models.Model):
                     published=published
                 )
             )
+        self.snapshot_ = (epoch, published)
+
+    def status_snapshot(self, epoch=None, published=None):
+        """
+        Fetch the status information of every current section and subsection
+        of this site log in a single query. Only the columns needed to derive
+        flag counts and moderation statuses are selected - no section
+        instances are built.
+
+        :param epoch: If given, the rows that were current at this time.
+        :param published: True for published rows, False for unpublished
+            rows, None (default) for HEAD.
+        :return: A list of dictionaries with the keys: section (the section
+            model class), subsection (None for sections), published,
+            is_deleted (False for sections) and _flags.
+        """
+        parts = [
+            getattr(self, f'{section}_set').snapshot(
+                epoch=epoch,
+                published=published
+            ).annotate(
+                _section=Value(section, output_field=models.CharField()),
+                _subsection=Value(None, output_field=models.IntegerField()),
+                _deleted=Value(False, output_field=models.BooleanField())
+            ) for section in self.section_fields()
+        ] + [
+            getattr(self, f'{subsection}_set').snapshot(
+                epoch=epoch,
+                published=published
+            ).annotate(
+                _section=Value(subsection, output_field=models.CharField()),
+                _subsection=F('subsection'),
+                _deleted=F('is_deleted')
+            ) for subsection in self.subsection_fields()
+        ]
+        parts = [
+            part.order_by().values(
+                'published',
+                '_flags',
+                '_section',
+                '_subsection',
+                '_deleted'
+            ) for part in parts
+        ]
+        return [
+            {
+                'section': self._meta.get_field(row['_section']).related_model,
+                'subsection': row['_subsection'],
+                'published': row['published'],
+                'is_deleted': bool(row['_deleted']),
+                '_flags': row['_flags']
+            } for row in parts[0].union(*parts[1:], all=True)
+        ]
 
     @property
     def fourid(self):
@@ -619,6 +792,9 @@ class Site(models.Model):
                     )
                 )
 
+        if sections_published:
+            SiteSectionStatus.objects.rebuild(self)
+
         # this might be an initial PUBLISH when we're in PROPOSED or FORMER
         if sections_published or self.status != SiteLogStatus.PUBLISHED:
             self.status = SiteLogStatus.PUBLISHED
@@ -643,12 +819,167 @@ class Site(models.Model):
         return self.name
 
 
+class SiteSectionStatusManager(models.Manager):
+    pass
+
+
+class SiteSectionStatusQuerySet(models.QuerySet):
+
+    @staticmethod
+    def contribution(published, is_deleted, flags):
+        """
+        Get the flag count and moderation status a section row contributes to
+        its site log.
+
+        :param published: True if the row is published
+        :param is_deleted: True if the row is a deleted subsection
+        :param flags: The _flags dictionary of the row
+        :return: A 2-tuple of (num_flags, SiteLogStatus) or None if the row
+            does not contribute to the site log status (i.e. it was deleted
+            and that deletion has been published)
+        """
+        if published and is_deleted:
+            return None
+        return (
+            len(flags or {}),
+            SiteLogStatus.PUBLISHED if published else SiteLogStatus.UPDATED
+        )
+
+    def totals(self):
+        """
+        Aggregate the flag counts and statuses of the sections in this
+        queryset.
+
+        :return: A 2-tuple of (num_flags, SiteLogStatus) - the status is
+            PUBLISHED if there are no sections.
+        """
+        totals = self.aggregate(flags=Sum('num_flags'), status=Min('status'))
+        return totals['flags'] or 0, SiteLogStatus.PUBLISHED.merge(
+            SiteLogStatus(totals['status'])
+            if totals['status'] is not None else None
+        )
+
+    def refresh(self, section):
+        """
+        Recompute the status of the section or subsection the given row
+        belongs to from its current HEAD row. The row may have been deleted.
+
+        :param section: A section instance
+        """
+        model = section.__class__
+        subsection = getattr(section, 'subsection', None)
+        head = model.objects.filter(
+            site_id=section.site_id,
+            **(
+                {'subsection': subsection}
+                if issubclass(model, SiteSubSection) else {}
+            )
+        ).order_by('-edited', '-pk').first()
+        status = head and self.contribution(
+            head.published,
+            getattr(head, 'is_deleted', False),
+            head._flags
+        )
+        identity = {
+            'site_id': section.site_id,
+            'section_type': ContentType.objects.get_for_model(model),
+            'subsection': subsection
+        }
+        if status is None:
+            self.filter(**identity).delete()
+        else:
+            self.update_or_create(
+                **identity,
+                defaults={'num_flags': status[0], 'status': status[1]}
+            )
+
+    def rebuild(self, site):
+        """
+        Recompute the statuses of every section of the given site from a
+        single HEAD snapshot query.
+
+        :param site: The Site to rebuild the section statuses of
+        """
+        statuses = []
+        for row in site.status_snapshot():
+            status = self.contribution(
+                row['published'],
+                row['is_deleted'],
+                row['_flags']
+            )
+            if status is not None:
+                statuses.append(
+                    self.model(
+                        site=site,
+                        section_type=ContentType.objects.get_for_model(
+                            row['section']
+                        ),
+                        subsection=row['subsection'],
+                        num_flags=status[0],
+                        status=status[1]
+                    )
+                )
+        self.filter(site=site).delete()
+        self.bulk_create(statuses)
+
+
+class SiteSectionStatus(models.Model):
+    """
+    The flag count and moderation status of the current row of each section
+    and subsection of a site log. Site.update_status() keeps these up to date
+    incrementally so the status of the site log is a cheap aggregate.
+    """
+
+    site = models.ForeignKey(
+        'slm.Site',
+        on_delete=models.CASCADE,
+        related_name='section_statuses'
+    )
+
+    section_type = models.ForeignKey(
+        ContentType,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+
+    subsection = models.PositiveSmallIntegerField(
+        null=True,
+        default=None,
+        blank=True,
+        help_text=_('The subsection identifier, null for sections.')
+    )
+
+    num_flags = models.PositiveSmallIntegerField(default=0, blank=True)
+
+    status = EnumField(SiteLogStatus)
+
+    objects = SiteSectionStatusManager.from_queryset(
+        SiteSectionStatusQuerySet
+    )()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['site', 'section_type', 'subsection'],
+                name='unique_site_subsection_status'
+            ),
+            models.UniqueConstraint(
+                fields=['site', 'section_type'],
+                condition=Q(subsection__isnull=True),
+                name='unique_site_section_status'
+            )
+        ]
+
+
 class SiteSectionManager(models.Manager):
     pass
 
 
 class SiteSectionQueryset(models.QuerySet):
 
+    # the fields that identify a unique section in the edit history
+    partition_fields = ('site',)
+
     def editable_by(self, user):
         if user.is_superuser:
             return self
@@ -665,7 +996,28 @@ class SiteSectionQueryset(models.QuerySet):
     def head(self, epoch=None):
         return self.current(epoch=epoch, published=None)
 
+    @staticmethod
+    def valid_q(epoch=None):
+        """
+        Get a Q object that selects the published rows that were valid at
+        the given epoch using the validity interval of each row.
+
+        :param epoch: The point in time, if None - the rows valid now.
+        :return: A Q object.
+        """
+        if epoch is None:
+            return Q(published=True) & Q(valid_to__isnull=True)
+        return (
+            Q(published=True) &
+            Q(valid_from__lte=epoch) &
+            (Q(valid_to__isnull=True) | Q(valid_to__gt=epoch))
+        )
+
     def current(self, epoch=None, published=None):
+        if published:
+            return self.filter(
+                self.valid_q(epoch)
+            ).order_by('-edited').first()
         pub_q = Q()
         if published is not None:
             pub_q = Q(published=published)
@@ -675,6 +1027,96 @@ class SiteSectionQueryset(models.QuerySet):
             ).first()
         return self.filter(pub_q).order_by('-edited').first()
 
+    def snapshot(self, epoch=None, published=None):
+        """
+        Return the current row of every site log section in this queryset.
+        Unlike current(), this works across any number of sites in a single
+        query.
+
+        :param epoch: If given, return the rows that were current at this
+            point in time.
+        :param published: If True, only consider published rows, if False
+            only consider unpublished rows. The default (None) considers all
+            rows (i.e. HEAD).
+        :return: A queryset of section rows.
+        """
+        if published:
+            return self.filter(self.valid_q(epoch))
+        section_q = Q()
+        if published is not None:
+            section_q &= Q(published=published)
+        if epoch:
+            section_q &= Q(edited__lte=epoch)
+        return self.filter(pk__in=self.latest_ids(section_q))
+
+    def validate(self, clear=False, batch_size=500):
+        """
+        Run the configured validation routines on every row in this queryset.
+        Flags are collected in memory and the rows whose flags changed are
+        written with bulk_update, batch_size rows at a time. Save-blocking
+        errors do not stop validation.
+
+        :param clear: If True, clear the existing flags of each row first.
+        :param batch_size: The number of rows to fetch and write at a time.
+        :return: A dictionary mapping the primary keys of rows that failed
+            save-blocking validation to their errors.
+        """
+        errors = {}
+        changed = []
+        rows = self.select_related(*[
+            field.name for field in self.model._meta.fields
+            if field.many_to_one and field.name != 'editor'
+        ])
+        for row in rows.iterator(chunk_size=batch_size):
+            flags = dict(row._flags or {})
+            if clear:
+                row._flags = {}
+            row_errors = row.run_validators()
+            if row_errors:
+                errors[row.pk] = row_errors
+            if (row._flags or {}) != flags:
+                changed.append(row)
+            if len(changed) >= batch_size:
+                self.model.objects.bulk_update(changed, ['_flags'])
+                changed = []
+        self.model.objects.bulk_update(changed, ['_flags'])
+        return errors
+
+    def latest_ids(self, section_q=None):
+        """
+        Return a query that selects the primary key of the most recent row
+        of each section in this queryset that matches the given filter. The
+        query is resolved entirely in the database, so it may be used as a
+        subquery.
+
+        Backends that support DISTINCT ON (PostgreSQL) select the latest row
+        per section in a single sorted pass. Other backends fall back to a
+        correlated subquery which is served by the (site, edited, ...)
+        indexes.
+
+        :param section_q: A Q object to filter candidate rows by (e.g.
+            publication status and epoch).
+        :return: A values queryset of primary keys.
+        """
+        section_q = section_q or Q()
+        candidates = self.filter(section_q)
+        if connections[self.db].features.can_distinct_on_fields:
+            return candidates.order_by(
+                *self.partition_fields, '-edited', '-pk'
+            ).distinct(*self.partition_fields).values('pk')
+
+        return candidates.filter(
+            pk=Subquery(
+                self.filter(
+                    section_q,
+                    **{
+                        field: OuterRef(field)
+                        for field in self.partition_fields
+                    }
+                ).order_by('-edited', '-pk').values('pk')[:1]
+            )
+        ).values('pk')
+
 
 class SiteLocationManager(SiteSectionManager):
     pass
@@ -712,6 +1154,26 @@ class SiteSection(models.Model):
     edited = models.DateTimeField(auto_now_add=True, db_index=True, null=False)
     published = models.BooleanField(default=False, db_index=True)
 
+    valid_from = models.DateTimeField(
+        null=True,
+        default=None,
+        blank=True,
+        db_index=True,
+        help_text=_(
+            'The time this edit was published. Null for unpublished edits.'
+        )
+    )
+    valid_to = models.DateTimeField(
+        null=True,
+        default=None,
+        blank=True,
+        db_index=True,
+        help_text=_(
+            'The time this edit was superseded by a newer published edit. '
+            'Null for the currently published edit and unpublished edits.'
+        )
+    )
+
     editor = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.SET_NULL,
@@ -754,11 +1216,21 @@ class SiteSection(models.Model):
         if timestamp is None:
             timestamp = now()
 
+        self.history().filter(
+            Q(published=True) & Q(valid_to__isnull=True)
+        ).exclude(pk=self.pk).update(valid_to=timestamp)
+
         self.published = True
+        self.valid_from = timestamp
+        self.valid_to = None
         self.save()
 
         if update_site:
-            self.site.update_status(save=True, timestamp=timestamp)
+            self.site.update_status(
+                save=True,
+                timestamp=timestamp,
+                section=self
+            )
 
         if not silent:
             slm_signals.site_published.send(
@@ -771,6 +1243,22 @@ class SiteSection(models.Model):
             )
         return True
 
+    def save(self, *args, **kwargs):
+        if not self.published:
+            # unpublished edits are not part of the published record - this
+            # also resets the interval when a published row is copied
+            self.valid_from = None
+            self.valid_to = None
+        return super().save(*args, **kwargs)
+
+    def history(self):
+        """
+        Get all edits of this section.
+
+        :return: A queryset containing every row of this site's section.
+        """
+        return self.__class__.objects.filter(site=self.site)
+
     def can_publish(self, user):
         """
         This is a future hook to use for instances where non-moderators are
@@ -784,23 +1272,35 @@ class SiteSection(models.Model):
     def can_edit(self, user):
         return self.site.can_edit(user)
 
-    def clean(self):
+    def run_validators(self):
         """
         Run configured validation routines. Routines are configured in
         the SLM_DATA_VALIDATORS setting. This setting maps model fields to
-        validation logic. We run through those routines here and depending
-        on severity we either add flags or throw an error.
+        validation logic. Flags raised by the routines are set on this
+        instance but are not saved.
 
-        :except ValidationError: If a save-blocking validation error has
-            occurred.
+        :return: A dictionary mapping field names to lists of save-blocking
+            validation errors.
         """
         errors = {}
-        for field in self._meta.fields:
-            for validator in get_validators(self._meta.label, field.name):
+        for field, validators in get_validation_plan(self.__class__):
+            for validator in validators:
                 try:
                     validator(self, field, getattr(self, field.name, None))
                 except ValidationError as val_err:
                     errors[field.name] = val_err.error_list
+        return errors
+
+    def clean(self):
+        """
+        Run configured validation routines and depending on severity either
+        add flags or throw an error. Flags are not saved, it is up to the
+        caller to save this section.
+
+        :except ValidationError: If a save-blocking validation error has
+            occurred.
+        """
+        errors = self.run_validators()
         if errors:
             raise ValidationError(errors)
 
@@ -820,7 +1320,6 @@ class SiteSection(models.Model):
         """
         Get a dictionary representing the diff with the current published HEAD
         """
-        diff = {}
         if getattr(self, 'is_deleted', None):
             return {}
         if isinstance(self, SiteSubSection):
@@ -832,6 +1331,18 @@ class SiteSection(models.Model):
                 site=self.site
             ).published(epoch=epoch)
 
+        return self.diff(published)
+
+    def diff(self, published):
+        """
+        Get a dictionary representing the diff between this section and the
+        given published section.
+
+        :param published: The published section instance or None
+        :return: A dictionary mapping changed fields to their published and
+            head values.
+        """
+        diff = {}
         if published and published.id == self.id:
             return diff
 
@@ -853,6 +1364,45 @@ class SiteSection(models.Model):
                 diff[field] = {'pub': pub, 'head': head}
         return diff
 
+    @classmethod
+    def published_diffs(cls, sections, epoch=None):
+        """
+        Compute published_diff() for many sections of this type at once. The
+        published counterparts of all sections are fetched in one query and
+        related field values are prefetched for both sides.
+
+        :param sections: An iterable of section instances of this type
+        :param epoch: Diff against the sections published at this time
+        :return: A dictionary mapping section primary keys to their diffs
+        """
+        sections = list(sections)
+        if not sections:
+            return {}
+        related = [
+            field for field in cls.site_log_fields()
+            if cls._meta.get_field(field).is_relation
+        ]
+        prefetch_related_objects(sections, *related)
+
+        def partition(section):
+            return section.site_id, getattr(section, 'subsection', None)
+
+        # the latest edit of each published section wins
+        published = {
+            partition(section): section
+            for section in cls.objects.filter(
+                site__in={section.site_id for section in sections}
+            ).snapshot(
+                epoch=epoch,
+                published=True
+            ).order_by('edited', 'pk').prefetch_related(*related)
+        }
+        return {
+            section.pk: {} if getattr(section, 'is_deleted', None) else (
+                section.diff(published.get(partition(section), None))
+            ) for section in sections
+        }
+
     @classmethod
     def section_number(cls):
         raise NotImplementedError(
@@ -874,6 +1424,8 @@ class SiteSection(models.Model):
                 'site',
                 'edited',
                 'published',
+                'valid_from',
+                'valid_to',
                 'error',
                 'subsection',
                 'is_deleted',
@@ -917,6 +1469,7 @@ class SiteSection(models.Model):
             ('edited', 'published'),
             ('site', 'edited'),
             ('site', 'edited', 'published'),
+            ('site', 'valid_from', 'valid_to'),
         ]
 
 
@@ -953,6 +1506,8 @@ class SiteSubSectionManager(SiteSectionManager):
 
 class SiteSubSectionQuerySet(SiteSectionQueryset):
 
+    partition_fields = ('site', 'subsection')
+
     def published(self, subsection=None, epoch=None):
         return self.current(subsection=subsection, epoch=epoch, published=True)
 
@@ -960,30 +1515,16 @@ class SiteSubSectionQuerySet(SiteSectionQueryset):
         return self.current(subsection=subsection, epoch=epoch, published=None)
 
     def current(self, subsection=None, epoch=None, published=None):
-        section_q = Q()
-        if published is not None:
-            section_q &= Q(published=published)
-        if epoch:
-            section_q &= Q(edited__lte=epoch)
         if subsection is None:
-            sections_q = Q()
-            # todo this query could get slow - convert to subquery, though
-            #  mysql might not be able to do this
-            for subsection, edited in {
-                sub[0]: sub[1] for sub in self.filter(
-                    section_q
-                ).order_by('subsection', 'edited').values_list(
-                    'subsection', 'edited'
-                )
-            }.items():
-                sections_q |= (Q(subsection=subsection) & Q(edited=edited))
-            if sections_q:
-                return self.filter(sections_q).order_by('subsection')
-            return self.none()
-        else:
-            section_q &= Q(subsection=subsection)
+            return self.snapshot(
+                epoch=epoch,
+                published=published
+            ).order_by('subsection')
 
-        return self.filter(section_q).order_by('-edited').first()
+        return super(
+            SiteSubSectionQuerySet,
+            self.filter(subsection=subsection)
+        ).current(epoch=epoch, published=published)
 
 
 class SiteSubSection(SiteSection):
@@ -1005,6 +1546,9 @@ class SiteSubSection(SiteSection):
             f'Site subsection models should implement heading().'
         )
 
+    def history(self):
+        return super().history().filter(subsection=self.subsection)
+
     @cached_property
     def subsection_prefix(self):
         idx = f'{self.section_number()}'
@@ -1050,7 +1594,8 @@ class SiteSubSection(SiteSection):
             ('site', 'edited'),
             ('site', 'edited', 'published'),
             ('site', 'edited', 'subsection'),
-            ('site', 'edited', 'published', 'subsection')
+            ('site', 'edited', 'published', 'subsection'),
+            ('site', 'valid_from', 'valid_to', 'subsection')
         ]
 
 
@@ -697,5 +697,7 @@ class LogEntry(PolymorphicModel):
     class Meta:
         indexes = [
             models.Index(fields=["site_log_type", "site_log_id"]),
+            # the public change feed scans publish entries in id order
+            models.Index(fields=["type", "id"]),
         ]
         ordering = ('-timestamp',)
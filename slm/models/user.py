@@ -6,8 +6,7 @@ from django.db import models
 from django.db.models import Q
 from django.utils.translation import gettext as _
 from django.conf import settings
-from django.contrib.auth.models import Permission
-from functools import lru_cache
+from slm.utils import permission_cache
 
 
 class UserManager(DjangoUserManager):
@@ -249,19 +248,12 @@ class User(AbstractBaseUser, PermissionsMixin):
         if not hasattr(self, 'profile') or not self.profile:
             UserProfile.objects.create(user=self)
 
-    @lru_cache(maxsize=32)
     def is_moderator(self, station=None):
         if self.is_superuser:
             return True
         if station:
             return station.is_moderator(self)
-        moderate_perm = Permission.objects.get_by_natural_key(
-            'moderate_sites', 'slm', 'user'
-        )
-        return (
-            self.user_permissions.filter(pk=moderate_perm.pk).exists() or
-            self.groups.filter(permissions__in=[moderate_perm]).exists()
-        )
+        return permission_cache.is_moderator(self)
 
     def can_propose_site(self, agencies=None):
         """
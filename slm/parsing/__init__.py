@@ -1,5 +1,6 @@
 from typing import Dict, Optional, List, Union, Tuple
 from datetime import date, datetime
+from functools import lru_cache
 from slm.models import (
     Antenna,
     Radome,
@@ -12,16 +13,19 @@ from dateutil.parser import parse as parse_date
 SPECIAL_CHARACTERS = '().,-_[]{}<>+%'
 NUMERIC_CHARACTERS = {'.', '+', '-'}
 
+# deletes all special characters and spaces in a single pass
+NORMALIZE_TABLE = str.maketrans('', '', SPECIAL_CHARACTERS + ' \t')
 
+
+@lru_cache(maxsize=4096)
 def normalize(name):
     """
     Normalization is designed to remove any superficial variable name
     mismatches. We remove all special characters and spaces and then
-    upper case the name.
+    upper case the name. The same names recur in every log so results are
+    cached.
     """
-    for char in SPECIAL_CHARACTERS + ' \t':
-        name = name.replace(char, '')
-    return name.upper().strip()
+    return name.translate(NORMALIZE_TABLE).upper().strip()
 
 
 class Finding:
@@ -245,6 +245,10 @@ class SiteLogParser(BaseParser):
         """
         super().__init__(site_log=site_log, site_name=site_name)
 
+        # lines are classified at most once - section header matches are
+        # cached here by line index
+        self._section_matches_ = [False] * len(self.lines)
+
         idx = 0
         while idx < len(self.lines):
             idx = self.visit_line(idx, self.lines[idx].strip())
@@ -293,12 +297,26 @@ class SiteLogParser(BaseParser):
 
             self.graphic = '\n'.join(self.graphic[begin:end])
         
+    def section_match(self, idx):
+        """
+        Match the line at the given index against the section header regex.
+        The match is cached so each line is only ever matched once.
+
+        :param idx: The line index
+        :return: The match or None if the line is not a section header
+        """
+        match = self._section_matches_[idx]
+        if match is False:
+            match = ParsedSection.REGEX.match(self.lines[idx].strip())
+            self._section_matches_[idx] = match
+        return match
+
     def visit_line(self, idx, line):
-        if not line.strip():  # skip empty lines
+        if not line:  # skip empty lines
             #self.add_finding(Ignored(idx, self, 'Empty line', line=line))
             return idx + 1
 
-        match = ParsedSection.REGEX.match(line)  # is this a section header?
+        match = self.section_match(idx)  # is this a section header?
         if match:
             section = ParsedSection(idx, match, self)
             lineno = self.visit_section(
@@ -368,10 +386,7 @@ class SiteLogParser(BaseParser):
             section,
             header_line=True
         ) - 1
-        while (
-            idx < len(self.lines)
-            and not ParsedSection.REGEX.match(self.lines[idx].strip())
-        ):
+        while idx < len(self.lines) and not self.section_match(idx):
             for section_breaker in self.SECTION_BREAKERS:
                 if section_breaker in section.parameters:
                     return idx
@@ -437,13 +452,14 @@ class SiteLogParser(BaseParser):
                 line_no += 1
             section.add_parameter(parameter)
         elif not header_line:
-            if normalize(line) in self.IGNORED_LINES:
+            normalized = normalize(line)
+            if normalized in self.IGNORED_LINES:
                 pass
                 # self.add_finding(
                 #     Ignored(idx, self, 'Non-data line', line=line)
                 # )
-            elif normalize(line) in self.SUB_HEADINGS:
-                self._sub_heading_.name = normalize(line)
+            elif normalized in self.SUB_HEADINGS:
+                self._sub_heading_.name = normalized
             else:
                 self.add_finding(
                     Warn(idx, self, 'Unrecognized line', line=line)
@@ -452,12 +468,8 @@ class SiteLogParser(BaseParser):
         return line_no
 
     def count_indent(self, line):
-        count = 0
-        for char in line:
-            if char == ' ':
-                count += 1
-            elif char == '\t':
-                count += 4
-            else:
-                break
-        return count
+        """
+        Count the leading whitespace of a line, tabs count as 4 spaces.
+        """
+        indent = line[:len(line) - len(line.lstrip(' \t'))]
+        return len(indent) + 3 * indent.count('\t')
@@ -2,7 +2,6 @@ from typing import List, Union
 from slm.parsing import Error, BaseParser, BaseParameter, BaseSection
 from slm.defines import GeodesyMLVersion
 from lxml import etree
-from threading import Lock
 
 
 class Section(BaseSection):
@@ -48,8 +47,6 @@ class SiteLogParser(BaseParser):
     Parsing and validation routines for GeodesyML Documents.
     """
 
-    lock = Lock()
-
     xsd: GeodesyMLVersion
     doc: etree.XML
 
@@ -77,14 +74,13 @@ class SiteLogParser(BaseParser):
                     )
                 )
 
-                # Unclear if schema.validate is thread safe. Serialize access
-                # to it to be safe.
-                with self.lock:
+                # each concurrent validation uses its own schema instance
+                with self.xsd.validator() as schema:
 
-                    result = self.xsd.schema.validate(self.doc)
+                    result = schema.validate(self.doc)
 
                     if not result:
-                        for error in self.xsd.schema.error_log:
+                        for error in schema.error_log:
                             self.add_finding(
                                 Error(
                                     error.line-1,
@@ -4,6 +4,7 @@ from django.apps import apps
 import logging
 from functools import partial
 from django.conf import settings
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from slm import signals as slm_signals
 
@@ -70,3 +71,19 @@ for alert, config in getattr(settings, 'SLM_AUTOMATED_ALERTS', {}).items():
 def send_alert_emails(sender, alert, **kwargs):
     if alert.send_email:
         alert.send(request=kwargs.get('request', None))
+
+
+def index_audience(sender, instance, **kwargs):
+    from slm.models import AlertAudience
+    AlertAudience.objects.index(instance)
+
+
+for alert_class in apps.get_model('slm', 'Alert').objects.classes():
+    post_save.connect(index_audience, sender=alert_class)
+
+
+@receiver(post_delete, sender='slm.AlertAudience')
+def audience_deleted(sender, instance, **kwargs):
+    from slm.models import AlertAudience
+    if instance.site_id:
+        AlertAudience.objects.update_site_levels([instance.site_id])
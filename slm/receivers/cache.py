@@ -0,0 +1,59 @@
+"""
+Signal handlers that invalidate cached renderings of site logs, cached user
+permissions and compiled validation plans.
+"""
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from slm import signals as slm_signals
+from slm.utils import permission_cache
+from slm.validators import clear_validation_plans
+
+
+@receiver(slm_signals.section_edited)
+@receiver(slm_signals.section_added)
+@receiver(slm_signals.section_deleted)
+@receiver(slm_signals.site_published)
+@receiver(slm_signals.site_file_published)
+@receiver(slm_signals.site_file_unpublished)
+def invalidate_site_log(sender, site, **kwargs):
+    from slm.api.serializers import site_log_cache
+    site_log_cache.invalidate(site)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def user_saved(sender, instance, update_fields, **kwargs):
+    # users are saved on every request to record their activity
+    if update_fields is None or {'is_superuser', 'is_active'} & set(
+        update_fields
+    ):
+        permission_cache.invalidate(instance)
+
+
+@receiver(m2m_changed, sender='slm.User_agencies')
+@receiver(m2m_changed, sender='slm.User_groups')
+@receiver(m2m_changed, sender='slm.User_user_permissions')
+@receiver(m2m_changed, sender='slm.Site_agencies')
+@receiver(m2m_changed, sender='auth.Group_permissions')
+def invalidate_permissions(sender, instance, action, reverse, **kwargs):
+    from django.contrib.auth import get_user_model
+    if action not in {'post_add', 'post_remove', 'post_clear'}:
+        return
+    if isinstance(instance, get_user_model()) and not reverse:
+        permission_cache.invalidate(instance)
+    else:
+        permission_cache.invalidate()
+
+
+@receiver(post_delete, sender='slm.Agency')
+@receiver(post_delete, sender='auth.Group')
+def membership_deleted(sender, **kwargs):
+    permission_cache.invalidate()
+
+
+@receiver(setting_changed)
+def validators_changed(sender, setting, **kwargs):
+    # settings are overridden in tests
+    if setting == 'SLM_DATA_VALIDATORS':
+        clear_validation_plans()
@@ -1,3 +1,4 @@
+from django.db.models.signals import m2m_changed, post_save
 from django.dispatch import receiver
 from slm import signals as slm_signals
 from slm.defines import SiteLogStatus
@@ -13,3 +14,37 @@ def index_site(sender, site, previous_status, new_status, **kwargs):
         new_status not in SiteLogStatus.active_states()
     ):
         SiteIndex.objects.close_index(site)
+
+
+def update_search(site_pks):
+    from slm.models import SiteIndex
+    if site_pks:
+        SiteIndex.objects.filter(site__in=list(site_pks)).update_search()
+
+
+@receiver(m2m_changed, sender='slm.Site_agencies')
+@receiver(m2m_changed, sender='slm.Network_sites')
+def site_membership_changed(sender, instance, action, pk_set, **kwargs):
+    """
+    Agency and network names are part of the index search documents, so they
+    must be rebuilt when sites are added to or removed from either.
+    """
+    from slm.models import Site
+    if isinstance(instance, Site):
+        if action in {'post_add', 'post_remove', 'post_clear'}:
+            update_search([instance.pk])
+    elif action == 'pre_clear':
+        instance._cleared_sites = list(
+            instance.sites.values_list('pk', flat=True)
+        )
+    elif action in {'post_add', 'post_remove'}:
+        update_search(pk_set)
+    elif action == 'post_clear':
+        update_search(getattr(instance, '_cleared_sites', []))
+
+
+@receiver(post_save, sender='slm.Agency')
+@receiver(post_save, sender='slm.Network')
+def membership_renamed(sender, instance, created, **kwargs):
+    if not created:
+        update_search(instance.sites.values_list('pk', flat=True))
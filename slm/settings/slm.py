@@ -47,6 +47,58 @@ set_default(
 # be added to the logs
 set_default('SLM_LEGACY_PLACEHOLDERS', True)
 
+# rendered site logs are cached in this Django cache (alias from CACHES), set
+# to None to disable caching of site log renderings
+set_default('SLM_SITE_LOG_CACHE', 'default')
+
+# the sites each user may edit and moderate are cached in this Django cache
+# (alias from CACHES), set to None to disable. Invalidations only reach other
+# processes if the cache is shared (e.g. redis or memcached)
+set_default('SLM_PERMISSION_CACHE', 'default')
+
+# cached permissions expire after this many seconds (None: never). Cached
+# permissions are invalidated when memberships, groups or permissions change,
+# this timeout bounds how long other processes may use stale permissions if
+# the cache is not shared between them
+set_default('SLM_PERMISSION_CACHE_TIMEOUT', 60)
+
+# if True, archived site logs are not rendered when a site log is published.
+# Instead jobs are queued and rendered by the archive_worker command. Archives
+# that are requested before a worker has rendered them are rendered on demand.
+# Set this to False to render archives synchronously on publish.
+set_default('SLM_DEFER_ARCHIVES', True)
+
+# archive jobs that have been running for longer than this many seconds are
+# assumed to belong to a worker that died and are claimed by other workers
+set_default('SLM_ARCHIVE_JOB_TIMEOUT', 3600)
+
+# datatables list endpoints report the total number of rows in the table,
+# totals are cached for this many seconds
+set_default('SLM_TABLE_COUNT_TIMEOUT', 60)
+
+# on PostgreSQL the planner's row estimate is reported as the table total
+# instead of counting when the estimate is at least this many rows
+set_default('SLM_TABLE_ESTIMATE_THRESHOLD', 100000)
+
+# archived site log downloads may be handed off to the web server instead of
+# being streamed by Django. Set this to 'X-Sendfile' (Apache, lighttpd) to
+# send the file path or 'X-Accel-Redirect' (nginx) to send the file's storage
+# name appended to SLM_SENDFILE_URL.
+set_default('SLM_SENDFILE_HEADER', None)
+
+# the internal location the web server serves MEDIA_ROOT from when
+# SLM_SENDFILE_HEADER is X-Accel-Redirect
+set_default('SLM_SENDFILE_URL', '/protected/')
+
+# the maximum number of seconds a change feed request may be held open
+# waiting for a change to be published. Each waiting request occupies a
+# worker, so waiting is disabled by default
+set_default('SLM_CHANGE_FEED_MAX_WAIT', 0)
+
+# changes appear in the change feed once they are this many seconds old, a
+# change whose transaction takes longer than this to commit may be missed
+set_default('SLM_CHANGE_FEED_DELAY', 10)
+
 # the maximum file upload size in Mega Bytes
 set_default('SLM_MAX_UPLOAD_SIZE_MB', 100)
 
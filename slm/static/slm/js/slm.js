@@ -461,12 +461,15 @@ slm.initInfiniteScroll = function(div, scrollDiv, loader, api, kwargs, query, dr
     if (loader === null) {
         loader = position;
     }
+    // keyset pagination cursor - deep pages are as fast as the first
+    let cursor = '';
     let fetchPage = function() {
         loader.show();
         scrollDiv.off( 'scroll' );
         const pageQuery = div.data('slmQuery') || {};
         pageQuery.start = div.data('slmPage');
         pageQuery.length = div.data('slmPageSize');
+        pageQuery.cursor = cursor;
         $.ajax({
             url: slm.urls.reverse(api, kwargs, [], query),
             method: 'GET',
@@ -475,6 +478,7 @@ slm.initInfiniteScroll = function(div, scrollDiv, loader, api, kwargs, query, dr
             function(data, status, jqXHR) {
                 loader.hide();
                 if (data.next) {
+                    cursor = new URL(data.next).searchParams.get('cursor') || '';
                     scrollDiv.scroll(function() {
                         if (atBottom(scrollDiv.get(0))) {
                             fetchPage();
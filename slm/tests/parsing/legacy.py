@@ -1,6 +1,7 @@
 from pathlib import Path
 from unittest import TestCase
 
+from slm.parsing import normalize
 from slm.parsing.legacy.binding import SiteLogBinder
 from slm.parsing.legacy.parser import Error, SiteLogParser
 
@@ -47,3 +48,14 @@ class TestLegacyParser(TestCase):
         self.assertFalse(parsed.name_matched)
         self.assertEqual('AAA200USA', parsed.site_name)
         self.assertIsInstance(parsed.findings[0], Error)
+
+    def test_normalize(self):
+        for name, expected in [
+            ('Receiver Type', 'RECEIVERTYPE'),
+            (' Elevation (m,ellips.) ', 'ELEVATIONMELLIPS'),
+            ('\tSatellite System\t', 'SATELLITESYSTEM'),
+            ('Marker->ARP Up Ecc. (m)', 'MARKERARPUPECCM'),
+            ('[Notes]{a_b}+10%', 'NOTESAB10'),
+            ('', '')
+        ]:
+            self.assertEqual(normalize(name), expected)
@@ -1,3 +1,4 @@
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from unittest import TestCase
 
@@ -47,6 +48,27 @@ class TestXSDParser(TestCase):
                 section.binding
             )
 
+    def test_concurrent_validation(self):
+        invalid = self.ex_05.replace(
+            'srsName="EPSG:7789">',
+            'srsName="EPSG:7789">x ',
+            1
+        )
+
+        def findings(log):
+            return [
+                (line, str(finding.message))
+                for line, finding in SiteLogParser(log).findings.items()
+            ]
+
+        expected = [findings(log) for log in [self.ex_05, invalid] * 8]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            self.assertEqual(
+                list(pool.map(findings, [self.ex_05, invalid] * 8)),
+                expected
+            )
+        self.assertTrue(expected[1])
+
     """
     def test_name_match(self):
 
@@ -17,3 +17,6 @@ DATABASES = {
         'PORT': '',
     }
 }
+
+# render archives synchronously on publish
+SLM_DEFER_ARCHIVES = False
@@ -12,16 +12,63 @@ More info:
 https://docs.djangoproject.com/en/3.2/topics/testing/overview/
 """
 
+import csv
 import inspect
+import io
+import json
+import shutil
+import tarfile
+import zipfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.management import call_command
 from django.dispatch import Signal
-from django.test import Client, TestCase
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from django.utils.timezone import now
+from lxml import etree
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
 from slm import signals as slm_signals
 from slm.api.edit import views as edit_views
-from slm.defines import SiteLogStatus
-from slm.models import Agency, Network, Site
+from slm.api.pagination import DataTablesPagination
+from slm.api.serializers import SiteLogSerializer, site_log_cache
+from slm.defines import (
+    AlertLevel,
+    ArchiveJobState,
+    GeodesyMLVersion,
+    LogEntryType,
+    SiteLogFormat,
+    SiteLogStatus,
+    SLMFileType
+)
+from slm.models import (
+    Agency,
+    AgencyAlert,
+    Alert,
+    AlertAudience,
+    ArchivedSiteLog,
+    ArchiveJob,
+    LogEntry,
+    Network,
+    Site,
+    SiteAlert,
+    SiteIndex,
+    SiteLocation,
+    SiteMoreInformation,
+    SiteOtherInstrumentation,
+    SiteSectionStatus,
+    UserAlert
+)
+from slm.settings import validation
+from slm.validators import FieldPreferred, get_validation_plan
 from slm.tests.defines.ISOCountry import TestISOCountry  # dont remove
 from slm.tests.defines.SiteLogStatus import TestSiteLogStatus  # dont remove
 from slm.tests.parsing.legacy import TestLegacyParser  # dont remove
@@ -630,3 +677,1620 @@ class TestEditAPI(SLMSignalTracker, TestCase):
             site.status,
             SiteLogStatus.PUBLISHED
         )
+
+
+class TestSectionQueries(TestCase):
+
+    start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+    def setUp(self):
+        self.site = Site.objects.create(name='AAA200USA')
+
+    def add_edit(self, subsection, day, published, site=None):
+        edit = SiteOtherInstrumentation.objects.create(
+            site=site or self.site,
+            subsection=subsection,
+            instrumentation=f'{subsection}: {day}'
+        )
+        edit.edited = self.start + timedelta(days=day)
+        edit.save()
+        if published:
+            edit.publish(silent=True, timestamp=edit.edited, update_site=False)
+        return edit
+
+    def expected(self, epoch=None, published=None):
+        latest = {}
+        for edit in SiteOtherInstrumentation.objects.filter(
+            site=self.site
+        ).order_by('edited'):
+            if published is not None and edit.published != published:
+                continue
+            if epoch and edit.edited > epoch:
+                continue
+            latest[edit.subsection] = edit.pk
+        return [latest[sub] for sub in sorted(latest)]
+
+    def test_subsection_current(self):
+        other = Site.objects.create(name='BBB200USA')
+        for day in range(0, 30):
+            self.add_edit(day % 3, day, published=day < 25)
+            self.add_edit(day % 3, day, published=True, site=other)
+
+        self.assertEqual(
+            self.site.siteotherinstrumentation_set.count(), 30
+        )
+
+        for epoch in [None, self.start + timedelta(days=10)]:
+            for published in [None, True, False]:
+                self.assertEqual(
+                    list(
+                        self.site.siteotherinstrumentation_set.current(
+                            epoch=epoch,
+                            published=published
+                        ).values_list('pk', flat=True)
+                    ),
+                    self.expected(epoch=epoch, published=published)
+                )
+
+        self.assertFalse(
+            self.site.siteotherinstrumentation_set.current(
+                epoch=self.start - timedelta(days=1)
+            ).exists()
+        )
+
+    def test_site_snapshot(self):
+        other = Site.objects.create(name='BBB200USA')
+        for day in range(0, 12):
+            self.add_edit(day % 4, day, published=day < 8)
+            self.add_edit(day % 2, day, published=True, site=other)
+
+        for published in [None, True]:
+            with self.assertNumQueries(
+                1 + len(Site.section_fields()) +
+                len(Site.subsection_fields())
+            ):
+                sites = list(
+                    Site.objects.filter(
+                        name__in=['AAA200USA', 'BBB200USA']
+                    ).with_snapshot(published=published)
+                )
+
+            for site in sites:
+                self.assertTrue(site.has_snapshot(published=published))
+                expected = Site.objects.get(pk=site.pk)
+                expected.current(published=published)
+                for section in Site.section_fields():
+                    self.assertEqual(
+                        getattr(site, section),
+                        getattr(expected, section)
+                    )
+                for subsection in Site.subsection_fields():
+                    self.assertEqual(
+                        getattr(site, subsection),
+                        list(getattr(expected, subsection))
+                    )
+                site.refresh_from_db()
+                self.assertFalse(site.has_snapshot(published=published))
+
+        # reloading the sections replaces the snapshot
+        site = Site.objects.filter(
+            name='AAA200USA'
+        ).with_snapshot(published=True).get()
+        site.head()
+        self.assertFalse(site.has_snapshot(published=True))
+        self.assertTrue(site.has_snapshot(published=None))
+        site.published()
+        self.assertTrue(site.has_snapshot(published=True))
+
+    def test_published_diffs(self):
+        other = Site.objects.create(name='BBB200USA')
+        for day in range(0, 12):
+            self.add_edit(day % 3, day, published=day % 4 == 0)
+            self.add_edit(day % 2, day, published=day < 6, site=other)
+
+        sections = list(SiteOtherInstrumentation.objects.all())
+        with self.assertNumQueries(1):
+            diffs = SiteOtherInstrumentation.published_diffs(sections)
+        self.assertEqual(
+            diffs,
+            {section.pk: section.published_diff() for section in sections}
+        )
+        self.assertTrue(any(diffs.values()))
+
+        epoch = self.start + timedelta(days=5)
+        self.assertEqual(
+            SiteOtherInstrumentation.published_diffs(sections, epoch=epoch),
+            {
+                section.pk: section.published_diff(epoch=epoch)
+                for section in sections
+            }
+        )
+
+        superuser = get_user_model().objects.create_superuser(
+            email='diffs@example.com',
+            password='password'
+        )
+        client = Client()
+        client.force_login(superuser)
+        response = client.get(
+            reverse('slm_edit_api:siteotherinstrumentation-list'),
+            {'site': self.site.name}
+        )
+        self.assertEqual(response.status_code, 200)
+        rows = response.json()['data']
+        self.assertEqual(len(rows), 12)
+        for row in rows:
+            self.assertEqual(
+                row['_diff'],
+                SiteOtherInstrumentation.objects.get(
+                    pk=row['id']
+                ).published_diff()
+            )
+
+    def test_validity_interval(self):
+        first = self.add_edit(0, 0, published=True)
+        second = self.add_edit(0, 2, published=False)
+        second.publish(
+            silent=True,
+            timestamp=self.start + timedelta(days=4),
+            update_site=False
+        )
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.valid_from, self.start)
+        self.assertEqual(first.valid_to, second.valid_from)
+        self.assertIsNone(second.valid_to)
+
+        # second was edited but not yet published at day 3
+        for day, expected in [(0, first), (3, first), (4, second)]:
+            self.assertEqual(
+                self.site.siteotherinstrumentation_set.published(
+                    subsection=0,
+                    epoch=self.start + timedelta(days=day)
+                ),
+                expected
+            )
+        self.assertEqual(
+            self.site.siteotherinstrumentation_set.published(subsection=0),
+            second
+        )
+
+        # edits of published rows copy the row, the copy is not yet valid
+        second.pk = None
+        second.published = False
+        second.save()
+        self.assertIsNone(second.valid_from)
+        self.assertEqual(
+            list(self.site.siteotherinstrumentation_set.published()),
+            list(self.site.siteotherinstrumentation_set.filter(
+                valid_from=self.start + timedelta(days=4)
+            ))
+        )
+
+
+class TestSiteLogCache(TestCase):
+
+    def test_render_cache(self):
+        site = Site.objects.create(name='AAA200USA')
+        SiteOtherInstrumentation.objects.create(
+            site=site,
+            subsection=0,
+            instrumentation='Barometer'
+        )
+
+        def render():
+            return SiteLogSerializer(
+                instance=site,
+                published=None
+            ).format(SiteLogFormat.LEGACY)
+
+        hits, misses = site_log_cache.hits, site_log_cache.misses
+        rendered = render()
+        self.assertIn('Barometer', rendered)
+        self.assertEqual(render(), rendered)
+        self.assertEqual(site_log_cache.hits, hits + 1)
+        self.assertEqual(site_log_cache.misses, misses + 1)
+
+        SiteOtherInstrumentation.objects.filter(site=site).update(
+            instrumentation='Hygrometer'
+        )
+        slm_signals.section_edited.send(
+            sender=self,
+            site=site,
+            user=None,
+            timestamp=datetime.now(timezone.utc),
+            request=None,
+            section=site.siteotherinstrumentation_set.first(),
+            fields=['instrumentation']
+        )
+        self.assertIn('Hygrometer', render())
+        self.assertEqual(site_log_cache.misses, misses + 2)
+
+    def test_streamed_xml(self):
+        site = Site.objects.create(
+            name='AAA300USA',
+            last_publish=datetime(2022, 1, 1, tzinfo=timezone.utc)
+        )
+        SiteOtherInstrumentation.objects.create(
+            site=site,
+            subsection=0,
+            instrumentation='Baromètre & <hygromètre>'
+        )
+        serializer = SiteLogSerializer(instance=site, published=None)
+        for version in GeodesyMLVersion:
+            parser = etree.XMLParser(remove_blank_text=True)
+            self.assertEqual(
+                serializer.xml(version),
+                etree.tostring(
+                    etree.fromstring(
+                        version.template.render(
+                            serializer.xml_context()
+                        ).encode(),
+                        parser=parser
+                    ),
+                    pretty_print=True
+                ).decode()
+            )
+
+
+class TestArchiveJobs(TestCase):
+
+    def setUp(self):
+        self.site = Site.objects.create(
+            name='AAA400USA',
+            last_publish=datetime(2022, 1, 1, tzinfo=timezone.utc)
+        )
+
+    def test_deferred_archives(self):
+        with override_settings(SLM_DEFER_ARCHIVES=True):
+            index = SiteIndex.objects.add_index(self.site)
+        self.assertEqual(index.files.count(), 0)
+        self.assertEqual(
+            set(index.archive_jobs.pending().values_list(
+                'log_format',
+                flat=True
+            )),
+            {SiteLogFormat.LEGACY, SiteLogFormat.GEODESY_ML}
+        )
+
+        call_command('archive_worker', workers=1)
+        self.assertFalse(index.archive_jobs.exclude(
+            state=ArchiveJobState.DONE
+        ).exists())
+        self.assertEqual(
+            set(index.files.values_list('log_format', flat=True)),
+            {SiteLogFormat.LEGACY, SiteLogFormat.GEODESY_ML}
+        )
+
+    def test_stale_archives(self):
+        with override_settings(SLM_DEFER_ARCHIVES=True):
+            index = SiteIndex.objects.add_index(self.site)
+
+        # one job was claimed by a worker that died, the other is still
+        # being worked on
+        stale, running = index.archive_jobs.order_by('pk')
+        index.archive_jobs.filter(pk=stale.pk).update(
+            state=ArchiveJobState.RUNNING,
+            started=now() - timedelta(hours=2),
+            attempts=1
+        )
+        index.archive_jobs.filter(pk=running.pk).update(
+            state=ArchiveJobState.RUNNING,
+            started=now(),
+            attempts=1
+        )
+
+        with override_settings(SLM_ARCHIVE_JOB_TIMEOUT=3600):
+            call_command('archive_worker', workers=1)
+
+        stale.refresh_from_db()
+        running.refresh_from_db()
+        self.assertEqual(stale.state, ArchiveJobState.DONE)
+        self.assertEqual(stale.attempts, 2)
+        self.assertEqual(running.state, ArchiveJobState.RUNNING)
+        self.assertEqual(
+            list(index.files.values_list('log_format', flat=True)),
+            [stale.log_format]
+        )
+
+    def test_sync_archives(self):
+        with override_settings(SLM_DEFER_ARCHIVES=False):
+            index = SiteIndex.objects.add_index(self.site)
+        self.assertFalse(index.archive_jobs.exists())
+        self.assertEqual(index.files.count(), 2)
+
+
+class TestBuildIndex(TestCase):
+
+    def test_build_from_archive(self):
+        site = Site.objects.create(name='AAA200USA')
+        log = Path(__file__).parent / 'parsing/files/AAA200USA_20220909.log'
+        with TemporaryDirectory() as archive:
+            for name in [
+                'aaa2_20200101.log',
+                'AAA200USA_20220909.log',
+                'zzz9_20200101.log',
+                'readme.txt'
+            ]:
+                shutil.copy(log, Path(archive) / name)
+
+            call_command('build_index', archive=archive)
+            indexes = list(site.indexes.order_by('begin'))
+            self.assertEqual(
+                [(index.begin, index.end) for index in indexes],
+                [
+                    (
+                        datetime(2020, 1, 1, tzinfo=timezone.utc),
+                        datetime(2022, 9, 9, tzinfo=timezone.utc)
+                    ),
+                    (datetime(2022, 9, 9, tzinfo=timezone.utc), None)
+                ]
+            )
+            self.assertEqual(
+                ArchivedSiteLog.objects.filter(site=site).count(),
+                2
+            )
+
+            # a second build resumes - nothing left to do
+            call_command('build_index', archive=archive)
+            self.assertEqual(site.indexes.count(), 2)
+            self.assertEqual(
+                ArchivedSiteLog.objects.filter(site=site).count(),
+                2
+            )
+
+    def test_import_archive(self):
+        site = Site.objects.create(name='AAA200USA')
+        SiteIndex.objects.create(
+            site=site,
+            begin=datetime(2021, 1, 1, tzinfo=timezone.utc)
+        )
+        log = Path(__file__).parent / 'parsing/files/AAA200USA_20220909.log'
+        with TemporaryDirectory() as tmp:
+            archive = Path(tmp) / 'archive.tar.gz'
+            with tarfile.open(archive, 'w:gz') as tar:
+                for name in [
+                    'logs/aaa2_20200101.log',
+                    'logs/AAA200USA_20220909.log',
+                    'logs/zzz9_20200101.log'
+                ]:
+                    tar.add(log, arcname=name)
+
+            for _ in range(2):
+                call_command(
+                    'import_archive',
+                    str(archive),
+                    workers=1,
+                    batch_size=1
+                )
+                self.assertEqual(
+                    [
+                        (index.begin.year, index.end and index.end.year)
+                        for index in site.indexes.order_by('begin')
+                    ],
+                    [(2020, 2021), (2021, 2022), (2022, None)]
+                )
+                self.assertEqual(
+                    ArchivedSiteLog.objects.filter(site=site).count(),
+                    2
+                )
+
+        # the fields SiteFile.save() would set are populated
+        for archived in ArchivedSiteLog.objects.filter(site=site):
+            self.assertEqual(archived.size, archived.file.size)
+            self.assertEqual(archived.mimetype, SiteLogFormat.LEGACY.mimetype)
+            self.assertEqual(archived.file_type, SLMFileType.SITE_LOG)
+            self.assertIsNotNone(archived.timestamp)
+
+    def test_import_archive_rollback(self):
+        site = Site.objects.create(name='AAA200USA')
+        log = Path(__file__).parent / 'parsing/files/AAA200USA_20220909.log'
+        with TemporaryDirectory() as tmp:
+            archive = Path(tmp) / 'archive.tar.gz'
+            with tarfile.open(archive, 'w:gz') as tar:
+                tar.add(log, arcname='logs/AAA200USA_20220909.log')
+
+            written = []
+            bulk_create = ArchivedSiteLog.objects.bulk_create
+
+            def fail(objs, *args, **kwargs):
+                written.extend(
+                    (archive.file.storage, archive.file.name)
+                    for archive in bulk_create(objs, *args, **kwargs)
+                )
+                raise RuntimeError('Import failed.')
+
+            with patch.object(ArchivedSiteLog.objects, 'bulk_create', fail):
+                with self.assertRaises(RuntimeError):
+                    call_command('import_archive', str(archive), workers=1)
+
+        # the log was written to storage and removed on rollback
+        self.assertEqual(len(written), 1)
+        storage, name = written[0]
+        self.assertFalse(storage.exists(name))
+        self.assertFalse(site.indexes.exists())
+        self.assertFalse(ArchivedSiteLog.objects.filter(site=site).exists())
+
+
+class TestPagination(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        created = datetime(2022, 1, 1, 0, 0, 0, 1, tzinfo=timezone.utc)
+        for idx in range(23):
+            Site.objects.create(
+                name=f'AA{idx:02}00USA',
+                # duplicate timestamps exercise the primary key tie breaker
+                created=created + timedelta(microseconds=idx // 3),
+                # nulls on both sides of page boundaries
+                last_publish=(
+                    created + timedelta(days=idx % 4) if idx % 3 else None
+                )
+            )
+
+    def paginate(self, url, queryset):
+        paginator = DataTablesPagination()
+        page = paginator.paginate_queryset(
+            queryset,
+            Request(APIRequestFactory().get(url))
+        )
+        return [site.name for site in page], paginator.get_paginated_response(
+            []
+        ).data
+
+    def test_keyset_pagination(self):
+        for ordering in [
+            ('-created',),
+            ('created', '-name'),
+            ('name',),
+            ('last_publish',),
+            ('-last_publish', 'name')
+        ]:
+            queryset = Site.objects.order_by(*ordering)
+            expected = list(queryset.values_list('name', flat=True))
+
+            pages = []
+            url = '/?length=5&cursor='
+            while url:
+                page, response = self.paginate(url, queryset)
+                self.assertEqual(response['recordsFiltered'], 23)
+                self.assertEqual(response['recordsTotal'], 23)
+                pages.append(page)
+                url, previous = response['next'], response['previous']
+            self.assertEqual([len(page) for page in pages], [5, 5, 5, 5, 3])
+            self.assertEqual(sum(pages, []), expected)
+
+            # walk back from the last page
+            while previous:
+                page, response = self.paginate(previous, queryset)
+                pages.pop()
+                self.assertEqual(page, pages[-1])
+                previous = response['previous']
+            self.assertEqual(len(pages), 1)
+
+    def test_offset_pagination(self):
+        queryset = Site.objects.order_by('name')
+        page, response = self.paginate('/?length=5&start=20', queryset)
+        self.assertEqual(
+            page,
+            list(queryset.values_list('name', flat=True))[20:]
+        )
+        self.assertIsNone(response['next'])
+
+
+class TestSiteSearch(TestCase):
+
+    def setUp(self):
+        self.site = Site.objects.create(
+            name='AAA500USA',
+            last_publish=datetime(2022, 1, 1, tzinfo=timezone.utc)
+        )
+        self.agency = Agency.objects.create(
+            name='Search Agency',
+            shortname='SRCH'
+        )
+        self.site.agencies.add(self.agency)
+        self.index = SiteIndex.objects.create(
+            site=self.site,
+            begin=self.site.last_publish,
+            city='Boulder',
+            country='US',
+            serial_number='SN-1234',
+            frequency_standard='H'
+        )
+        SiteIndex.objects.filter(pk=self.index.pk).update_search()
+
+    def search(self, value):
+        return list(
+            SiteIndex.objects.search(value).values_list('pk', flat=True)
+        )
+
+    def test_search_document(self):
+        for value in [
+            'aaa5',
+            'boulder',
+            'united states',
+            'US',
+            'sn-12',
+            'h-maser',
+            'srch',
+            'search agency'
+        ]:
+            self.assertEqual(self.search(value), [self.index.pk], value)
+
+        self.assertEqual(self.search('denver'), [])
+        # terms are separate fields
+        self.assertEqual(self.search('boulder us'), [])
+
+        response = Client().get(
+            reverse('slm_public_api:stations-list'),
+            {'search': 'Boulder', 'format': 'json'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [station['name'] for station in response.json()['data']],
+            ['AAA500USA']
+        )
+
+    def test_search_membership(self):
+        network = Network.objects.create(name='Searchable Net')
+        network.sites.add(self.site)
+        self.assertEqual(self.search('searchable net'), [self.index.pk])
+
+        self.agency.name = 'Renamed Agency'
+        self.agency.save()
+        self.assertEqual(self.search('renamed'), [self.index.pk])
+        self.assertEqual(self.search('search agency'), [])
+
+        self.site.agencies.clear()
+        network.sites.clear()
+        self.assertEqual(self.search('renamed'), [])
+        self.assertEqual(self.search('searchable'), [])
+
+
+class TestStationExport(TestCase):
+
+    def setUp(self):
+        agency = Agency.objects.create(name='Export Agency', public=True)
+        network = Network.objects.create(name='Export Net')
+        for idx in range(3):
+            site = Site.objects.create(name=f'AA{idx}600USA')
+            site.agencies.add(agency)
+            if idx:
+                network.sites.add(site)
+            SiteIndex.objects.create(
+                site=site,
+                begin=datetime(2022, 1, 1, tzinfo=timezone.utc),
+                city=f'City {idx}',
+                country='US',
+                latitude=idx * 10.5,
+                frequency_standard='H'
+            )
+
+    def export(self, export_format, **params):
+        response = Client().get(
+            reverse('slm_public_api:export-list'),
+            {'format': export_format, **params}
+        )
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content)
+
+    def test_csv(self):
+        rows = list(csv.DictReader(
+            self.export('csv', ordering='-site__name').decode().splitlines()
+        ))
+        self.assertEqual(
+            [row['name'] for row in rows],
+            ['AA2600USA', 'AA1600USA', 'AA0600USA']
+        )
+        self.assertEqual(rows[0]['agencies'], 'Export Agency')
+        self.assertEqual(rows[0]['networks'], 'Export Net')
+        self.assertEqual(rows[2]['networks'], '')
+        self.assertEqual(rows[0]['country'], 'US')
+        self.assertEqual(rows[0]['frequency_standard'], 'H')
+        self.assertEqual(float(rows[0]['latitude']), 21.0)
+
+    def test_ndjson(self):
+        rows = [
+            json.loads(line)
+            for line in self.export('ndjson', name='AA1').splitlines()
+        ]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['name'], 'AA1600USA')
+        self.assertEqual(rows[0]['agencies'], ['Export Agency'])
+        self.assertEqual(rows[0]['city'], 'City 1')
+        self.assertIsNone(rows[0]['antenna_type'])
+
+    def test_arrow(self):
+        try:
+            import pyarrow
+            from pyarrow import ipc, parquet
+        except ImportError:  # pragma: no cover
+            self.skipTest('pyarrow is not installed.')
+
+        table = ipc.open_stream(self.export('arrow')).read_all()
+        self.assertEqual(
+            table.column('name').to_pylist(),
+            ['AA0600USA', 'AA1600USA', 'AA2600USA']
+        )
+        self.assertEqual(
+            table.column('networks').to_pylist(),
+            [[], ['Export Net'], ['Export Net']]
+        )
+        self.assertEqual(
+            parquet.read_table(
+                pyarrow.BufferReader(self.export('parquet'))
+            ).to_pylist(),
+            table.to_pylist()
+        )
+
+
+class TestMapTiles(TestCase):
+
+    def setUp(self):
+        agency = Agency.objects.create(name='Tile Agency', public=True)
+        for idx, (lat, lng) in enumerate([
+            (40.0150, -105.2705),
+            (40.0160, -105.2710),
+            (-33.8688, 151.2093)
+        ]):
+            site = Site.objects.create(name=f'AA{idx}700USA')
+            site.agencies.add(agency)
+            SiteIndex.objects.create(
+                site=site,
+                begin=datetime(2022, 1, 1, tzinfo=timezone.utc),
+                latitude=lat,
+                longitude=lng
+            )
+
+    def tile(self, z, x, y, **headers):
+        return Client().get(
+            reverse(
+                'slm_public_api:map-tiles',
+                kwargs={'z': z, 'x': x, 'y': y}
+            ),
+            **headers
+        )
+
+    def test_quadkeys(self):
+        from slm.models.index import GRID_ZOOM, quadkey, tile_coordinates
+        self.assertEqual(quadkey(3, 3, 5), '213')
+        index = SiteIndex.objects.get(site__name='AA2700USA')
+        self.assertEqual(len(index.quadkey), GRID_ZOOM)
+        self.assertEqual(
+            index.quadkey,
+            quadkey(GRID_ZOOM, *tile_coordinates(-33.8688, 151.2093))
+        )
+
+    def test_clustering(self):
+        features = self.tile(0, 0, 0).json()['features']
+        self.assertEqual(len(features), 2)
+        cluster = [feat for feat in features if 'id' not in feat][0]
+        self.assertEqual(cluster['properties'], {'cluster': True, 'count': 2})
+        self.assertAlmostEqual(cluster['geometry']['coordinates'][1], 40.0155)
+
+        # zoomed in the stations in Boulder are separate
+        from slm.models.index import GRID_ZOOM, tile_coordinates
+        self.assertEqual(self.tile(GRID_ZOOM + 1, 0, 0).status_code, 404)
+        self.assertEqual(self.tile(1, 2, 0).status_code, 404)
+        for name, lat, lng in [
+            ('AA0700USA', 40.0150, -105.2705),
+            ('AA1700USA', 40.0160, -105.2710)
+        ]:
+            features = self.tile(
+                17,
+                *tile_coordinates(lat, lng, 17)
+            ).json()['features']
+            self.assertIn(
+                name,
+                [feat['properties'].get('name') for feat in features]
+            )
+            self.assertFalse(
+                any(feat['properties'].get('cluster') for feat in features)
+            )
+
+        # an empty tile
+        self.assertEqual(self.tile(1, 0, 1).json()['features'], [])
+
+    def test_etag(self):
+        response = self.tile(1, 1, 1)
+        self.assertEqual(len(response.json()['features']), 1)
+        etag = response['ETag']
+        self.assertEqual(
+            self.tile(1, 1, 1, HTTP_IF_NONE_MATCH=etag).status_code,
+            304
+        )
+        SiteIndex.objects.filter(site__name='AA2700USA').update(
+            begin=datetime(2023, 1, 1, tzinfo=timezone.utc)
+        )
+        self.assertEqual(
+            self.tile(1, 1, 1, HTTP_IF_NONE_MATCH=etag).status_code,
+            200
+        )
+
+
+class TestSpatialQueries(TestCase):
+
+    def setUp(self):
+        import random
+        rand = random.Random(15)
+        agency = Agency.objects.create(name='Spatial Agency', public=True)
+        self.locations = {}
+        points = [
+            (40.0150, -105.2705),
+            (-16.5, 179.9),
+            (-16.5, -179.9),
+            (89.5, 10.0),
+            *(
+                (rand.uniform(-90, 90), rand.uniform(-180, 180))
+                for _ in range(200)
+            )
+        ]
+        for idx, (lat, lng) in enumerate(points):
+            site = Site.objects.create(name=f'A{idx:03}00USA')
+            site.agencies.add(agency)
+            SiteIndex.objects.create(
+                site=site,
+                begin=datetime(2022, 1, 1, tzinfo=timezone.utc),
+                latitude=lat,
+                longitude=lng
+            )
+            self.locations[site.name] = (lat, lng)
+
+    @staticmethod
+    def haversine(lat1, lng1, lat2, lng2):
+        from math import asin, cos, radians, sin, sqrt
+        from slm.models.index import EARTH_RADIUS
+        lat1, lng1, lat2, lng2 = map(radians, (lat1, lng1, lat2, lng2))
+        return 2 * EARTH_RADIUS * asin(sqrt(
+            sin((lat2 - lat1) / 2) ** 2 +
+            cos(lat1) * cos(lat2) * sin((lng2 - lng1) / 2) ** 2
+        ))
+
+    def names(self, queryset):
+        return set(queryset.values_list('site__name', flat=True))
+
+    def test_within_bbox(self):
+        for bbox in [
+            (30, -110, 50, -100),
+            (-20, 170, -10, -170),
+            (-90, -180, 90, 180),
+            (0, 0, 45, 90)
+        ]:
+            min_lat, min_lng, max_lat, max_lng = bbox
+            self.assertEqual(
+                self.names(SiteIndex.objects.within_bbox(*bbox)),
+                {
+                    name for name, (lat, lng) in self.locations.items()
+                    if min_lat <= lat <= max_lat and (
+                        min_lng <= lng <= max_lng if min_lng <= max_lng
+                        else lng >= min_lng or lng <= max_lng
+                    )
+                },
+                bbox
+            )
+
+    def test_within_radius(self):
+        for lat, lng, radius in [
+            (40.0, -105.0, 50),
+            (-16.5, 180, 30),
+            (85.0, 0, 1000),
+            (0, 0, 5000),
+            (10, 100, 20000)
+        ]:
+            self.assertEqual(
+                self.names(SiteIndex.objects.within_radius(lat, lng, radius)),
+                {
+                    name for name, location in self.locations.items()
+                    if self.haversine(lat, lng, *location) <= radius
+                },
+                (lat, lng, radius)
+            )
+
+    def test_api(self):
+        url = reverse('slm_public_api:stations-list')
+        response = Client().get(url, {'near': '-16.5,180,30'})
+        self.assertEqual(
+            {station['name'] for station in response.json()['data']},
+            {'A00100USA', 'A00200USA'}
+        )
+        response = Client().get(url, {'bbox': '30,-110,50,-100'})
+        self.assertIn(
+            'A00000USA',
+            {station['name'] for station in response.json()['data']}
+        )
+        self.assertEqual(Client().get(url, {'bbox': '1,2'}).status_code, 400)
+
+
+class TestArchiveDownloads(TestCase):
+
+    def setUp(self):
+        site = Site.objects.create(
+            name='AAA800USA',
+            last_publish=datetime(2022, 1, 1, tzinfo=timezone.utc)
+        )
+        with override_settings(SLM_DEFER_ARCHIVES=False):
+            self.index = SiteIndex.objects.add_index(site)
+        self.archive = self.index.files.get(log_format=SiteLogFormat.LEGACY)
+        with self.archive.file.open('rb') as log:
+            self.content = log.read()
+        self.url = reverse(
+            'slm_public_api:archive-detail',
+            kwargs={'pk': self.archive.pk}
+        )
+
+    def test_conditional(self):
+        response = Client().get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertEqual(response['ETag'], self.archive.etag)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+        for headers in [
+            {'HTTP_IF_NONE_MATCH': response['ETag']},
+            {'HTTP_IF_MODIFIED_SINCE': response['Last-Modified']}
+        ]:
+            not_modified = Client().get(self.url, **headers)
+            self.assertEqual(not_modified.status_code, 304)
+            self.assertEqual(not_modified['ETag'], self.archive.etag)
+
+        self.assertEqual(
+            Client().get(self.url, HTTP_IF_NONE_MATCH='"other"').status_code,
+            200
+        )
+
+        download = Client().get(
+            reverse(
+                'slm_public_api:download-detail',
+                kwargs={'site': 'AAA800USA', 'format': 'log'}
+            ),
+            HTTP_IF_NONE_MATCH=self.archive.etag
+        )
+        self.assertEqual(download.status_code, 304)
+
+    def test_range(self):
+        size = len(self.content)
+        for header, expected in [
+            ('bytes=0-9', self.content[:10]),
+            ('bytes=10-', self.content[10:]),
+            ('bytes=-5', self.content[-5:]),
+            (f'bytes=5-{size * 2}', self.content[5:])
+        ]:
+            response = Client().get(self.url, HTTP_RANGE=header)
+            self.assertEqual(response.status_code, 206, header)
+            self.assertEqual(
+                b''.join(response.streaming_content),
+                expected,
+                header
+            )
+            self.assertEqual(int(response['Content-Length']), len(expected))
+
+        response = Client().get(self.url, HTTP_RANGE=f'bytes={size}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{size}')
+
+        # ranges are ignored if the file changed
+        response = Client().get(
+            self.url,
+            HTTP_RANGE='bytes=0-9',
+            HTTP_IF_RANGE='"stale"'
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_sendfile(self):
+        with override_settings(
+            SLM_SENDFILE_HEADER='X-Accel-Redirect',
+            SLM_SENDFILE_URL='/internal/'
+        ):
+            response = Client().get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(
+            response['X-Accel-Redirect'],
+            f'/internal/{self.archive.file.name}'
+        )
+
+
+class TestArchiveBundles(TestCase):
+
+    def setUp(self):
+        agency = Agency.objects.create(name='Bundle Agency', public=True)
+        for name in ['AAA900USA', 'BBB900USA']:
+            site = Site.objects.create(name=name)
+            site.agencies.add(agency)
+            for year in [2020, 2022]:
+                site.last_publish = datetime(year, 1, 1, tzinfo=timezone.utc)
+                with override_settings(SLM_DEFER_ARCHIVES=False):
+                    SiteIndex.objects.add_index(site)
+        # an index that has not been archived yet
+        site = Site.objects.create(name='CCC900USA')
+        site.agencies.add(agency)
+        SiteIndex.objects.create(
+            site=site,
+            begin=datetime(2021, 1, 1, tzinfo=timezone.utc)
+        )
+
+    def bundle(self, export_format, **params):
+        response = Client().get(
+            reverse('slm_public_api:bundle-list'),
+            {'format': export_format, **params}
+        )
+        self.assertEqual(response.status_code, 200)
+        return io.BytesIO(b''.join(response.streaming_content))
+
+    @override_settings(SLM_DEFER_ARCHIVES=True)
+    def test_tar(self):
+        with tarfile.open(fileobj=self.bundle('tar')) as bundle:
+            self.assertEqual(
+                bundle.getnames(),
+                [
+                    'AAA900USA_20220101.log',
+                    'BBB900USA_20220101.log',
+                    'missing.txt'
+                ]
+            )
+            archive = ArchivedSiteLog.objects.get(
+                name='AAA900USA_20220101.log'
+            )
+            with archive.file.open('rb') as log:
+                self.assertEqual(
+                    bundle.extractfile('AAA900USA_20220101.log').read(),
+                    log.read()
+                )
+
+            # logs that have not been archived are listed, not rendered
+            self.assertEqual(
+                bundle.extractfile('missing.txt').read(),
+                b'CCC900USA_20210101.log\n'
+            )
+        self.assertFalse(
+            ArchivedSiteLog.objects.filter(site__name='CCC900USA').exists()
+        )
+        self.assertFalse(ArchiveJob.objects.exists())
+
+    @override_settings(SLM_DEFER_ARCHIVES=False)
+    def test_sync_archives(self):
+        with tarfile.open(fileobj=self.bundle('tar')) as bundle:
+            self.assertEqual(
+                bundle.getnames(),
+                [
+                    'AAA900USA_20220101.log',
+                    'BBB900USA_20220101.log',
+                    'CCC900USA_20210101.log'
+                ]
+            )
+        self.assertTrue(
+            ArchivedSiteLog.objects.filter(site__name='CCC900USA').exists()
+        )
+
+    def test_filters(self):
+        with tarfile.open(
+            fileobj=self.bundle(
+                'tgz',
+                name='AAA',
+                history=True,
+                log_format=['legacy', 'xml']
+            ),
+            mode='r:gz'
+        ) as bundle:
+            self.assertEqual(
+                sorted(bundle.getnames()),
+                [
+                    'AAA900USA_20200101.log',
+                    'AAA900USA_20200101.xml',
+                    'AAA900USA_20220101.log',
+                    'AAA900USA_20220101.xml'
+                ]
+            )
+
+        with zipfile.ZipFile(
+            self.bundle('zip', epoch='2020-06-01', log_format='xml')
+        ) as bundle:
+            self.assertEqual(
+                bundle.namelist(),
+                ['AAA900USA_20200101.xml', 'BBB900USA_20200101.xml']
+            )
+
+        self.assertEqual(
+            Client().get(
+                reverse('slm_public_api:bundle-list'),
+                {'format': 'tar', 'log_format': 'json'}
+            ).status_code,
+            400
+        )
+
+
+@override_settings(SLM_CHANGE_FEED_DELAY=0)
+class TestChangeFeed(TestCase):
+
+    def setUp(self):
+        agency = Agency.objects.create(name='Feed Agency', public=True)
+        private = Agency.objects.create(name='Private Agency', public=False)
+        self.sites = []
+        for name, site_agency in [
+            ('AAA900USA', agency),
+            ('BBB900USA', agency),
+            ('CCC900USA', private)
+        ]:
+            site = Site.objects.create(name=name)
+            site.agencies.add(site_agency)
+            self.sites.append(site)
+
+        self.epoch = datetime(2022, 1, 1, tzinfo=timezone.utc)
+        section = ContentType.objects.get_for_model(SiteOtherInstrumentation)
+        for site in self.sites:
+            LogEntry.objects.create(
+                type=LogEntryType.PUBLISH,
+                site=site,
+                epoch=self.epoch
+            )
+            LogEntry.objects.create(
+                type=LogEntryType.UPDATE,
+                site=site,
+                epoch=self.epoch
+            )
+        LogEntry.objects.create(
+            type=LogEntryType.PUBLISH,
+            site=self.sites[0],
+            site_log_type=section,
+            site_log_id=1,
+            epoch=self.epoch + timedelta(days=1)
+        )
+
+    def changes(self, **params):
+        response = Client().get(reverse('slm_public_api:changes-list'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_feed(self):
+        feed = self.changes()
+        self.assertFalse(feed['more'])
+        self.assertEqual(
+            [(change['site'], change['section']) for change in feed['changes']],
+            [
+                ('AAA900USA', None),
+                ('BBB900USA', None),
+                ('AAA900USA', 'siteotherinstrumentation')
+            ]
+        )
+        self.assertEqual(
+            datetime.fromisoformat(feed['changes'][0]['epoch']),
+            self.epoch
+        )
+        self.assertEqual(feed['cursor'], feed['changes'][-1]['cursor'])
+
+        empty = self.changes(cursor=feed['cursor'], wait=0.1)
+        self.assertEqual(empty['changes'], [])
+        self.assertEqual(empty['cursor'], feed['cursor'])
+
+        LogEntry.objects.create(
+            type=LogEntryType.PUBLISH,
+            site=self.sites[1],
+            epoch=self.epoch + timedelta(days=2)
+        )
+        new = self.changes(cursor=feed['cursor'])
+        self.assertEqual(
+            [change['site'] for change in new['changes']],
+            ['BBB900USA']
+        )
+
+    def test_limit(self):
+        cursor = 0
+        sites = []
+        while True:
+            feed = self.changes(cursor=cursor, limit=2)
+            sites.extend(change['site'] for change in feed['changes'])
+            cursor = feed['cursor']
+            if not feed['more']:
+                break
+        self.assertEqual(sites, ['AAA900USA', 'BBB900USA', 'AAA900USA'])
+        self.assertEqual(
+            Client().get(
+                reverse('slm_public_api:changes-list'),
+                {'cursor': 'abc'}
+            ).status_code,
+            400
+        )
+
+    def test_delay(self):
+        with self.settings(SLM_CHANGE_FEED_DELAY=60):
+            # changes are held back until slower transactions have committed
+            feed = self.changes()
+            self.assertEqual(feed['changes'], [])
+            self.assertEqual(feed['cursor'], 0)
+
+            LogEntry.objects.filter(
+                type=LogEntryType.PUBLISH
+            ).update(timestamp=now() - timedelta(seconds=61))
+            self.assertEqual(len(self.changes()['changes']), 3)
+
+
+class TestPermissionCache(TestCase):
+
+    def setUp(self):
+        self.agency = Agency.objects.create(name='Perm Agency')
+        self.other = Agency.objects.create(name='Other Agency')
+        self.site = Site.objects.create(name='AAA900USA')
+        self.site.agencies.add(self.agency)
+        self.other_site = Site.objects.create(name='BBB900USA')
+        self.other_site.agencies.add(self.other)
+        self.user = get_user_model().objects.create_user(
+            email='perms@example.com',
+            password='password'
+        )
+        self.user.agencies.add(self.agency)
+
+    def test_permissions(self):
+        self.assertEqual(
+            list(Site.objects.editable_by(self.user)),
+            [self.site]
+        )
+        self.assertFalse(self.user.is_moderator())
+        self.assertFalse(self.site.is_moderator(self.user))
+        self.assertTrue(self.site.can_edit(self.user))
+        self.assertFalse(self.other_site.can_edit(self.user))
+        self.assertFalse(Site.objects.moderated(self.user).exists())
+
+        # permissions are served from the cache
+        with self.assertNumQueries(0):
+            self.assertTrue(self.site.can_edit(self.user))
+            self.assertFalse(self.site.is_moderator(self.user))
+
+        group = Group.objects.create(name='Perm Moderators')
+        self.user.groups.add(group)
+        self.assertFalse(self.user.is_moderator())
+        group.permissions.add(
+            Permission.objects.get_by_natural_key(
+                'moderate_sites', 'slm', 'user'
+            )
+        )
+        self.assertTrue(self.user.is_moderator())
+        self.assertTrue(self.site.is_moderator(self.user))
+        self.assertFalse(self.other_site.is_moderator(self.user))
+        self.assertEqual(list(Site.objects.moderated(self.user)), [self.site])
+
+        self.other_site.agencies.add(self.agency)
+        self.assertTrue(self.other_site.is_moderator(self.user))
+
+        self.agency.users.remove(self.user)
+        self.assertFalse(Site.objects.editable_by(self.user).exists())
+        self.assertFalse(self.site.is_moderator(self.user))
+
+        self.user.is_superuser = True
+        self.user.save()
+        self.assertTrue(self.other_site.can_edit(self.user))
+
+
+class TestAlertAudience(TestCase):
+
+    def setUp(self):
+        self.agency = Agency.objects.create(name='Alert Agency')
+        self.other = Agency.objects.create(name='Other Agency')
+        self.site = Site.objects.create(name='AAA900USA')
+        self.site.agencies.add(self.agency)
+        self.other_site = Site.objects.create(name='BBB900USA')
+        self.other_site.agencies.add(self.other)
+        self.user = get_user_model().objects.create_user(
+            email='alerts@example.com',
+            password='password'
+        )
+        self.user.agencies.add(self.agency)
+        self.other_user = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='password'
+        )
+
+        self.broadcast = Alert.objects.create(
+            header='Broadcast',
+            level=AlertLevel.NOTICE
+        )
+        self.site_alert = SiteAlert.objects.create(
+            header='Site',
+            level=AlertLevel.WARNING,
+            site=self.site
+        )
+        self.other_site_alert = SiteAlert.objects.create(
+            header='Other Site',
+            level=AlertLevel.ERROR,
+            site=self.other_site
+        )
+        self.agency_alert = AgencyAlert.objects.create(
+            header='Agency',
+            level=AlertLevel.NOTICE,
+            agency=self.agency
+        )
+        self.other_agency_alert = AgencyAlert.objects.create(
+            header='Other Agency',
+            level=AlertLevel.ERROR,
+            agency=self.other
+        )
+        self.user_alert = UserAlert.objects.create(
+            header='User',
+            level=AlertLevel.NOTICE,
+            user=self.user
+        )
+        UserAlert.objects.create(
+            header='Other User',
+            level=AlertLevel.ERROR,
+            user=self.other_user
+        )
+
+    def test_visibility(self):
+        self.assertEqual(
+            {alert.pk for alert in Alert.objects.visible_to(self.user)},
+            {
+                self.broadcast.pk,
+                self.site_alert.pk,
+                self.agency_alert.pk,
+                self.user_alert.pk
+            }
+        )
+        self.assertEqual(
+            AlertAudience.objects.visible_to(self.user).max_level(),
+            AlertLevel.WARNING
+        )
+        self.assertEqual(
+            {alert.pk for alert in Alert.objects.for_site(self.site)},
+            {self.site_alert.pk}
+        )
+        self.assertEqual(
+            {alert.pk for alert in Alert.objects.concerning_sites(
+                [self.other_site]
+            )},
+            {
+                self.broadcast.pk,
+                self.other_site_alert.pk,
+                self.other_agency_alert.pk
+            }
+        )
+        self.assertEqual(
+            Alert.objects.visible_to(self.other_user).count(),
+            2
+        )
+
+        self.user.agencies.add(self.other)
+        self.assertEqual(
+            AlertAudience.objects.visible_to(self.user).max_level(),
+            AlertLevel.ERROR
+        )
+
+    def test_site_level(self):
+        stale = Site.objects.get(pk=self.site.pk)
+        self.site.refresh_from_db()
+        self.assertEqual(self.site.max_alert_level, AlertLevel.WARNING)
+        self.assertEqual(
+            Site.objects.annotate_max_alert().get(pk=self.site.pk).max_alert,
+            AlertLevel.WARNING
+        )
+
+        error = SiteAlert.objects.create(
+            header='Error',
+            level=AlertLevel.ERROR,
+            site=self.site
+        )
+        # the site instance the alert was created with is kept current
+        self.assertEqual(self.site.max_alert_level, AlertLevel.ERROR)
+        self.site.save()
+        stale.refresh_from_db()
+        self.assertEqual(stale.max_alert_level, AlertLevel.ERROR)
+
+        error.delete()
+        self.site.refresh_from_db()
+        self.assertEqual(self.site.max_alert_level, AlertLevel.WARNING)
+
+        self.site_alert.level = AlertLevel.NOTICE
+        self.site_alert.save()
+        self.site.refresh_from_db()
+        self.assertEqual(self.site.max_alert_level, AlertLevel.NOTICE)
+
+        # moving the alert recomputes the old and new site levels once
+        self.site_alert.site = self.other_site
+        self.site_alert.level = AlertLevel.ERROR
+        with self.assertNumQueries(5):
+            AlertAudience.objects.index(self.site_alert)
+        self.site.refresh_from_db()
+        self.assertIsNone(self.site.max_alert_level)
+        self.assertEqual(self.other_site.max_alert_level, AlertLevel.ERROR)
+        self.site_alert.site = self.site
+        self.site_alert.level = AlertLevel.NOTICE
+        self.site_alert.save()
+        self.assertEqual(self.site.max_alert_level, AlertLevel.NOTICE)
+
+        # a site loaded before its alerts changed does not write back its
+        # stale level when its status is updated
+        stale = Site.objects.get(pk=self.site.pk)
+        self.assertEqual(stale.max_alert_level, AlertLevel.NOTICE)
+        Alert.objects.filter(pk=self.site_alert.pk).delete()
+        stale.update_status(save=True)
+        self.site.refresh_from_db()
+        self.assertIsNone(self.site.max_alert_level)
+        self.assertFalse(
+            AlertAudience.objects.filter(alert=self.site_alert.pk).exists()
+        )
+
+
+@override_settings(COMPRESS_OFFLINE=False, COMPRESS_ENABLED=False)
+class TestEditView(TestCase):
+
+    # the number of queries it takes to render the edit page of a site log,
+    # this must not depend on the number of sections or subsections
+    EDIT_QUERIES = 19
+
+    def setUp(self):
+        self.agency = Agency.objects.create(name='Edit Agency')
+        self.site = Site.objects.create(name='AAA900USA')
+        self.site.agencies.add(self.agency)
+        self.user = get_user_model().objects.create_user(
+            email='editor@example.com',
+            password='password'
+        )
+        self.user.agencies.add(self.agency)
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def add_instruments(self, count, **kwargs):
+        for _ in range(count):
+            SiteOtherInstrumentation.objects.create(
+                site=self.site,
+                instrumentation='Instrument',
+                **kwargs
+            )
+
+    def edit(self, section=None, num_queries=None):
+        kwargs = {'station': self.site.name}
+        if section:
+            kwargs['section'] = section
+        url = reverse('slm:edit', kwargs=kwargs)
+        self.client.get(url)
+        if num_queries is None:
+            return self.client.get(url)
+        with self.assertNumQueries(num_queries):
+            return self.client.get(url)
+
+    def test_navigation(self):
+        self.add_instruments(2, published=True)
+        self.add_instruments(
+            1,
+            published=False,
+            _flags={'instrumentation': 'Flagged'}
+        )
+        self.add_instruments(1, published=True, is_deleted=True)
+
+        response = self.edit('otherinstrumentation')
+        self.assertEqual(response.status_code, 200)
+        sections = response.context['sections']
+        heading = sections['Meteorological Instr.']
+        self.assertEqual(heading['flags'], 1)
+        self.assertEqual(heading['status'], SiteLogStatus.UPDATED)
+        self.assertTrue(heading['active'])
+        self.assertEqual(
+            heading['subsections']['Other Instrumentation']['flags'],
+            1
+        )
+        self.assertTrue(
+            heading['subsections']['Other Instrumentation']['active']
+        )
+        self.assertEqual(
+            sections['Location']['status'],
+            SiteLogStatus.EMPTY
+        )
+        # one add form and one form for each visible subsection
+        self.assertEqual(len(response.context['forms']), 4)
+
+    def test_query_count(self):
+        self.edit(num_queries=self.EDIT_QUERIES)
+        self.edit('location', num_queries=self.EDIT_QUERIES + 1)
+        self.add_instruments(3)
+        self.edit(num_queries=self.EDIT_QUERIES)
+        self.edit(
+            'otherinstrumentation',
+            num_queries=self.EDIT_QUERIES + 2
+        )
+        self.add_instruments(10, _flags={'instrumentation': 'Flagged'})
+        self.edit(num_queries=self.EDIT_QUERIES)
+        self.edit(
+            'otherinstrumentation',
+            num_queries=self.EDIT_QUERIES + 2
+        )
+
+
+class TestSectionStatus(TestCase):
+
+    def setUp(self):
+        self.site = Site.objects.create(
+            name='AAA900USA',
+            status=SiteLogStatus.PUBLISHED
+        )
+        SiteLocation.objects.create(site=self.site, published=True)
+        self.instruments = [
+            SiteOtherInstrumentation.objects.create(
+                site=self.site,
+                instrumentation='Instrument',
+                published=True
+            ) for _ in range(3)
+        ]
+        self.site.update_status()
+
+    def statuses(self):
+        return {
+            (status.section_type.model_class(), status.subsection):
+                (status.num_flags, status.status)
+            for status in SiteSectionStatus.objects.filter(site=self.site)
+        }
+
+    def assertConsistent(self):
+        """
+        The incrementally maintained statuses must match a full recompute.
+        """
+        incremental = self.statuses()
+        num_flags, status = self.site.num_flags, self.site.status
+        self.site.update_status()
+        self.assertEqual(incremental, self.statuses())
+        self.assertEqual(self.site.num_flags, num_flags)
+        self.assertEqual(self.site.status, status)
+
+    def test_incremental(self):
+        self.assertEqual(len(self.statuses()), 4)
+        self.assertEqual(self.site.num_flags, 0)
+        self.assertEqual(self.site.status, SiteLogStatus.PUBLISHED)
+
+        # an edit of one subsection only touches that subsection's status
+        edit = SiteOtherInstrumentation.objects.create(
+            site=self.site,
+            subsection=self.instruments[0].subsection,
+            instrumentation='Edited',
+            _flags={'instrumentation': 'Flagged', 'notes': 'Flagged'}
+        )
+        with self.assertNumQueries(7):
+            self.site.update_status(section=edit)
+        self.assertEqual(self.site.num_flags, 2)
+        self.assertEqual(self.site.status, SiteLogStatus.UPDATED)
+        self.assertConsistent()
+
+        edit.publish()
+        self.site.refresh_from_db()
+        self.assertEqual(self.site.num_flags, 2)
+        self.assertEqual(self.site.status, SiteLogStatus.PUBLISHED)
+        self.assertConsistent()
+
+        # published deletions no longer count towards the site status
+        edit.pk = None
+        edit.is_deleted = True
+        edit.published = False
+        edit.save()
+        edit.publish()
+        self.site.refresh_from_db()
+        self.assertEqual(self.site.num_flags, 0)
+        self.assertEqual(len(self.statuses()), 3)
+        self.assertConsistent()
+
+        # unpublished rows that are removed entirely
+        new = SiteOtherInstrumentation.objects.create(
+            site=self.site,
+            instrumentation='New'
+        )
+        self.site.update_status(section=new)
+        self.assertEqual(self.site.status, SiteLogStatus.UPDATED)
+        new.delete()
+        self.site.update_status(section=new)
+        self.assertEqual(self.site.status, SiteLogStatus.PUBLISHED)
+        self.assertConsistent()
+
+
+@override_settings(SLM_DATA_VALIDATORS={
+    'slm.SiteMoreInformation': {
+        'primary': [FieldPreferred()],
+        'secondary': [FieldPreferred()],
+        'more_info': [FieldPreferred()]
+    }
+})
+class TestValidation(TestCase):
+
+    def setUp(self):
+        self.sites = [
+            Site.objects.create(name=name)
+            for name in ['AAA900USA', 'BBB900USA', 'CCC900USA']
+        ]
+        self.sections = [
+            SiteMoreInformation.objects.create(site=site)
+            for site in self.sites
+        ]
+
+    def test_clean(self):
+        section = self.sections[0]
+        # flags are set in memory and left to the caller to save
+        with self.assertNumQueries(0):
+            section.clean()
+        self.assertEqual(
+            set(section._flags.keys()),
+            {'primary', 'secondary', 'more_info'}
+        )
+        self.assertFalse(
+            SiteMoreInformation.objects.get(pk=section.pk)._flags
+        )
+        with self.assertNumQueries(1):
+            section.save()
+        section.refresh_from_db()
+        self.assertEqual(len(section._flags), 3)
+
+    def test_bulk_validate(self):
+        self.sections[0].primary = 'Primary'
+        self.sections[0].save()
+        SiteMoreInformation.objects.filter(pk=self.sections[2].pk).update(
+            _flags={'notes': 'Stale'}
+        )
+
+        with self.assertNumQueries(2):
+            errors = SiteMoreInformation.objects.filter(
+                site__in=self.sites
+            ).snapshot().validate()
+        self.assertEqual(errors, {})
+        flags = {
+            section.site_id: section._flags
+            for section in SiteMoreInformation.objects.all()
+        }
+        self.assertEqual(
+            set(flags[self.sites[0].pk].keys()),
+            {'secondary', 'more_info'}
+        )
+        self.assertEqual(len(flags[self.sites[1].pk]), 3)
+        self.assertEqual(len(flags[self.sites[2].pk]), 4)
+
+        SiteMoreInformation.objects.all().validate(clear=True)
+        self.assertEqual(
+            {
+                len(section._flags)
+                for section in SiteMoreInformation.objects.exclude(
+                    pk=self.sections[0].pk
+                )
+            },
+            {3}
+        )
+
+        # nothing changed, nothing is written
+        with self.assertNumQueries(1):
+            SiteMoreInformation.objects.all().validate()
+
+    def test_validation_plan(self):
+        plan = get_validation_plan(SiteMoreInformation)
+        self.assertEqual(
+            [field.name for field, _ in plan],
+            ['primary', 'secondary', 'more_info']
+        )
+        self.assertIs(get_validation_plan(SiteMoreInformation), plan)
+
+        # plans are recompiled when the settings change
+        with self.settings(SLM_DATA_VALIDATORS={}):
+            self.assertEqual(get_validation_plan(SiteMoreInformation), ())
+            self.sections[0].clean()
+            self.assertFalse(self.sections[0]._flags)
+        self.assertEqual(get_validation_plan(SiteMoreInformation), plan)
+
+    def test_section_plans(self):
+        """
+        Run the default validators over every section type.
+        """
+        with self.settings(
+            SLM_DATA_VALIDATORS=validation.SLM_DATA_VALIDATORS
+        ):
+            for section in [
+                *Site.section_fields(),
+                *Site.subsection_fields()
+            ]:
+                model = Site._meta.get_field(section).related_model
+                configured = validation.SLM_DATA_VALIDATORS.get(
+                    model._meta.label,
+                    {}
+                )
+                self.assertEqual(
+                    {
+                        field.name: list(validators)
+                        for field, validators in get_validation_plan(model)
+                    },
+                    configured
+                )
+                instance = model(site=self.sites[0])
+                instance.run_validators()
+                self.assertTrue(
+                    set(instance._flags or {}) <= set(configured)
+                )
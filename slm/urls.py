@@ -80,12 +80,15 @@ APIS = {
     ],
     'public': [
         ('stations', public_views.StationListViewSet),
+        ('export', public_views.StationExportViewSet),
         ('receiver', public_views.ReceiverViewSet),
         ('antenna', public_views.AntennaViewSet),
         ('radome', public_views.RadomeViewSet),
         ('download', public_views.SiteLogDownloadViewSet),
         ('files', public_views.SiteFileUploadViewSet),
         ('archive', public_views.ArchiveViewSet),
+        ('bundle', public_views.ArchiveBundleViewSet),
+        ('changes', public_views.ChangeFeedViewSet),
         ('agency', public_views.AgencyViewSet),
         ('network', public_views.NetworkViewSet)
     ]
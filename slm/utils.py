@@ -5,6 +5,8 @@ from logging import Filter
 from pprint import pformat
 from rest_framework.serializers import Serializer
 from django.conf import settings
+from django.core.cache import caches
+from uuid import uuid4
 
 
 PROTOCOL = getattr(settings, 'SLM_HTTP_PROTOCOL', None)
@@ -49,11 +51,124 @@ def from_email():
     )
 
 
+class PermissionCache:
+    """
+    The sites each user may edit and moderate are stored in the Django cache
+    named by the SLM_PERMISSION_CACHE setting (None disables caching) so they
+    are shared by all processes. Entries are keyed by user and a generation
+    token. A user's entry is dropped by invalidate(user) when the user
+    changes and invalidate() rotates the generation token, which orphans all
+    entries, when agency membership, groups or permissions change.
+    """
+
+    generation_key = 'slm.permissions.generation'
+
+    @property
+    def cache(self):
+        alias = getattr(settings, 'SLM_PERMISSION_CACHE', 'default')
+        if alias:
+            return caches[alias]
+        return None
+
+    def key(self, user):
+        generation = self.cache.get(self.generation_key)
+        if generation is None:
+            generation = uuid4().hex
+            self.cache.set(self.generation_key, generation, None)
+        return f'slm.permissions.{generation}.{user.pk}'
+
+    @staticmethod
+    def compute(user):
+        from django.contrib.auth.models import Permission
+        from slm.models import Site
+        moderate = Permission.objects.get_by_natural_key(
+            'moderate_sites', 'slm', 'user'
+        )
+        editable = list(
+            Site.objects.filter(
+                agencies__in=user.agencies.all()
+            ).values_list('pk', flat=True).distinct()
+        )
+        moderator = (
+            user.user_permissions.filter(pk=moderate.pk).exists() or
+            user.groups.filter(permissions=moderate).exists()
+        )
+        return {
+            'moderator': moderator,
+            'editable': editable,
+            'moderated': editable if moderator else []
+        }
+
+    def permissions(self, user):
+        """
+        Get the site permissions of a non-superuser.
+
+        :param user: The authenticated user
+        :return: A dictionary where moderator is True if the user has the
+            moderate permission and editable and moderated are lists of the
+            primary keys of the sites the user may edit and moderate.
+        """
+        cache = self.cache
+        if cache is None:
+            return self.compute(user)
+        key = self.key(user)
+        perms = cache.get(key)
+        if perms is None:
+            perms = self.compute(user)
+            cache.set(
+                key,
+                perms,
+                getattr(settings, 'SLM_PERMISSION_CACHE_TIMEOUT', None)
+            )
+        return perms
+
+    def is_moderator(self, user):
+        """
+        :param user: The user
+        :return: True if the user has the moderate permission.
+        """
+        if not user or not user.is_authenticated:
+            return False
+        return user.is_superuser or self.permissions(user)['moderator']
+
+    def editable_sites(self, user):
+        """
+        :param user: The (non-superuser) user
+        :return: The set of primary keys of the sites the user may edit.
+        """
+        if not user or not user.is_authenticated:
+            return set()
+        return set(self.permissions(user)['editable'])
+
+    def moderated_sites(self, user):
+        """
+        :param user: The (non-superuser) user
+        :return: The set of primary keys of the sites the user may moderate.
+        """
+        if not user or not user.is_authenticated:
+            return set()
+        return set(self.permissions(user)['moderated'])
+
+    def invalidate(self, user=None):
+        """
+        Discard cached permissions.
+
+        :param user: The user whose permissions changed, if not given the
+            permissions of all users are discarded.
+        """
+        if self.cache is None:
+            return
+        if user is None:
+            self.cache.delete(self.generation_key)
+        elif user.pk is not None:
+            self.cache.delete(self.key(user))
+
+
+permission_cache = PermissionCache()
+
+
 def clear_caches():
-    from slm.models import Site
-    from slm.models import User
-    User.is_moderator.cache_clear()
-    Site.is_moderator.cache_clear()
+    permission_cache.invalidate()
 
 
 class SquelchStackTraces(Filter):
@@ -30,6 +30,38 @@ def get_validators(model, field):
     ).get(model, {}).get(field, [])
 
 
+# validation plans compiled from SLM_DATA_VALIDATORS, keyed by model class
+VALIDATION_PLANS = {}
+
+
+def get_validation_plan(model):
+    """
+    Get the validation plan for a given model class. The plan is compiled
+    from validation settings the first time it is requested and lists only
+    the fields that have validators, in field order.
+
+    :param model: The Django model class
+    :return: A tuple of (field, validators) 2-tuples
+    """
+    plan = VALIDATION_PLANS.get(model, None)
+    if plan is None:
+        plan = VALIDATION_PLANS[model] = tuple(
+            (field, tuple(validators))
+            for field, validators in (
+                (field, get_validators(model._meta.label, field.name))
+                for field in model._meta.fields
+            ) if validators
+        )
+    return plan
+
+
+def clear_validation_plans():
+    """
+    Discard compiled validation plans so they are recompiled from settings.
+    """
+    VALIDATION_PLANS.clear()
+
+
 # toggle this flag to allow save block bypassing.
 BYPASS_BLOCKS = None
 
@@ -81,10 +113,13 @@ class SLMValidator:
         self.throw_flag(message, instance, field)
 
     def throw_flag(self, message, instance, field):
+        """
+        Flag the field on the instance. Flags are only set in memory, it is
+        up to the caller to save them.
+        """
         if not instance._flags:
             instance._flags = {}
         instance._flags[field.name] = message
-        instance.save()
 
 
 class FieldPreferred(SLMValidator):
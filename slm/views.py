@@ -15,14 +15,12 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.core.exceptions import PermissionDenied
-from django.db.models import Max, Q
-from django.db.models.fields import NOT_PROVIDED
+from django.db.models import Q
 from django.http import FileResponse, Http404, HttpResponseNotFound
 from django.utils.decorators import method_decorator
 from django.views.generic import TemplateView
 from slm import defines
 from slm.defines import (
-    AlertLevel,
     SiteLogFormat,
     SiteFileUploadStatus,
     SiteLogStatus,
@@ -59,6 +57,7 @@ from slm.forms import (
 from slm.models import (
     Agency,
     Alert,
+    AlertAudience,
     ArchivedSiteLog,
     Network,
     Site,
@@ -85,16 +84,10 @@ class SLMView(TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context.update(self.DEFINES)
-        max_alert = Alert.objects.visible_to(
-            self.request.user
-        ).aggregate(Max('level'))['level__max']
-        if max_alert is NOT_PROVIDED:
-            max_alert = None
-
         context['user'] = self.request.user
-        context['alert_level'] = (
-            AlertLevel(max_alert) if max_alert else None
-        )
+        context['alert_level'] = AlertAudience.objects.visible_to(
+            self.request.user
+        ).max_level()
 
         context['SLM_ORG_NAME'] = getattr(
             settings,
@@ -154,12 +147,6 @@ class StationContextView(SLMView):
         else:
             self.agencies = filter_form.initial.get('agency', [])
 
-        max_alert = Alert.objects.visible_to(
-            self.request.user
-        ).for_site(self.site).aggregate(Max('level'))['level__max']
-        if max_alert is NOT_PROVIDED:
-            max_alert = None
-
         context.update({
             'num_sites': self.sites.count(),
             'station': self.station if self.station else None,
@@ -180,14 +167,19 @@ class StationContextView(SLMView):
                 'slm:log',
                 'slm:edit'
             } else self.request.resolver_match.view_name,
+            # sites are only shown to users who can see all of their alerts
             'station_alert_level': (
-                AlertLevel(max_alert) if max_alert else None
+                self.site.max_alert_level if self.site else None
             ),
             'site_alerts': Alert.objects.site_alerts(),
             'filter_form': filter_form
         })
 
-        if self.station:
+        if self.site and self.site.name == self.station:
+            # the site has already been fetched and checked for edit
+            # permissions
+            self.station = self.site
+        elif self.station:
             try:
                 self.station = Site.objects.get(name=context['station'])
                 if (
@@ -294,24 +286,32 @@ class EditView(StationContextView):
             raise Http404(
                 f'Station {kwargs.get("station", "")} does not exist!'
             )
+        files = list(self.site.sitefileuploads.available_to(
+            self.request.user
+        ).filter(
+            status=SiteFileUploadStatus.PUBLISHED,
+            file_type__in=[SLMFileType.SITE_IMAGE, SLMFileType.ATTACHMENT]
+        ))
         context.update({
             'section_id': kwargs.get('section', None),
             'sections': {},
             'forms': [],
-            'station_images': self.site.sitefileuploads.available_to(
-                self.request.user
-            ).filter(
-                status=SiteFileUploadStatus.PUBLISHED,
-                file_type=SLMFileType.SITE_IMAGE
-            ),
-            'station_attachments': self.site.sitefileuploads.available_to(
-                self.request.user
-            ).filter(
-                status=SiteFileUploadStatus.PUBLISHED,
-                file_type=SLMFileType.ATTACHMENT
-            )
+            'station_images': [
+                file for file in files
+                if file.file_type == SLMFileType.SITE_IMAGE
+            ],
+            'station_attachments': [
+                file for file in files
+                if file.file_type == SLMFileType.ATTACHMENT
+            ]
         })
 
+        # the status of every section at head is fetched in one query, only
+        # the section being edited is loaded in full
+        snapshot = {}
+        for row in self.site.status_snapshot():
+            snapshot.setdefault(row['section'], []).append(row)
+
         section = self.FORMS.get(kwargs.get('section', None), None)
         if section:
             context['section_name'] = section.section_name()
@@ -361,18 +361,39 @@ class EditView(StationContextView):
                 if hasattr(form, 'NAV_HEADING'):
                     subheading = heading['subsections'][form.section_name()]
 
-                for inst in reversed(
-                    form._meta.model.objects.station(self.station).head()
-                ):
-                    if inst.published and inst.is_deleted:
+                for inst in snapshot.get(form._meta.model, []):
+                    if inst['published'] and inst['is_deleted']:
                         continue  # elide deleted instances if published
 
-                    if section is form:
-                        # if this is our requested form for editing - populate
-                        # it with data from head
+                    num_flags = len(inst['_flags'] or {})
+                    mod_status = (
+                        SiteLogStatus.PUBLISHED if inst['published']
+                        else SiteLogStatus.UPDATED
+                    )
+                    heading['flags'] += num_flags
+                    heading['status'] = heading['status'].merge(mod_status)
+                    if subheading:
+                        subheading['flags'] += num_flags
+                        subheading['status'] = subheading['status'].merge(
+                            mod_status
+                        )
+
+                if section is form:
+                    # if this is our requested form for editing - populate
+                    # it with data from head
+                    instances = [
+                        inst for inst in reversed(
+                            form._meta.model.objects.station(self.site).head()
+                        ) if not (inst.published and inst.is_deleted)
+                    ]
+                    for inst in instances:
+                        inst.site = self.site
+                    diffs = form._meta.model.published_diffs(instances)
+                    for inst in instances:
                         context['forms'].append(
                             form(
                                 instance=inst,
+                                diff=diffs[inst.pk],
                                 initial={
                                     field: getattr(inst, field)
                                     for field in form._meta.fields
@@ -380,19 +401,6 @@ class EditView(StationContextView):
                             )
                         )
 
-                    heading['flags'] += inst.num_flags if inst else 0
-                    heading['status'] = heading.get(
-                        'status',
-                        inst.mod_status
-                    ).merge(inst.mod_status)
-                    if subheading:
-                        subheading.setdefault('flags', 0)
-                        subheading['flags'] += inst.num_flags if inst else 0
-                        subheading['status'] = subheading.get(
-                            'status', inst.mod_status
-                        ).merge(inst.mod_status)
-
-                if section is form:
                     # if this is the edit section we add an empty form as the
                     # first form in the context, the template knows to render
                     # this form as the 'add' subsection form
@@ -414,13 +422,15 @@ class EditView(StationContextView):
                         subheading['active'] = True
 
             else:
-                instance = form._meta.model.objects.station(
-                    self.station
-                ).head()  # we always edit on head
                 if section is form:
                     # only one form is requested per edit view request - if
                     # this section is that form we need to populate it with
                     # data
+                    instance = form._meta.model.objects.station(
+                        self.site
+                    ).head()  # we always edit on head
+                    if instance:
+                        instance.site = self.site
                     context['forms'].append(
                         form(
                             instance=instance,
@@ -433,15 +443,14 @@ class EditView(StationContextView):
                     context['sections'][form.section_name()]['active'] = True
 
                 # for all sections we need to set status and number of flags
-                context['sections'][
-                    form.section_name()
-                ]['flags'] = instance.num_flags if instance else 0
-                context['sections'][
-                    form.section_name()
-                ]['status'] = (
-                    instance.mod_status if instance
-                    else SiteLogStatus.EMPTY
-                )
+                for inst in snapshot.get(form._meta.model, []):
+                    context['sections'][form.section_name()].update({
+                        'flags': len(inst['_flags'] or {}),
+                        'status': (
+                            SiteLogStatus.PUBLISHED if inst['published']
+                            else SiteLogStatus.UPDATED
+                        )
+                    })
 
         return context
 